@@ -0,0 +1,297 @@
+"""
+Fake Mirror Server
+Local stand-in for papacambridge and physicsandmathstutor serving synthetic PDFs
+Injects latency, bandwidth caps, 404/429/5xx answers, truncated bodies and HTML error pages
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# Default configuration
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CHUNK_SIZE = 16 * 1024
+
+# URL layouts of the real mirrors (see download/mirrors.py MIRRORS)
+PAPACAMBRIDGE_PATH = ("/papacambridge/download_file.php?files=https://pastpapers.papacambridge.com"
+                      "/directories/CAIE/CAIE-pastpapers/upload/")
+PMT_PATH = "/pmt/download/"
+
+# Behaviour of the server; every rate is a probability between 0 and 1
+DEFAULT_PROFILE = {
+    'latency': 0.05,  # seconds before the response headers
+    'jitter': 0.02,  # extra random seconds on top of latency
+    'bandwidth': 0,  # bytes per second per response (0 = unlimited)
+    'size': 64 * 1024,  # average synthetic PDF size in bytes
+    'missing': 0.0,  # papers answering 404 (fixed per URL)
+    'html': 0.0,  # papers answering a 200 HTML error page (fixed per URL)
+    'throttle': 0.0,  # requests answering 429 with Retry-After
+    'server_error': 0.0,  # requests answering 500
+    'truncate': 0.0,  # responses cut off halfway through the body
+    'retry_after': 1,  # seconds sent with 429 answers
+}
+
+HTML_PAGE = (b"<!DOCTYPE html><html><head><title>File not found</title></head>"
+             b"<body><h1>Sorry, this paper is not available.</h1></body></html>")
+
+
+def url_fraction(key, salt):
+    """
+    Map a URL to a stable number in [0, 1) so per-paper faults repeat across runs.
+
+    Args:
+        key (str): Request path and query
+        salt (str): Distinguishes independent decisions for the same URL
+
+    Returns:
+        float: Deterministic pseudo-random fraction
+    """
+    digest = hashlib.sha1(f"{salt}:{key}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') / 2 ** 32
+
+
+@lru_cache(maxsize=4096)
+def synthetic_pdf(key, average_size):
+    """
+    Build a small valid one-page PDF whose bytes depend only on the URL.
+
+    Args:
+        key (str): Request path and query
+        average_size (int): Target size; each paper varies by up to +/-50%
+
+    Returns:
+        bytes: PDF file with a correct xref table and trailer
+    """
+    target = int(average_size * (0.5 + url_fraction(key, 'size')))
+    text = key.rsplit('/', 1)[-1].replace('(', '[').replace(')', ']')
+    content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET\n".encode('latin-1', 'replace')
+    padding_line = b"% " + hashlib.sha1(key.encode('utf-8')).hexdigest().encode('ascii') * 2 + b"\n"
+    content += padding_line * max(0, (target - 600) // len(padding_line))
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R >>",
+        b"<< /Length " + str(len(content)).encode('ascii') + b" >>\nstream\n" + content + b"endstream",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode('ascii') + body + b"\nendobj\n"
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii')
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode('ascii')
+    pdf += (f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n").encode('ascii')
+    return bytes(pdf)
+
+
+class FakeMirrorHandler(BaseHTTPRequestHandler):
+    """Serves synthetic papers under both mirror URL layouts."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """Keep the console quiet; counters are in server.stats."""
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _send_empty(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _serve(self, send_body):
+        server = self.server
+        profile = server.profile
+        key = unquote(self.path)
+        time.sleep(profile['latency'] + server.rng.uniform(0, profile['jitter']))
+
+        if not (key.startswith(PAPACAMBRIDGE_PATH) or key.startswith(PMT_PATH)) or not key.endswith('.pdf'):
+            server.count('404')
+            return self._send_empty(404)
+
+        # Per-paper faults are fixed, per-request faults are random
+        if url_fraction(key, 'missing') < profile['missing']:
+            server.count('404')
+            return self._send_empty(404)
+        if server.roll(profile['throttle']):
+            server.count('429')
+            return self._send_empty(429, (('Retry-After', str(profile['retry_after'])),))
+        if server.roll(profile['server_error']):
+            server.count('500')
+            return self._send_empty(500)
+        if url_fraction(key, 'html') < profile['html']:
+            server.count('html')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(HTML_PAGE)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(HTML_PAGE)
+            return
+
+        pdf = synthetic_pdf(key, profile['size'])
+        etag = '"' + hashlib.sha1(pdf).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            server.count('304')
+            return self._send_empty(304, (('ETag', etag),))
+
+        start = 0
+        range_header = self.headers.get('Range', '')
+        if range_header.startswith('bytes=') and self.headers.get('If-Range', etag) == etag:
+            try:
+                start = int(range_header[len('bytes='):].split('-')[0])
+            except ValueError:
+                start = 0
+            if start >= len(pdf):
+                server.count('416')
+                return self._send_empty(416, (('Content-Range', f"bytes */{len(pdf)}"),))
+
+        body = pdf[start:]
+        self.send_response(206 if start else 200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Accept-Ranges', 'bytes')
+        if start:
+            self.send_header('Content-Range', f"bytes {start}-{len(pdf) - 1}/{len(pdf)}")
+        self.end_headers()
+        server.count('206' if start else '200')
+        if not send_body:
+            return
+
+        if server.roll(profile['truncate']):
+            server.count('truncated')
+            body = body[:len(body) // 2]
+            self.close_connection = True
+        self._write_throttled(body, profile['bandwidth'])
+        server.count('bytes', len(body))
+
+    def _write_throttled(self, body, bandwidth):
+        """Send a body, sleeping between chunks to respect the bandwidth cap."""
+        for offset in range(0, len(body), CHUNK_SIZE):
+            chunk = body[offset:offset + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            if bandwidth:
+                time.sleep(len(chunk) / bandwidth)
+
+
+class FakeMirrorServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fault profile and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, profile=None, seed=None):
+        """
+        Bind the server.
+
+        Args:
+            address (tuple): (host, port); port 0 picks a free port
+            profile (dict): Overrides for DEFAULT_PROFILE
+            seed (int): Seed for the per-request fault rolls
+        """
+        super().__init__(address, FakeMirrorHandler)
+        self.profile = dict(DEFAULT_PROFILE, **(profile or {}))
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def roll(self, probability):
+        """Decide a per-request fault."""
+        return probability > 0 and self.rng.random() < probability
+
+    def count(self, counter, amount=1):
+        """Increment a request counter."""
+        with self._lock:
+            self.stats[counter] = self.stats.get(counter, 0) + amount
+
+    @property
+    def base_url(self):
+        """Root URL of the server, e.g. http://127.0.0.1:8765"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def mirror_bases(base_url):
+    """
+    Get MIRRORS entries pointing the downloaders at a fake mirror.
+
+    Args:
+        base_url (str): Root URL of a running FakeMirrorServer
+
+    Returns:
+        dict: Mirror name -> base URL, same keys as mirrors.MIRRORS
+    """
+    return {
+        'papacambridge': base_url + PAPACAMBRIDGE_PATH,
+        'pmt': base_url + PMT_PATH,
+    }
+
+
+def start_server(host=DEFAULT_HOST, port=0, profile=None, seed=None):
+    """
+    Start a fake mirror on a background thread.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port (0 picks a free one)
+        profile (dict): Overrides for DEFAULT_PROFILE
+        seed (int): Seed for the per-request fault rolls
+
+    Returns:
+        FakeMirrorServer: Running server (call shutdown() to stop it)
+    """
+    server = FakeMirrorServer((host, port), profile, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_profile_arguments(parser):
+    """Add one command-line option per DEFAULT_PROFILE setting."""
+    for name, default in DEFAULT_PROFILE.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default,
+                            help=f"(default: {default})")
+
+
+def profile_from_args(args):
+    """Collect the DEFAULT_PROFILE settings from parsed arguments."""
+    return {name: getattr(args, name) for name in DEFAULT_PROFILE}
+
+
+def main():
+    """Run a fake mirror in the foreground."""
+    parser = argparse.ArgumentParser(description="Serve synthetic past papers with injectable faults")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--seed', type=int, default=None)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeMirrorServer((args.host, args.port), profile_from_args(args), args.seed)
+    print(f"✓ Fake mirror listening on {server.base_url}")
+    print("Point download/mirrors.py MIRRORS at:")
+    for name, url in mirror_bases(server.base_url).items():
+        print(f"  {name}: {url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nRequests: {server.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Download Benchmark
+Runs the downloader scripts against the local fake mirror and reports files/s and MB/s
+Measures a cold pass (empty folder) and warm passes (revalidation) without touching the real sites
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from fake_mirror import start_server, mirror_bases, add_profile_arguments, profile_from_args
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "download"))
+import download_metrics
+import mirrors
+import rate_limiter
+
+# Downloader module and its output-folder setting per subject
+SCRIPTS = {
+    '0971': ('Download', 'PARENT_FOLDER'),
+    '0620': ('download_chemistry_0620', 'OUTPUT_DIR'),
+}
+
+
+def run_pass(module, root_directory):
+    """
+    Run one downloader pass and read back its metrics.
+
+    Args:
+        module (module): Downloader script module (its main() is called)
+        root_directory (Path): Download root configured on the module
+
+    Returns:
+        dict: Snapshot written to download_metrics.json by the run
+    """
+    download_metrics.reset_metrics()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        module.main()
+    with open(root_directory / download_metrics.METRICS_JSON, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def summarize(name, snapshot):
+    """
+    Reduce a metrics snapshot to the benchmark figures.
+
+    Args:
+        name (str): Pass label
+        snapshot (dict): Metrics snapshot of the pass
+
+    Returns:
+        dict: Files per outcome, elapsed seconds, files/s and MB/s
+    """
+    elapsed = max(snapshot['elapsed_seconds'], 1e-9)
+    files = sum(snapshot['files'].values())
+    return {
+        'pass': name,
+        'files': files,
+        'outcomes': snapshot['files'],
+        'elapsed_seconds': elapsed,
+        'files_per_second': files / elapsed,
+        'mb_per_second': snapshot['bytes'] / elapsed / (1024 * 1024),
+        'bytes_skipped': snapshot['bytes_skipped'],
+    }
+
+
+def print_result(result):
+    """Print one benchmark pass."""
+    outcomes = ', '.join(f"{count} {outcome}" for outcome, count in sorted(result['outcomes'].items()))
+    print(f"{result['pass']:<8} {result['files']:>5} files in {result['elapsed_seconds']:7.2f} s  "
+          f"{result['files_per_second']:7.2f} files/s  {result['mb_per_second']:7.2f} MB/s  ({outcomes})")
+
+
+def main():
+    """Benchmark a downloader against a local fake mirror."""
+    parser = argparse.ArgumentParser(description="Benchmark the downloaders against a local fake mirror")
+    parser.add_argument('--subject', choices=sorted(SCRIPTS), default='0971')
+    parser.add_argument('--warm-passes', type=int, default=1, help="Revalidation passes after the cold one")
+    parser.add_argument('--workers', type=int, help="Override MAX_WORKERS")
+    parser.add_argument('--per-host', type=int, help="Override MAX_PER_HOST")
+    parser.add_argument('--delay', type=float, help="Override DELAY_BETWEEN_DOWNLOADS")
+    parser.add_argument('--max-rate', type=float, default=rate_limiter.MAX_RATE,
+                        help="Rate limiter ceiling in requests/s per host")
+    parser.add_argument('--no-validate', action='store_true', help="Disable validation while downloading")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--seed', type=int, default=0)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(profile=profile_from_args(args), seed=args.seed)
+    mirrors.MIRRORS.update(mirror_bases(server.base_url))
+    rate_limiter.MAX_RATE = args.max_rate
+
+    module_name, folder_setting = SCRIPTS[args.subject]
+    module = importlib.import_module(module_name)
+    for setting, value in (('MAX_WORKERS', args.workers), ('MAX_PER_HOST', args.per_host),
+                           ('DELAY_BETWEEN_DOWNLOADS', args.delay)):
+        if value is not None:
+            setattr(module, setting, value)
+    if args.no_validate:
+        module.VALIDATE_WHILE_DOWNLOADING = False
+
+    print(f"Benchmarking {module_name}.py against {server.base_url} "
+          f"({module.MAX_WORKERS} workers, {module.MAX_PER_HOST} per host, "
+          f"max {rate_limiter.MAX_RATE:g} req/s per host)\n")
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir) / getattr(module, folder_setting)
+        setattr(module, folder_setting, str(root))
+        for number in range(args.warm_passes + 1):
+            name = 'cold' if number == 0 else f"warm {number}"
+            result = summarize(name, run_pass(module, root))
+            print_result(result)
+            results.append(result)
+
+    server.shutdown()
+    print(f"\nServer: {dict(sorted(server.stats.items()))}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(args), 'results': results, 'server': server.stats}, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""
+Shared Paper Catalog Database
+SQLite record of every paper in a download tree: identity, file, sha256, page count and validation verdict
+Filled by the downloaders and validators; later stages query it instead of walking the tree and re-parsing PDFs
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from download.json_store import utc_now
+from download.paper_catalog import CATALOGS, iter_papers, paper_path
+
+# Default configuration
+CATALOG_DB_NAME = ".paper_catalog.db"
+BUSY_TIMEOUT = 30  # seconds a writer waits while another process holds the database
+
+# Validation verdicts
+HEALTHY = 'healthy'
+DAMAGED = 'damaged'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    path TEXT PRIMARY KEY,  -- relative to the tree root, '/' separators
+    subject TEXT,
+    component TEXT,
+    doc_type TEXT,
+    session TEXT,
+    year INTEGER,
+    variant INTEGER,
+    size INTEGER,  -- NULL while the file is not on disk
+    mtime_ns INTEGER,
+    sha256 TEXT,
+    pages INTEGER,
+    verdict TEXT,
+    reason TEXT,
+    registered_at TEXT,
+    downloaded_at TEXT,
+    checked_at TEXT
+);
+CREATE INDEX IF NOT EXISTS papers_by_identity ON papers (subject, component, doc_type, year, session);
+CREATE INDEX IF NOT EXISTS papers_by_sha256 ON papers (sha256);
+"""
+
+# The stored row still describes the file just stat()ed
+SAME_FILE = "(papers.size IS excluded.size AND papers.mtime_ns IS excluded.mtime_ns)"
+
+
+def _stat(file_path):
+    """(size, mtime_ns) of a file, or (None, None) if it is not on disk."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None, None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class CatalogDB:
+    """Thread-safe SQLite catalog of the papers of one download tree."""
+
+    def __init__(self, root_directory, name=CATALOG_DB_NAME):
+        """
+        Open (or create) the catalog stored in a download tree.
+
+        The database runs in WAL mode, so several processes can read it
+        while one writes; each process opens its own connection.
+
+        Args:
+            root_directory (str): Download root the catalog belongs to
+            name (str): Database file name inside the root
+        """
+        self.root_dir = Path(root_directory)
+        self.path = self.root_dir / name
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        """Connection of this process (caller holds the lock)."""
+        if self._connection is None or self._pid != os.getpid():
+            self.root_dir.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def _execute(self, sql, params=()):
+        """Run one statement in its own transaction and return its rows."""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                return connection.execute(sql, params).fetchall()
+
+    def _key(self, file_path):
+        """Path relative to the root, with '/' separators."""
+        return os.path.relpath(file_path, self.root_dir).replace(os.sep, '/')
+
+    def register(self, entries):
+        """
+        Record the identity of catalog papers (files need not exist yet).
+
+        Args:
+            entries (iterable): PaperEntry objects from paper_catalog.iter_papers()
+
+        Returns:
+            int: Number of papers registered
+        """
+        now = utc_now()
+        rows = [(paper_path(entry), entry.subject, entry.component, entry.doc_type, entry.session,
+                 entry.year, entry.variant, now) for entry in entries]
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    "INSERT INTO papers (path, subject, component, doc_type, session, year, variant, registered_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET subject = excluded.subject, component = excluded.component, "
+                    "doc_type = excluded.doc_type, session = excluded.session, year = excluded.year, "
+                    "variant = excluded.variant", rows)
+        return len(rows)
+
+    def record_download(self, file_path, sha256=None):
+        """
+        Record a file that was downloaded (or revalidated) into the tree.
+
+        A verdict and page count stored for different content (by sha256
+        where both are known, else by size and mtime) are dropped.
+
+        Args:
+            file_path (Path): File inside the tree
+            sha256 (str): Hex digest of the contents, if known
+        """
+        size, mtime_ns = _stat(file_path)
+        same = ("(CASE WHEN excluded.sha256 IS NOT NULL AND papers.sha256 IS NOT NULL "
+                f"THEN papers.sha256 = excluded.sha256 ELSE {SAME_FILE} END)")
+        self._execute(
+            "INSERT INTO papers (path, size, mtime_ns, sha256, downloaded_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET "
+            f"verdict = CASE WHEN {same} THEN papers.verdict END, "
+            f"reason = CASE WHEN {same} THEN papers.reason END, "
+            f"pages = CASE WHEN {same} THEN papers.pages END, "
+            f"sha256 = COALESCE(excluded.sha256, CASE WHEN {SAME_FILE} THEN papers.sha256 END), "
+            "size = excluded.size, mtime_ns = excluded.mtime_ns, downloaded_at = excluded.downloaded_at",
+            (self._key(file_path), size, mtime_ns, sha256, utc_now()))
+
+    def record_check(self, file_path, is_valid, reason, pages=None):
+        """
+        Record a validation verdict.
+
+        Call it after the file was quarantined, if it was: a file no longer
+        on disk is stored without size, so queries skip it.
+
+        Args:
+            file_path (Path): File inside the tree
+            is_valid (bool): Check verdict
+            reason (str): Check message
+            pages (int): Page count, if the check found it
+        """
+        size, mtime_ns = _stat(file_path)
+        self._execute(
+            "INSERT INTO papers (path, size, mtime_ns, pages, verdict, reason, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET "
+            f"sha256 = CASE WHEN {SAME_FILE} THEN papers.sha256 END, "
+            f"pages = COALESCE(excluded.pages, CASE WHEN {SAME_FILE} THEN papers.pages END), "
+            "size = excluded.size, mtime_ns = excluded.mtime_ns, verdict = excluded.verdict, "
+            "reason = excluded.reason, checked_at = excluded.checked_at",
+            (self._key(file_path), size, mtime_ns, pages, HEALTHY if is_valid else DAMAGED, reason, utc_now()))
+
+    def lookup(self, file_path):
+        """
+        Get the catalog row of a file.
+
+        Args:
+            file_path (Path): File inside the tree
+
+        Returns:
+            dict: Row or None
+        """
+        rows = self._execute("SELECT * FROM papers WHERE path = ?", (self._key(file_path),))
+        return dict(rows[0]) if rows else None
+
+    def is_current(self, row):
+        """
+        Check whether a row still describes the file on disk (same size and mtime).
+
+        Args:
+            row (dict): Row from lookup() or query()
+
+        Returns:
+            bool: True if its verdict and page count can be reused
+        """
+        return row['size'] is not None and _stat(self.root_dir / row['path']) == (row['size'], row['mtime_ns'])
+
+    def query(self, subject=None, component=None, doc_type=None, sessions=None, include_damaged=False):
+        """
+        Find the papers on disk matching an identity, using the identity index.
+
+        Args:
+            subject (str): Subject code
+            component (str): Component, e.g. 'Paper-2' or '21'
+            doc_type (str): 'QP' or 'MS'
+            sessions (list): Session names to include
+            include_damaged (bool): Also return files whose last verdict was damaged
+
+        Returns:
+            list: Rows (dicts) ordered by year, session and variant
+        """
+        clauses, params = ["size IS NOT NULL"], []
+        for column, value in (('subject', subject), ('component', component), ('doc_type', doc_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if sessions:
+            clauses.append(f"session IN ({', '.join('?' * len(sessions))})")
+            params.extend(sessions)
+        if not include_damaged:
+            clauses.append(f"verdict IS NOT '{DAMAGED}'")
+        rows = self._execute(f"SELECT * FROM papers WHERE {' AND '.join(clauses)} "
+                             "ORDER BY year, session, variant", params)
+        return [dict(row) for row in rows]
+
+    def paths(self, include_damaged=True):
+        """
+        List the files the catalog knows to be on disk.
+
+        Args:
+            include_damaged (bool): Also list files whose last verdict was damaged
+
+        Returns:
+            list: Paths inside the tree
+        """
+        return [self.root_dir / row['path'] for row in self.query(include_damaged=include_damaged)]
+
+    def sync_tree(self, subject):
+        """
+        Register a subject's papers and pick up files already on disk.
+
+        Only the paths the paper catalog expects are stat()ed, so a tree
+        fetched before the database existed is imported without walking it
+        or parsing any PDF. Files whose size or mtime changed lose their
+        stored verdict.
+
+        Args:
+            subject (str): Subject code (key of paper_catalog.CATALOGS)
+
+        Returns:
+            tuple: (registered: int, on_disk: int)
+        """
+        entries = list(iter_papers(subject))
+        registered = self.register(entries)
+        rows = []
+        for entry in entries:
+            relative = paper_path(entry)
+            size, mtime_ns = _stat(self.root_dir / relative)
+            rows.append((size, mtime_ns, relative))
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    "UPDATE papers SET "
+                    "verdict = CASE WHEN size IS ?1 AND mtime_ns IS ?2 THEN verdict END, "
+                    "reason = CASE WHEN size IS ?1 AND mtime_ns IS ?2 THEN reason END, "
+                    "pages = CASE WHEN size IS ?1 AND mtime_ns IS ?2 THEN pages END, "
+                    "sha256 = CASE WHEN size IS ?1 AND mtime_ns IS ?2 THEN sha256 END, "
+                    "size = ?1, mtime_ns = ?2 WHERE path = ?3", rows)
+        return registered, sum(1 for size, _, _ in rows if size is not None)
+
+    def counts(self):
+        """
+        Summarize the catalog.
+
+        Returns:
+            dict: 'papers', 'on_disk', 'healthy', 'damaged' and 'unchecked'
+        """
+        row = self._execute(
+            "SELECT COUNT(*), COUNT(size), "
+            f"SUM(size IS NOT NULL AND verdict = '{HEALTHY}'), SUM(verdict = '{DAMAGED}'), "
+            "SUM(size IS NOT NULL AND verdict IS NULL) FROM papers")[0]
+        return dict(zip(('papers', 'on_disk', 'healthy', 'damaged', 'unchecked'), (value or 0 for value in row)))
+
+    def close(self):
+        """Close this process's connection."""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_catalog(root_directory, create=False):
+    """
+    Open the catalog of a tree only if it already has one (or create is set).
+
+    Tools that merely keep an existing catalog up to date use this, so
+    pointing them at an arbitrary folder never leaves a database behind.
+
+    Args:
+        root_directory (str): Download root
+        create (bool): Create the database if it does not exist
+
+    Returns:
+        CatalogDB: Open catalog, or None
+    """
+    if create or (Path(root_directory) / CATALOG_DB_NAME).exists():
+        return CatalogDB(root_directory)
+    return None
+
+
+def main():
+    """Import a download tree into its catalog database, or summarize it."""
+    parser = argparse.ArgumentParser(description="Shared SQLite catalog of a paper tree")
+    parser.add_argument('command', choices=['sync', 'stats'])
+    parser.add_argument('root', help="Download tree (e.g. Cambridge_Past_Papers_0620)")
+    parser.add_argument('--subject', choices=sorted(CATALOGS), help="Catalog subject (sync only)")
+    args = parser.parse_args()
+
+    with CatalogDB(args.root) as catalog:
+        if args.command == 'sync':
+            if not args.subject:
+                parser.error("sync needs --subject")
+            registered, on_disk = catalog.sync_tree(args.subject)
+            print(f"✓ {args.root}: {registered} papers registered, {on_disk} on disk")
+        counts = catalog.counts()
+        print(f"Catalog: {counts['papers']} papers, {counts['on_disk']} on disk "
+              f"({counts['healthy']} healthy, {counts['damaged']} damaged, {counts['unchecked']} unchecked)")
+
+
+if __name__ == '__main__':
+    main()
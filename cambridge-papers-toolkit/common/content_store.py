@@ -0,0 +1,346 @@
+"""
+Content-Addressed Paper Store
+Keeps one sha256-keyed blob per unique file and links the Year/Season trees to it
+Identical papers across subjects, mirrors, reruns and backups share the same bytes
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Default configuration
+DEFAULT_STORE = "Cambridge_Papers_Store"
+HASH_CHUNK = 1024 * 1024  # bytes read per hashing step
+FICLONE = 0x40049409  # Linux ioctl for copy-on-write clones (btrfs, XFS, ...)
+LOCK_NAME = ".lock"  # file locked while a process changes the store
+
+# How a tree file was materialized from its blob
+HARDLINK = 'hardlink'
+REFLINK = 'reflink'
+COPY = 'copy'
+
+
+def file_sha256(file_path):
+    """
+    Hash a file in fixed-size chunks.
+
+    Args:
+        file_path (Path): File to hash
+
+    Returns:
+        str: Hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def reflink(src, dst):
+    """
+    Clone src to dst with copy-on-write, sharing extents on the filesystem.
+
+    An existing dst is never opened for writing (it may share its inode
+    with other files).
+
+    Args:
+        src (Path): Existing file
+        dst (Path): New file to create
+
+    Returns:
+        bool: True if the clone succeeded (dst is removed otherwise)
+
+    Raises:
+        FileExistsError: dst already exists
+    """
+    if fcntl is None:
+        return False
+    with open(src, 'rb') as s, open(dst, 'xb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            cloned = True
+        except OSError:
+            cloned = False
+    if not cloned:
+        os.unlink(dst)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def _copy_new(src, dst):
+    """Copy src to dst with its metadata, refusing to overwrite an existing dst."""
+    with open(src, 'rb') as s, open(dst, 'xb') as d:
+        shutil.copyfileobj(s, d, HASH_CHUNK)
+    shutil.copystat(src, dst)
+
+
+def link_or_copy(src, dst, allow_hardlink=True, prefer_reflink=False):
+    """
+    Create dst with the contents of src as cheaply as the filesystem allows.
+
+    Tries a hardlink (optional), then a reflink, then falls back to a copy.
+    dst must not exist: an existing dst is an error, never overwritten.
+
+    Args:
+        src (Path): Existing file
+        dst (Path): New file to create
+        allow_hardlink (bool): Permit a hardlink (dst then shares src's inode)
+        prefer_reflink (bool): Try the reflink first (dst gets its own inode
+            wherever the filesystem can clone)
+
+    Returns:
+        str: HARDLINK, REFLINK or COPY
+
+    Raises:
+        FileExistsError: dst already exists
+    """
+    if prefer_reflink and reflink(src, dst):
+        return REFLINK
+    if allow_hardlink:
+        try:
+            os.link(src, dst)
+            return HARDLINK
+        except FileExistsError:
+            raise
+        except OSError:
+            pass
+    if not prefer_reflink and reflink(src, dst):
+        return REFLINK
+    _copy_new(src, dst)
+    return COPY
+
+
+class ContentStore:
+    """sha256-keyed blob store shared by several download trees."""
+
+    def __init__(self, store_directory=DEFAULT_STORE):
+        """
+        Open (or create) a store.
+
+        Hardlinks only work inside one filesystem, so keep the store on the
+        same volume as the trees it deduplicates (reflinks/copies are used
+        otherwise).
+
+        Args:
+            store_directory (str): Store root folder
+        """
+        self.root_dir = Path(store_directory)
+        self.objects_dir = self.root_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """
+        Hold the store lock across threads and processes.
+
+        Download scripts sharing CONTENT_STORE and parallel cleaner workers
+        change the same blobs, so a thread lock alone is not enough: the
+        lock file in the store root is also locked with flock where available.
+        """
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.root_dir / LOCK_NAME, 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def blob_path(self, sha256):
+        """
+        Get the blob location for a digest.
+
+        Args:
+            sha256 (str): Hex sha256 digest
+
+        Returns:
+            Path: objects/<first two hex digits>/<digest>
+        """
+        return self.objects_dir / sha256[:2] / sha256
+
+    def has(self, sha256):
+        """Check whether a blob is stored."""
+        return self.blob_path(sha256).exists()
+
+    def _replace_with_blob(self, blob, dest_path):
+        """Atomically swap dest_path for a link/clone/copy of blob."""
+        tmp_path = dest_path.with_name(f"{dest_path.name}.{os.getpid()}.cas")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        mode = link_or_copy(blob, tmp_path)
+        os.replace(tmp_path, dest_path)
+        return mode
+
+    def _add_blob(self, file_path, blob):
+        """
+        Create a blob from a file through a temporary name.
+
+        The blob only appears once complete (os.link fails instead of
+        overwriting), so a concurrent writer can never truncate it.
+
+        Returns:
+            bool: True if this call stored it, False if it was already stored
+        """
+        blob.parent.mkdir(exist_ok=True)
+        tmp_path = blob.with_name(f"{blob.name}.{os.getpid()}.tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        link_or_copy(file_path, tmp_path)
+        try:
+            os.link(tmp_path, blob)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            tmp_path.unlink()
+
+    def ingest(self, file_path, sha256=None):
+        """
+        Add a file to the store and point it at the shared blob.
+
+        A file whose content is already stored is replaced by a link to the
+        existing blob; new content becomes the blob itself (hardlinked, so no
+        bytes are copied).
+
+        Args:
+            file_path (Path): File inside a download tree
+            sha256 (str): Known digest (skips re-hashing, e.g. from the fetcher)
+
+        Returns:
+            tuple: (sha256: str, bytes_saved: int)
+        """
+        file_path = Path(file_path)
+        sha256 = sha256 or file_sha256(file_path)
+        blob = self.blob_path(sha256)
+
+        with self._locked():
+            if not blob.exists() and self._add_blob(file_path, blob):
+                return sha256, 0
+
+            file_stat = file_path.stat()
+            blob_stat = blob.stat()
+            if (file_stat.st_ino, file_stat.st_dev) == (blob_stat.st_ino, blob_stat.st_dev):
+                return sha256, 0
+            if file_stat.st_size != blob_stat.st_size:
+                raise ValueError(f"Blob {sha256} does not match {file_path.name} (size differs)")
+            mode = self._replace_with_blob(blob, file_path)
+
+        return sha256, file_stat.st_size if mode != COPY else 0
+
+    def materialize(self, sha256, dest_path):
+        """
+        Create dest_path from a stored blob (e.g. a backup copy).
+
+        Args:
+            sha256 (str): Hex sha256 digest of a stored blob
+            dest_path (Path): File to create or replace
+
+        Returns:
+            str: HARDLINK, REFLINK or COPY
+        """
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            return self._replace_with_blob(self.blob_path(sha256), dest_path)
+
+    def iter_blobs(self):
+        """Yield every blob path in the store."""
+        for prefix_dir in self.objects_dir.iterdir():
+            if prefix_dir.is_dir():
+                yield from (p for p in prefix_dir.iterdir() if p.is_file() and p.suffix != '.tmp')
+
+    def gc(self):
+        """
+        Remove blobs no tree file is hardlinked to any more.
+
+        Reflinked and copied tree files own their bytes, so dropping their
+        blob never loses data.
+
+        Returns:
+            tuple: (blobs_removed: int, bytes_freed: int)
+        """
+        removed, freed = 0, 0
+        with self._locked():
+            for blob in list(self.iter_blobs()):
+                stat = blob.stat()
+                if stat.st_nlink <= 1:
+                    blob.unlink()
+                    removed += 1
+                    freed += stat.st_size
+        return removed, freed
+
+    def stats(self):
+        """
+        Summarize the store.
+
+        Returns:
+            dict: 'blobs', 'bytes' and 'links' (tree files sharing a blob)
+        """
+        blobs, size, links = 0, 0, 0
+        for blob in self.iter_blobs():
+            stat = blob.stat()
+            blobs += 1
+            size += stat.st_size
+            links += stat.st_nlink - 1
+        return {'blobs': blobs, 'bytes': size, 'links': links}
+
+
+def dedupe_tree(store, root_directory):
+    """
+    Ingest every PDF under a tree into the store.
+
+    Args:
+        store (ContentStore): Target store
+        root_directory (str): Download tree (e.g. Cambridge_Past_Papers_0620)
+
+    Returns:
+        tuple: (files: int, bytes_saved: int)
+    """
+    files, saved = 0, 0
+    for pdf_path in Path(root_directory).rglob("*.pdf"):
+        if store.root_dir.resolve() in pdf_path.resolve().parents:
+            continue
+        _, bytes_saved = store.ingest(pdf_path)
+        files += 1
+        saved += bytes_saved
+    return files, saved
+
+
+def main():
+    """Deduplicate download trees into a content store, or collect unused blobs."""
+    parser = argparse.ArgumentParser(description="Content-addressed storage for paper trees")
+    parser.add_argument('command', choices=['dedupe', 'gc', 'stats'])
+    parser.add_argument('roots', nargs='*', help="Trees to deduplicate (dedupe only)")
+    parser.add_argument('--store', default=DEFAULT_STORE, help=f"Store folder (default: {DEFAULT_STORE})")
+    args = parser.parse_args()
+
+    store = ContentStore(args.store)
+    if args.command == 'dedupe':
+        for root in args.roots:
+            files, saved = dedupe_tree(store, root)
+            print(f"✓ {root}: {files} files, {saved / (1024 * 1024):.1f} MB saved")
+    elif args.command == 'gc':
+        removed, freed = store.gc()
+        print(f"✓ Removed {removed} unused blobs ({freed / (1024 * 1024):.1f} MB)")
+
+    stats = store.stats()
+    print(f"Store: {stats['blobs']} blobs, {stats['bytes'] / (1024 * 1024):.1f} MB, "
+          f"{stats['links']} linked tree files")
+
+
+if __name__ == '__main__':
+    main()
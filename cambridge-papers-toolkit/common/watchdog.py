@@ -0,0 +1,213 @@
+"""
+Per-File Watchdog
+Runs per-file PDF work in isolated worker processes with a wall-clock timeout and a memory cap
+Kills a worker stuck on a pathological file, reports why and carries on with a fresh worker
+"""
+
+import os
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+
+# Default configuration
+WORKERS = os.cpu_count() or 1  # worker processes (at least one; work never runs in the caller)
+FILE_TIMEOUT = 180  # seconds one file may take before its worker is killed
+MAX_RSS_MB = 2048  # resident memory a worker may reach before it is killed (Linux; None = no cap)
+MAX_TASKS_PER_WORKER = 200  # files a worker handles before it is replaced
+POLL_INTERVAL = 0.2  # seconds between timeout and memory checks
+
+# Why a file did not produce a result
+TIMED_OUT = 'timeout'
+OUT_OF_MEMORY = 'memory'
+CRASHED = 'crashed'
+FAILED = 'error'
+
+
+def rss_mb(pid):
+    """
+    Resident memory of a process.
+
+    Args:
+        pid (int): Process id
+
+    Returns:
+        float: Megabytes, or None where /proc is unavailable
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def _worker_main(func, connection):
+    """Worker loop: receive an item, send back (True, result) or (False, error)."""
+    while True:
+        try:
+            item = connection.recv()
+        except EOFError:
+            return
+        if item is None:
+            return
+        try:
+            connection.send((True, func(item)))
+        except Exception as e:
+            connection.send((False, f"{type(e).__name__}: {str(e)[:80]}"))
+
+
+class _Worker:
+    """One worker process and the item it is working on."""
+
+    def __init__(self, func):
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_main, args=(func, child), daemon=True)
+        self.process.start()
+        child.close()
+        self.item = None
+        self.started = None
+        self.tasks = 0
+
+    @property
+    def busy(self):
+        return self.started is not None
+
+    def assign(self, item):
+        self.item = item
+        self.started = time.monotonic()
+        self.tasks += 1
+        self.connection.send(item)
+
+    def finish(self):
+        item = self.item
+        self.item = None
+        self.started = None
+        return item
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class Watchdog:
+    """
+    Process pool where every item runs under a timeout and a memory cap.
+
+    A worker that exceeds FILE_TIMEOUT or MAX_RSS_MB (or dies) is killed
+    and replaced; its item is reported as failed with the reason, so one
+    bad file costs at most FILE_TIMEOUT instead of stalling the run.
+    """
+
+    def __init__(self, func, workers=WORKERS, timeout=FILE_TIMEOUT, max_rss_mb=MAX_RSS_MB,
+                 max_tasks_per_worker=MAX_TASKS_PER_WORKER):
+        """
+        Configure the watchdog (workers start on first use).
+
+        Args:
+            func (callable): Module-level function called with one item
+            workers (int): Worker processes
+            timeout (float): Seconds allowed per item (None = no limit)
+            max_rss_mb (float): Resident memory cap per worker (None = no cap)
+            max_tasks_per_worker (int): Items before a worker is replaced
+        """
+        self.func = func
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.stats = {TIMED_OUT: 0, OUT_OF_MEMORY: 0, CRASHED: 0, FAILED: 0}
+
+    def _violation(self, worker, now):
+        """Reason to kill a busy worker, or None."""
+        if self.timeout is not None and now - worker.started > self.timeout:
+            return TIMED_OUT, f"Timed out after {self.timeout:g}s (killed by watchdog)"
+        if self.max_rss_mb is not None:
+            used = rss_mb(worker.process.pid)
+            if used is not None and used > self.max_rss_mb:
+                return OUT_OF_MEMORY, f"Used {used:.0f} MB, over the {self.max_rss_mb:g} MB cap (killed by watchdog)"
+        return None
+
+    def imap_unordered(self, items):
+        """
+        Run func over items, yielding results as they finish.
+
+        At most one item per worker is in flight, so items are pulled
+        from the iterable lazily.
+
+        Args:
+            items (iterable): Picklable arguments for func
+
+        Yields:
+            tuple: (item, result, failure) where failure is None on success,
+                   else (kind: str, reason: str) and result is None
+        """
+        pending = iter(items)
+        workers = []
+        exhausted = False
+        try:
+            while True:
+                # Hand out work to idle workers, replacing worn-out ones
+                while not exhausted:
+                    idle = next((w for w in workers if not w.busy), None)
+                    if idle is None and len(workers) >= self.workers:
+                        break
+                    if idle is not None and idle.tasks >= self.max_tasks_per_worker:
+                        workers.remove(idle)
+                        idle.stop()
+                        idle = None
+                    try:
+                        item = next(pending)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if idle is None:
+                        idle = _Worker(self.func)
+                        workers.append(idle)
+                    idle.assign(item)
+
+                busy = [w for w in workers if w.busy]
+                if not busy:
+                    return
+
+                ready = wait([w.connection for w in busy] + [w.process.sentinel for w in busy], POLL_INTERVAL)
+                now = time.monotonic()
+                for worker in busy:
+                    if worker.connection in ready:
+                        try:
+                            ok, value = worker.connection.recv()
+                        except (EOFError, OSError):
+                            worker.process.join(1)
+                            ok, value = None, None
+                        if ok:
+                            yield worker.finish(), value, None
+                            continue
+                        if ok is False:
+                            self.stats[FAILED] += 1
+                            yield worker.finish(), None, (FAILED, value)
+                            continue
+                    if not worker.process.is_alive() or worker.connection in ready:
+                        failure = (CRASHED, f"Worker died (exit code {worker.process.exitcode})")
+                    else:
+                        failure = self._violation(worker, now)
+                        if failure is None:
+                            continue
+                    self.stats[failure[0]] += 1
+                    workers.remove(worker)
+                    worker.kill()
+                    yield worker.finish(), None, failure
+        finally:
+            for worker in workers:
+                if worker.busy:
+                    worker.kill()
+                else:
+                    worker.stop()
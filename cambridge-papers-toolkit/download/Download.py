@@ -1,140 +1,169 @@
-"""
-Cambridge Past Papers Downloader - Subject 0971
-Downloads past papers from papacambridge.com for subject 0971 (Computer Science)
-Organizes files by year and season (June/November)
-"""
-
-import os
-import time
-import requests
-from pathlib import Path
-from urllib.parse import urlparse
-
-# Configuration
-BASE_URL = "https://pastpapers.papacambridge.com/download_file.php?files=https://pastpapers.papacambridge.com/directories/CAIE/CAIE-pastpapers/upload/"
-SUBJECT = "0971"
-PAPERS = ["21", "22", "41", "42", "61", "62"]
-PARENT_FOLDER = "Cambridge_Past_Papers_0971"
-DELAY_BETWEEN_DOWNLOADS = 0.5  # seconds
-
-
-def download_file(url, filepath):
-    """
-    Download a file from the given URL to the specified filepath.
-    
-    Args:
-        url (str): URL to download from
-        filepath (str): Local path to save the file
-        
-    Returns:
-        bool: True if successful, False otherwise
-    """
-    try:
-        if not os.path.exists(filepath):
-            print(f"  Downloading: {os.path.basename(filepath)}", end=" ... ")
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                print("✓")
-                return True
-            else:
-                print(f"✗ (Status: {response.status_code})")
-                return False
-        else:
-            print(f"  Skipping: {os.path.basename(filepath)} (already exists)")
-            return True
-    except Exception as e:
-        print(f"✗ Error: {e}")
-        return False
-
-
-def create_directory_structure(year, season):
-    """
-    Create directory structure for organizing downloaded papers.
-    
-    Args:
-        year (int): Full year (e.g., 2025)
-        season (str): Season name ("June" or "November")
-        
-    Returns:
-        str: Path to the season folder
-    """
-    year_folder = os.path.join(PARENT_FOLDER, f"{year}")
-    season_folder = os.path.join(year_folder, season)
-    Path(season_folder).mkdir(parents=True, exist_ok=True)
-    return season_folder
-
-
-def download_papers_for_session(year, year_code, session_code, session_name):
-    """
-    Download all papers for a specific examination session.
-    
-    Args:
-        year (int): Full year
-        year_code (int): Two-digit year code
-        session_code (str): Session code ('s' for June, 'w' for November)
-        session_name (str): Human-readable session name
-    """
-    session_folder = create_directory_structure(year, session_name)
-    print(f"Processing {year} - {session_name}...")
-    
-    filename_ms = f"{SUBJECT}_{session_code}{year_code:02d}_ms"
-    filename_qp = f"{SUBJECT}_{session_code}{year_code:02d}_qp"
-    
-    for paper in PAPERS:
-        # Download mark scheme
-        ms_filename = f"{filename_ms}_{paper}.pdf"
-        ms_url = BASE_URL + ms_filename
-        ms_filepath = os.path.join(session_folder, ms_filename)
-        download_file(ms_url, ms_filepath)
-        time.sleep(DELAY_BETWEEN_DOWNLOADS)
-        
-        # Download question paper
-        qp_filename = f"{filename_qp}_{paper}.pdf"
-        qp_url = BASE_URL + qp_filename
-        qp_filepath = os.path.join(session_folder, qp_filename)
-        download_file(qp_url, qp_filepath)
-        time.sleep(DELAY_BETWEEN_DOWNLOADS)
-
-
-def main():
-    """Main execution function."""
-    # Create parent folder
-    Path(PARENT_FOLDER).mkdir(exist_ok=True)
-    
-    print(f"Starting downloads to: {PARENT_FOLDER}\n")
-    
-    # Download papers from 2025 back to 2018
-    for year in range(25, 17, -1):
-        full_year = 2000 + year
-        
-        # Spring season (June)
-        download_papers_for_session(full_year, year, 's', 'June')
-        
-        # Winter season (November) - skip for 2025 if not yet available
-        if year < 25:
-            download_papers_for_session(full_year, year, 'w', 'November')
-        
-        print()
-    
-    # Print completion message
-    print("✓ Download complete!")
-    print(f"\nFolder structure created in: {PARENT_FOLDER}")
-    print("\nStructure:")
-    print("Cambridge_Past_Papers_0971/")
-    print("├── 2025/")
-    print("│   └── June/")
-    print("│       ├── 0971_s25_ms_21.pdf")
-    print("│       ├── 0971_s25_qp_21.pdf")
-    print("│       └── ...")
-    print("├── 2024/")
-    print("│   ├── June/")
-    print("│   │   └── ...")
-    print("│   └── November/")
-    print("│       └── ...")
-    print("└── ...")
-
-
-if __name__ == '__main__':
+"""
+Cambridge Past Papers Downloader - Subject 0971
+Downloads past papers from papacambridge.com for subject 0971 (Computer Science)
+Organizes files by year and season (June/November)
+"""
+
+import os
+import sys
+from functools import partial
+from pathlib import Path
+from urllib.parse import urlparse
+
+from download_engine import run_downloads, print_throughput
+from download_manifest import DownloadManifest
+from download_metrics import MetricsWriter, print_metrics_summary
+from fetcher import fetch_file, DOWNLOADED, UNCHANGED, MISSING
+from http_session import print_connection_stats
+from job_queue import JobQueue, default_worker_id, print_queue_counts
+from mirrors import candidate_urls, print_mirror_stats
+from negative_cache import NegativeCache
+from paper_catalog import iter_papers, paper_path
+from validation_pipeline import ValidationPipeline, print_validation_stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.catalog_db import CatalogDB
+from common.content_store import ContentStore
+
+# Configuration
+SUBJECT = "0971"  # papers and sessions are defined in paper_catalog.CATALOGS
+PARENT_FOLDER = "Cambridge_Past_Papers_0971"
+DELAY_BETWEEN_DOWNLOADS = 0.5  # starting seconds between requests per host (adapts at runtime)
+MAX_WORKERS = 8  # concurrent downloads
+MAX_PER_HOST = 4  # concurrent downloads per host
+CONTENT_STORE = None  # e.g. "Cambridge_Papers_Store" to keep identical papers once on disk
+CATALOG_DB = True  # record every paper in <folder>/.paper_catalog.db for the validators and builders
+VALIDATE_WHILE_DOWNLOADING = True  # health-check new files in parallel with the downloads
+REPAIR_DAMAGED = False  # try the PDF cleaner before quarantining a damaged download
+
+
+def download_file(url, filepath, manifest=None, negative_cache=None, store=None, catalog=None):
+    """
+    Download a file from the given URL to the specified filepath.
+    
+    Files already on disk are revalidated with a conditional GET and only
+    transferred again when the server copy has changed. Papers known to be
+    missing upstream are skipped until their cache entry expires.
+    
+    Args:
+        url (list): Mirror URLs to download from, in preference order
+        filepath (str): Local path to save the file
+        manifest (DownloadManifest): Manifest for conditional requests
+        negative_cache (NegativeCache): Cache of known-missing papers
+        store (ContentStore): Content-addressed store for deduplication (optional)
+        catalog (CatalogDB): Shared paper catalog to record the file in (optional)
+        
+    Returns:
+        tuple: (status: str, bytes_downloaded: int)
+    """
+    name = os.path.basename(filepath)
+    status, nbytes, message = fetch_file(url, filepath, manifest=manifest, require_pdf=True,
+                                         negative_cache=negative_cache, store=store, catalog=catalog)
+    if status == DOWNLOADED:
+        print(f"  ✓ Downloaded: {name}")
+    elif status == UNCHANGED:
+        print(f"  Skipping: {name} (unchanged)")
+    elif status == MISSING:
+        print(f"  Skipping: {name} (not available: {message})")
+    else:
+        print(f"  ✗ Failed: {name} ({message})")
+    return status, nbytes
+
+
+def create_directory_structure(year, season):
+    """
+    Create directory structure for organizing downloaded papers.
+    
+    Args:
+        year (int): Full year (e.g., 2025)
+        season (str): Season name ("June" or "November")
+        
+    Returns:
+        str: Path to the season folder
+    """
+    year_folder = os.path.join(PARENT_FOLDER, f"{year}")
+    season_folder = os.path.join(year_folder, season)
+    Path(season_folder).mkdir(parents=True, exist_ok=True)
+    return season_folder
+
+
+def iter_all_sessions():
+    """
+    Queue every catalog paper, from 2025 back to 2018.
+    
+    Yields:
+        tuple: (mirror_urls, filepath) for every paper of every session
+    """
+    for entry in iter_papers(SUBJECT):
+        create_directory_structure(entry.year, entry.session)
+        yield candidate_urls(entry), os.path.join(PARENT_FOLDER, *paper_path(entry).split('/'))
+
+
+def main():
+    """Main execution function."""
+    # Create parent folder
+    Path(PARENT_FOLDER).mkdir(exist_ok=True)
+    
+    print(f"Starting downloads to: {PARENT_FOLDER}")
+    print(f"Workers: {MAX_WORKERS} ({MAX_PER_HOST} per host)\n")
+    
+    manifest = DownloadManifest(PARENT_FOLDER)
+    negative_cache = NegativeCache(PARENT_FOLDER)
+    store = ContentStore(CONTENT_STORE) if CONTENT_STORE else None
+    catalog = CatalogDB(PARENT_FOLDER) if CATALOG_DB else None
+    if catalog:
+        print(f"Catalog: {catalog.register(iter_papers(SUBJECT))} papers registered ({catalog.path})")
+    queue = JobQueue(PARENT_FOLDER)
+    worker_id = default_worker_id()
+    print(f"Job queue: {queue.begin_pass(iter_all_sessions(), worker_id)} ({queue.path})\n")
+    metrics_writer = MetricsWriter(PARENT_FOLDER).start()
+    pipeline = (ValidationPipeline(PARENT_FOLDER, repair=REPAIR_DAMAGED, catalog=catalog)
+                if VALIDATE_WHILE_DOWNLOADING else None)
+    try:
+        fetch = partial(download_file, manifest=manifest, negative_cache=negative_cache, store=store,
+                        catalog=catalog)
+        if pipeline:
+            fetch = pipeline.wrap(fetch)
+        summary = run_downloads(queue.iter_claims(worker_id), queue.worker(fetch, worker_id),
+                                DELAY_BETWEEN_DOWNLOADS,
+                                max_workers=MAX_WORKERS,
+                                max_per_host=MAX_PER_HOST)
+    finally:
+        manifest.save()
+        negative_cache.save()
+        validation = pipeline.close() if pipeline else None
+        metrics = metrics_writer.stop()
+        if catalog:
+            catalog.close()
+    
+    # Print completion message
+    print("\n✓ Download complete!")
+    print(f"Downloaded:       {summary['downloaded']}")
+    print(f"Unchanged:        {summary['unchanged']}")
+    print(f"Not available:    {summary['missing']}")
+    print(f"Failed:           {summary['failed']}")
+    print_throughput(summary)
+    print_connection_stats()
+    print_mirror_stats()
+    print_metrics_summary(metrics)
+    print_queue_counts(queue)
+    if validation:
+        print_validation_stats(validation)
+    print(f"\nFolder structure created in: {PARENT_FOLDER}")
+    print("\nStructure:")
+    print("Cambridge_Past_Papers_0971/")
+    print("├── 2025/")
+    print("│   └── June/")
+    print("│       ├── 0971_s25_ms_21.pdf")
+    print("│       ├── 0971_s25_qp_21.pdf")
+    print("│       └── ...")
+    print("├── 2024/")
+    print("│   ├── June/")
+    print("│   │   └── ...")
+    print("│   └── November/")
+    print("│       └── ...")
+    print("└── ...")
+
+
+if __name__ == '__main__':
     main()
\ No newline at end of file
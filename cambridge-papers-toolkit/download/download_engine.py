@@ -0,0 +1,85 @@
+"""
+Concurrent Download Engine
+Runs download jobs on a bounded thread pool shared by all downloader scripts
+Respects a per-host politeness budget and reports aggregate throughput
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from download_metrics import get_metrics
+from rate_limiter import configure_limiter
+
+# Default configuration
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+
+
+def run_downloads(jobs, download_func, min_interval, max_workers=MAX_WORKERS,
+                  max_per_host=MAX_PER_HOST):
+    """
+    Download every job concurrently, keeping up to max_workers requests in flight.
+
+    Jobs are pulled lazily from the iterable, so generators work without
+    materializing the whole catalog first.
+
+    Args:
+        jobs (iterable): (url, dest_path) tuples
+        download_func (callable): download_func(url, dest_path) -> (status, bytes_downloaded),
+            where status is 'downloaded', 'unchanged', 'missing' or 'failed'
+        min_interval (float): Starting seconds between requests on one host
+            (the shared limiter adapts it from server feedback)
+        max_workers (int): Total number of concurrent downloads
+        max_per_host (int): Maximum concurrent downloads per host
+
+    Returns:
+        dict: Summary with 'downloaded', 'unchanged', 'missing', 'failed', 'bytes',
+              'elapsed' and 'hosts' keys
+    """
+    limiter = configure_limiter(min_interval, max_per_host)
+    metrics = get_metrics()
+    summary = {'downloaded': 0, 'unchanged': 0, 'missing': 0, 'failed': 0,
+               'bytes': 0, 'elapsed': 0.0}
+
+    def collect(done):
+        for future in done:
+            try:
+                status, nbytes = future.result()
+            except Exception as e:
+                print(f"  ✗ Worker error: {str(e)[:50]}")
+                status, nbytes = 'failed', 0
+            summary[status] += 1
+            summary['bytes'] += nbytes
+            metrics.record_outcome(status)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        for url, dest_path in jobs:
+            pending.add(pool.submit(download_func, url, dest_path))
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(pending)
+
+    summary['elapsed'] = time.monotonic() - start
+    summary['hosts'] = limiter.host_stats()
+    return summary
+
+
+def print_throughput(summary):
+    """
+    Print aggregate throughput for a finished run.
+
+    Args:
+        summary (dict): Summary returned by run_downloads()
+    """
+    elapsed = max(summary['elapsed'], 1e-9)
+    files = summary['downloaded'] + summary['unchanged'] + summary['missing'] + summary['failed']
+    print(f"Elapsed time:     {summary['elapsed']:.1f} s")
+    print(f"Throughput:       {files / elapsed:.2f} files/s, "
+          f"{summary['bytes'] / elapsed / 1024:.1f} KB/s "
+          f"({summary['bytes'] / (1024 * 1024):.1f} MB transferred)")
+    for host, stats in sorted(summary.get('hosts', {}).items()):
+        print(f"Rate limit:       {host}: {stats['rate']:.2f} req/s final, "
+              f"{stats['requests']} requests, {stats['throttled']} throttled")
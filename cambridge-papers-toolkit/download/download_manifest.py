@@ -0,0 +1,152 @@
+"""
+Download Manifest
+Persistent record of every fetched file (URL, ETag, Last-Modified, size, sha256)
+Lets reruns issue conditional GETs instead of blind skips or full transfers
+"""
+
+import os
+from email.utils import formatdate
+from pathlib import Path
+
+from json_store import JsonStore, utc_now
+
+MANIFEST_NAME = ".download_manifest.json"
+
+
+def looks_complete(file_path):
+    """
+    Cheap completeness check for files without a manifest entry.
+
+    Args:
+        file_path (Path): Path to local file
+
+    Returns:
+        bool: True if the file has a PDF header and an %%EOF marker near the end
+    """
+    try:
+        size = file_path.stat().st_size
+        with open(file_path, 'rb') as f:
+            if f.read(5) != b'%PDF-':
+                return False
+            f.seek(max(size - 1024, 0))
+            return b'%%EOF' in f.read()
+    except OSError:
+        return False
+
+
+class DownloadManifest(JsonStore):
+    """Thread-safe JSON manifest keyed by URL."""
+
+    def __init__(self, root_directory, name=MANIFEST_NAME):
+        """
+        Load (or start) the manifest stored in a download tree.
+
+        Args:
+            root_directory (str): Download root the manifest belongs to
+            name (str): Manifest file name inside the root
+        """
+        super().__init__(root_directory, name)
+
+    def get(self, url):
+        """
+        Get the manifest entry for a URL.
+
+        Args:
+            url (str): Download URL
+
+        Returns:
+            dict: Entry or None
+        """
+        with self._lock:
+            entry = self.entries.get(url)
+            return dict(entry) if entry else None
+
+    def conditional_headers(self, url, dest_path):
+        """
+        Build If-None-Match / If-Modified-Since headers for a URL.
+
+        Returns no headers (forcing a full GET) when the local file is missing
+        or does not match the size recorded in the manifest.
+
+        Args:
+            url (str): Download URL
+            dest_path (Path): Local destination path
+
+        Returns:
+            dict: Request headers
+        """
+        dest_path = Path(dest_path)
+        if not dest_path.exists():
+            return {}
+
+        entry = self.get(url)
+        if entry is None:
+            # Legacy file from before the manifest: trust it only if complete
+            if looks_complete(dest_path):
+                return {'If-Modified-Since': formatdate(dest_path.stat().st_mtime, usegmt=True)}
+            return {}
+
+        if entry.get('size') != dest_path.stat().st_size:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url, dest_path, etag, last_modified, size, sha256, source=None):
+        """
+        Record a completed download.
+
+        Args:
+            url (str): Download URL
+            dest_path (Path): Local destination path
+            etag (str): ETag response header (or None)
+            last_modified (str): Last-Modified response header (or None)
+            size (int): File size in bytes
+            sha256 (str): Hex digest of the file contents
+            source (str): Mirror URL that served the file (if not url itself)
+        """
+        try:
+            rel_path = os.path.relpath(dest_path, self.root_dir)
+        except ValueError:
+            rel_path = str(dest_path)
+
+        with self._lock:
+            self.entries[url] = {
+                'path': rel_path.replace(os.sep, '/'),
+                'etag': etag,
+                'last_modified': last_modified,
+                'size': size,
+                'sha256': sha256,
+                'source': source if source != url else None,
+                'fetched_at': utc_now(),
+                'checked_at': utc_now(),
+            }
+            self._mark_dirty(url)
+
+    def touch(self, url, dest_path=None):
+        """
+        Record a successful revalidation (HTTP 304) of a URL.
+
+        Args:
+            url (str): Download URL
+            dest_path (Path): Local destination path (used for legacy files)
+        """
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None and dest_path is not None:
+                dest_path = Path(dest_path)
+                entry = self.entries[url] = {
+                    'path': os.path.relpath(dest_path, self.root_dir).replace(os.sep, '/'),
+                    'etag': None,
+                    'last_modified': None,
+                    'size': dest_path.stat().st_size,
+                    'sha256': None,
+                    'fetched_at': None,
+                }
+            if entry is not None:
+                entry['checked_at'] = utc_now()
+                self._mark_dirty(url)
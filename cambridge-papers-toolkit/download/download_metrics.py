@@ -0,0 +1,368 @@
+"""
+Download Metrics
+Per-host throughput, latency percentiles, status codes and error taxonomy for a download run
+Written as a JSON summary and a Prometheus text file, periodically and when the run ends
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from http_session import connection_stats
+from rate_limiter import get_limiter
+
+# Default configuration
+METRICS_JSON = "download_metrics.json"
+METRICS_PROM = "download_metrics.prom"  # for node_exporter's textfile collector
+METRICS_INTERVAL = 30.0  # seconds between periodic writes
+METRIC_SAMPLES = 10000  # recent samples kept per host for percentiles
+PERCENTILES = (0.5, 0.95, 0.99)
+PROM_PREFIX = "cambridge_papers"
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def percentile(samples, fraction):
+    """
+    Get a percentile of a list of samples (nearest rank).
+
+    Args:
+        samples (list): Sorted values
+        fraction (float): Percentile as a fraction (e.g. 0.95)
+
+    Returns:
+        float: Value, or None if there are no samples
+    """
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class _HostMetrics:
+    """Counters and latency samples for one host."""
+
+    def __init__(self):
+        self.status_codes = {}
+        self.errors = {}
+        self.retries = 0
+        self.bytes = 0
+        self.bytes_skipped = 0
+        self.cache_skips = 0
+        self.transfer_seconds = 0.0
+        self.disk_write_seconds = 0.0
+        self.limiter_wait_seconds = 0.0
+        self.ttfb = deque(maxlen=METRIC_SAMPLES)
+        self.ttfb_sum = 0.0
+        self.ttfb_count = 0
+        self.latency = deque(maxlen=METRIC_SAMPLES)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+
+
+class DownloadMetrics:
+    """Thread-safe recorder shared by the fetcher, mirror layer and engine."""
+
+    def __init__(self):
+        """Start an empty recording."""
+        self.started = time.time()
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self.outcomes = {}
+
+    def _host(self, url):
+        """Get (or create) the metrics of a URL's host. Caller holds the lock."""
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _HostMetrics()
+        return self._hosts[host]
+
+    def record_response(self, url, status_code, ttfb, limiter_wait):
+        """
+        Record a response's status code and time to first byte.
+
+        Args:
+            url (str): Requested URL
+            status_code (int): HTTP status code
+            ttfb (float): Seconds from sending the request to the response headers
+            limiter_wait (float): Seconds spent waiting for a rate-limiter slot
+        """
+        with self._lock:
+            host = self._host(url)
+            host.status_codes[status_code] = host.status_codes.get(status_code, 0) + 1
+            host.ttfb.append(ttfb)
+            host.ttfb_sum += ttfb
+            host.ttfb_count += 1
+            host.limiter_wait_seconds += limiter_wait
+
+    def record_transfer(self, url, nbytes, seconds, disk_seconds):
+        """
+        Record a streamed response body.
+
+        Args:
+            url (str): URL the body came from
+            nbytes (int): Bytes received
+            seconds (float): Time spent receiving (and hashing) the body
+            disk_seconds (float): Part of that time spent writing to disk
+        """
+        with self._lock:
+            host = self._host(url)
+            host.bytes += nbytes
+            host.transfer_seconds += seconds
+            host.disk_write_seconds += disk_seconds
+
+    def record_latency(self, url, seconds):
+        """Record the full time of a completed request (headers and body)."""
+        with self._lock:
+            host = self._host(url)
+            host.latency.append(seconds)
+            host.latency_sum += seconds
+            host.latency_count += 1
+
+    def record_skipped(self, url, nbytes):
+        """Record bytes not transferred because the local copy was current (304)."""
+        with self._lock:
+            self._host(url).bytes_skipped += nbytes
+
+    def record_cache_skip(self, url):
+        """Record a request avoided because the negative cache knows the URL is missing."""
+        with self._lock:
+            self._host(url).cache_skips += 1
+
+    def record_retry(self, url):
+        """Record a retried request to the URL's host."""
+        with self._lock:
+            self._host(url).retries += 1
+
+    def record_error(self, url, kind):
+        """
+        Record a failed request or rejected download.
+
+        Args:
+            url (str): URL that failed
+            kind (str): Error class, e.g. 'timeout', 'connection', 'throttled',
+                'server_error', 'missing', 'html', 'invalid_pdf'
+        """
+        with self._lock:
+            host = self._host(url)
+            host.errors[kind] = host.errors.get(kind, 0) + 1
+
+    def record_outcome(self, status):
+        """Count a finished job by outcome ('downloaded', 'unchanged', 'missing', 'failed')."""
+        with self._lock:
+            self.outcomes[status] = self.outcomes.get(status, 0) + 1
+
+    def snapshot(self):
+        """
+        Summarize everything recorded so far.
+
+        Returns:
+            dict: Run totals and per-host metrics (JSON-serializable)
+        """
+        limiter_stats = get_limiter().host_stats()
+        connections = connection_stats()
+        with self._lock:
+            hosts = {}
+            for name, host in self._hosts.items():
+                ttfb = sorted(host.ttfb)
+                latency = sorted(host.latency)
+                connection = connections.get(name, {})
+                hosts[name] = {
+                    'requests': sum(host.status_codes.values()),
+                    'status_codes': {str(code): count for code, count in sorted(host.status_codes.items())},
+                    'errors': dict(sorted(host.errors.items())),
+                    'retries': host.retries,
+                    'bytes': host.bytes,
+                    'bytes_skipped': host.bytes_skipped,
+                    'negative_cache_skips': host.cache_skips,
+                    'bytes_per_second': host.bytes / host.transfer_seconds if host.transfer_seconds else 0.0,
+                    'transfer_seconds': host.transfer_seconds,
+                    'disk_write_seconds': host.disk_write_seconds,
+                    'limiter_wait_seconds': host.limiter_wait_seconds,
+                    'ttfb_seconds': dict({f"p{int(p * 100)}": percentile(ttfb, p) for p in PERCENTILES},
+                                         sum=host.ttfb_sum, count=host.ttfb_count),
+                    'latency_seconds': dict({f"p{int(p * 100)}": percentile(latency, p) for p in PERCENTILES},
+                                            sum=host.latency_sum, count=host.latency_count),
+                    'rate_limit': limiter_stats.get(name, {}).get('rate'),
+                    'throttled': limiter_stats.get(name, {}).get('throttled', 0),
+                    'new_connections': connection.get('new_connections', 0),
+                    'reused_connections': connection.get('reused', 0),
+                }
+            outcomes = dict(self.outcomes)
+
+        elapsed = time.monotonic() - self._start
+        total_bytes = sum(host['bytes'] for host in hosts.values())
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started)),
+            'elapsed_seconds': elapsed,
+            'files': outcomes,
+            'bytes': total_bytes,
+            'bytes_skipped': sum(host['bytes_skipped'] for host in hosts.values()),
+            'bytes_per_second': total_bytes / elapsed if elapsed else 0.0,
+            'hosts': hosts,
+        }
+
+
+def _prometheus_lines(snapshot):
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        if not samples:
+            return
+        full_name = f"{PROM_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ','.join(f'{key}="{label}"' for key, label in labels)
+            if label_text:
+                label_text = f"{{{label_text}}}"
+            lines.append(f"{full_name}{suffix}{label_text} {value}")
+
+    hosts = sorted(snapshot['hosts'].items())
+    metric('elapsed_seconds', 'gauge', "Seconds since the run started",
+           [('', (), snapshot['elapsed_seconds'])])
+    metric('files_total', 'counter', "Finished download jobs by outcome",
+           [('', (('outcome', outcome),), count) for outcome, count in sorted(snapshot['files'].items())])
+    metric('responses_total', 'counter', "HTTP responses by host and status code",
+           [('', (('host', name), ('code', code)), count)
+            for name, host in hosts for code, count in host['status_codes'].items()])
+    metric('errors_total', 'counter', "Failed requests and rejected downloads by kind",
+           [('', (('host', name), ('kind', kind)), count)
+            for name, host in hosts for kind, count in host['errors'].items()])
+    for key, name, help_text in (
+            ('retries', 'retries_total', "Retried requests"),
+            ('bytes', 'bytes_total', "Bytes downloaded"),
+            ('bytes_skipped', 'bytes_skipped_total', "Bytes not transferred because the local copy was current"),
+            ('negative_cache_skips', 'negative_cache_skips_total', "Requests avoided for known-missing papers"),
+            ('transfer_seconds', 'transfer_seconds_total', "Seconds spent receiving response bodies"),
+            ('disk_write_seconds', 'disk_write_seconds_total', "Seconds spent writing to disk"),
+            ('limiter_wait_seconds', 'limiter_wait_seconds_total', "Seconds spent waiting for the rate limiter")):
+        metric(name, 'counter', help_text, [('', (('host', host_name),), host[key]) for host_name, host in hosts])
+    metric('bytes_per_second', 'gauge', "Download speed while receiving bodies",
+           [('', (('host', name),), host['bytes_per_second']) for name, host in hosts])
+    metric('rate_limit_requests_per_second', 'gauge', "Current adaptive rate limit",
+           [('', (('host', name),), host['rate_limit']) for name, host in hosts if host['rate_limit'] is not None])
+
+    for key, name, help_text in (('ttfb_seconds', 'ttfb_seconds', "Time to first byte"),
+                                 ('latency_seconds', 'request_latency_seconds', "Full request time")):
+        samples = []
+        for host_name, host in hosts:
+            summary = host[key]
+            for p in PERCENTILES:
+                value = summary[f"p{int(p * 100)}"]
+                if value is not None:
+                    samples.append(('', (('host', host_name), ('quantile', p)), value))
+            samples.append(('_sum', (('host', host_name),), summary['sum']))
+            samples.append(('_count', (('host', host_name),), summary['count']))
+        metric(name, 'summary', help_text, samples)
+
+    return lines
+
+
+def _write_atomic(path, text):
+    """Write a file through a temporary name so readers never see half of it."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_metrics(directory, metrics=None):
+    """
+    Write the JSON summary and Prometheus file of a run.
+
+    Args:
+        directory (str): Folder to write into (usually the download root)
+        metrics (DownloadMetrics): Recorder (default: process-wide one)
+
+    Returns:
+        dict: The snapshot that was written
+    """
+    snapshot = (metrics or get_metrics()).snapshot()
+    os.makedirs(directory, exist_ok=True)
+    _write_atomic(os.path.join(directory, METRICS_JSON), json.dumps(snapshot, indent=2) + "\n")
+    _write_atomic(os.path.join(directory, METRICS_PROM), "\n".join(_prometheus_lines(snapshot)) + "\n")
+    return snapshot
+
+
+class MetricsWriter:
+    """Background thread writing the metrics files every METRICS_INTERVAL seconds."""
+
+    def __init__(self, directory, interval=METRICS_INTERVAL):
+        """
+        Prepare the writer.
+
+        Args:
+            directory (str): Folder to write into (usually the download root)
+            interval (float): Seconds between writes
+        """
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                write_metrics(self.directory)
+            except OSError as e:
+                print(f"  ⚠ Could not write metrics: {e}")
+
+    def start(self):
+        """Start periodic writing."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop periodic writing and write the final files.
+
+        Returns:
+            dict: Final snapshot
+        """
+        self._stop.set()
+        self._thread.join()
+        return write_metrics(self.directory)
+
+
+def get_metrics():
+    """
+    Get the process-wide metrics recorder.
+
+    Returns:
+        DownloadMetrics: Shared recorder
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = DownloadMetrics()
+        return _metrics
+
+
+def reset_metrics():
+    """
+    Start a new process-wide recording (e.g. between benchmark passes).
+
+    Returns:
+        DownloadMetrics: The new shared recorder
+    """
+    global _metrics
+    with _metrics_lock:
+        _metrics = DownloadMetrics()
+        return _metrics
+
+
+def print_metrics_summary(snapshot):
+    """Print the per-host latency line of a finished run."""
+    for name, host in sorted(snapshot['hosts'].items()):
+        latency = host['latency_seconds']
+        if latency['p50'] is None:
+            continue
+        print(f"Latency:          {name}: p50 {latency['p50'] * 1000:.0f} ms, "
+              f"p95 {latency['p95'] * 1000:.0f} ms, p99 {latency['p99'] * 1000:.0f} ms, "
+              f"{host['retries']} retries, {sum(host['errors'].values())} errors")
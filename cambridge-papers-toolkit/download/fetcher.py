@@ -0,0 +1,497 @@
+"""
+File Fetcher
+Single-file download routine shared by the downloader scripts
+Issues conditional GETs, resumes interrupted transfers and swaps files in atomically
+Races slow mirrors with hedged requests and fails over between them
+Validates and hashes PDFs inline while they stream, with no second pass over the disk
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+
+from download_metrics import get_metrics
+from http_session import get_session
+from mirrors import open_hedged, request_error_kind
+from negative_cache import FRESH, EXPIRED, STILL_MISSING, MISSING_STATUSES, MISSING_TTL, SOFT_MISS_TTL
+from rate_limiter import get_limiter, parse_retry_after, backoff_delay, THROTTLE_STATUSES
+from stream_validator import PdfStreamValidator, PdfStreamError, HtmlPageError
+
+CHUNK_SIZE = 64 * 1024
+RETRY_ATTEMPTS = 4  # retries after a dropped connection, 429 or 5xx
+
+# Fetch outcomes
+DOWNLOADED = 'downloaded'
+UNCHANGED = 'unchanged'
+MISSING = 'missing'
+FAILED = 'failed'
+
+
+class FetchRejected(Exception):
+    """Downloaded bytes are not acceptable; the partial file must be dropped."""
+
+
+class RestartTransfer(Exception):
+    """The partial file cannot be resumed; the next attempt starts from zero."""
+
+
+class UpstreamMissing(FetchRejected):
+    """The paper does not exist upstream (404/410 or an HTML error page)."""
+
+    def __init__(self, message, status, ttl=MISSING_TTL):
+        super().__init__(message)
+        self.status = status
+        self.ttl = ttl
+
+
+class RetryLater(Exception):
+    """The server asked us to back off (429/5xx); the partial file is kept."""
+
+    def __init__(self, message, retry_after=None, status=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+
+def part_path_for(dest_path):
+    """
+    Get the in-progress path used while downloading dest_path.
+
+    Args:
+        dest_path (Path): Final destination path
+
+    Returns:
+        Path: '<name>.part' next to the destination
+    """
+    return dest_path.with_name(dest_path.name + '.part')
+
+
+def _meta_path(part_path):
+    """Sidecar file holding the validators (and the mirror) of a partial download."""
+    return part_path.with_name(part_path.name + '.json')
+
+
+def _discard_partial(part_path):
+    """Remove a partial download and its sidecar."""
+    for path in (part_path, _meta_path(part_path)):
+        if path.exists():
+            path.unlink()
+
+
+def _load_partial(part_path):
+    """
+    Inspect an existing partial download.
+
+    Args:
+        part_path (Path): Path to the .part file
+
+    Returns:
+        tuple: (offset: int, validator: str or None, url: mirror URL that
+               issued the validator, or None)
+    """
+    if not part_path.exists():
+        return 0, None, None
+    validator = url = None
+    try:
+        with open(_meta_path(part_path), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        validator = meta.get('etag') or meta.get('last_modified')
+        url = meta.get('url')
+    except (OSError, ValueError):
+        pass
+    if validator is None or url is None:
+        # Without a validator (and the mirror that issued it) we cannot prove
+        # the bytes belong to the same version
+        _discard_partial(part_path)
+        return 0, None, None
+    return part_path.stat().st_size, validator, url
+
+
+def _save_partial_meta(part_path, response, url):
+    """Remember the validators of the response being written to part_path and the mirror that sent it."""
+    meta = {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    with open(_meta_path(part_path), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _reset_state(state, require_pdf):
+    """Start a fresh running digest (and validator) for a new file body."""
+    state['digest'] = hashlib.sha256()
+    state['validator'] = PdfStreamValidator() if require_pdf else None
+    state['size'] = 0
+
+
+def _consume(state, chunk):
+    """Feed a chunk into the running digest and validator."""
+    state['digest'].update(chunk)
+    if state['validator']:
+        state['validator'].feed(chunk)
+    state['size'] += len(chunk)
+
+
+def _replay_existing(part_path, state):
+    """Feed bytes already on disk into the running digest and validator."""
+    with open(part_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            _consume(state, chunk)
+
+
+def _expected_size(response):
+    """
+    Get the full file size announced by the server.
+
+    Args:
+        response (requests.Response): 200 or 206 response
+
+    Returns:
+        int: Total size in bytes, or None if unknown
+    """
+    try:
+        if response.status_code == 206:
+            # "bytes <start>-<end>/<total>"
+            return int(response.headers.get('Content-Range', '').rsplit('/', 1)[1])
+        if response.headers.get('Content-Encoding', 'identity') != 'identity':
+            return None
+        return int(response.headers['Content-Length'])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+def _resume_offset(response, offset):
+    """
+    Work out where the response body starts.
+
+    Args:
+        response (requests.Response): Response to a (possibly ranged) request
+        offset (int): Bytes already on disk
+
+    Returns:
+        int: Offset the body starts at (0 for a full 200 body)
+
+    Raises:
+        RestartTransfer: A 206 body that does not continue the partial file
+    """
+    if response.status_code != 206:
+        return 0
+    content_range = response.headers.get('Content-Range', '')
+    # Expected form: "bytes <start>-<end>/<total>"
+    try:
+        start = int(content_range.split()[1].split('-')[0])
+    except (IndexError, ValueError):
+        raise RestartTransfer(f"Unreadable Content-Range: {content_range[:40]}")
+    if start != offset:
+        raise RestartTransfer(f"Range response starts at {start}, not {offset}")
+    return start
+
+
+def _is_html(response):
+    """Check whether a response announces an HTML body."""
+    return response.headers.get('content-type', '').lower().startswith('text/html')
+
+
+def _resolve_failures(failures, require_pdf, negative_cache):
+    """
+    Remember mirrors that lack the paper and pick the error to surface.
+
+    Args:
+        failures (list): (url, response_or_exception) pairs from open_hedged()
+        require_pdf (bool): HTML answers count as missing
+        negative_cache (NegativeCache): Cache to record missing URLs in (optional)
+
+    Returns:
+        Exception: Transient errors first (retried), then rejections, then
+                   UpstreamMissing when every mirror lacks the paper
+    """
+    transient = rejected = missing = None
+    for url, outcome in failures:
+        if isinstance(outcome, Exception):
+            transient = transient or outcome
+            continue
+        status = outcome.status_code
+        if status == 429 or status >= 500:
+            retry_after = parse_retry_after(outcome.headers.get('Retry-After'))
+            transient = transient or RetryLater(f"Status: {status}", retry_after, status)
+        elif status in MISSING_STATUSES:
+            missing = missing or UpstreamMissing(f"Status: {status}", status)
+            if negative_cache:
+                negative_cache.record_missing(url, status)
+        elif require_pdf and _is_html(outcome):
+            missing = missing or UpstreamMissing("Not a PDF (HTML response)", 'html', SOFT_MISS_TTL)
+            if negative_cache:
+                negative_cache.record_missing(url, 'html', SOFT_MISS_TTL)
+        else:
+            rejected = rejected or FetchRejected(f"Status: {status}")
+    return transient or rejected or missing
+
+
+def _stream_once(session, candidates, part_path, headers, require_pdf, state, negative_cache):
+    """
+    Issue one (possibly hedged) request and append its body to the partial file.
+
+    The running sha256 and PDF validator in state cover the first
+    state['size'] bytes of the partial file, so resumed transfers only
+    re-read the disk when resuming a partial left by an earlier run.
+    The mirror that answered is stored in state['url']. Validators are
+    only sent to the mirror that issued them: headers holds the conditional
+    headers per URL, and Range/If-Range go to the mirror the partial file
+    came from (other mirrors answer with the whole file).
+
+    Returns:
+        tuple: (status, response_headers)
+    """
+    offset, validator, part_url = _load_partial(part_path)
+    if offset and part_url not in candidates:
+        _discard_partial(part_path)
+        offset = 0
+    url_headers = {candidate: dict(values) for candidate, values in headers.items()}
+    if offset:
+        url_headers.setdefault(part_url, {}).update({'Range': f"bytes={offset}-", 'If-Range': validator})
+
+    def usable(response):
+        if response.status_code in (200, 206):
+            return not (require_pdf and _is_html(response))
+        return response.status_code == 304 or (response.status_code == 416 and bool(offset))
+
+    (url, host, response), failures = open_hedged(session, candidates, {}, usable, url_headers)
+    error = _resolve_failures(failures, require_pdf, negative_cache)
+    metrics = get_metrics()
+    if response is None:
+        if not isinstance(error, requests.exceptions.RequestException):
+            # Connection errors were already counted per mirror by open_hedged()
+            metrics.record_error(candidates[0], _error_kind(error))
+        raise error
+
+    state['url'] = url
+    ttfb = response.elapsed.total_seconds()
+    try:
+        with response:
+            if response.status_code == 304:
+                metrics.record_latency(url, ttfb)
+                return UNCHANGED, response.headers
+
+            if response.status_code == 416:
+                # Our partial no longer matches the server copy; start over next attempt
+                _discard_partial(part_path)
+                raise RestartTransfer("Range not satisfiable")
+
+            try:
+                start = _resume_offset(response, offset)
+            except RestartTransfer:
+                # The body is only part of the file; the next attempt asks for all of it
+                _discard_partial(part_path)
+                raise
+            if not start:
+                _save_partial_meta(part_path, response, url)
+                _reset_state(state, require_pdf)
+            elif state['digest'] is None or state['size'] != start:
+                _reset_state(state, require_pdf)
+                _replay_existing(part_path, state)
+            state['expected'] = _expected_size(response)
+
+            body_start = time.monotonic()
+            received, disk_seconds = 0, 0.0
+            try:
+                with open(part_path, 'ab' if start else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        _consume(state, chunk)
+                        write_start = time.monotonic()
+                        f.write(chunk)
+                        disk_seconds += time.monotonic() - write_start
+                        received += len(chunk)
+                        state['transferred'] += len(chunk)
+            finally:
+                body_seconds = time.monotonic() - body_start
+                metrics.record_transfer(url, received, body_seconds, disk_seconds)
+            metrics.record_latency(url, ttfb + body_seconds)
+            return DOWNLOADED, response.headers
+    except Exception as e:
+        metrics.record_error(url, _error_kind(e))
+        raise
+    finally:
+        get_limiter().release(host)
+
+
+def _error_kind(error):
+    """Classify a fetch error for the error metrics."""
+    if isinstance(error, UpstreamMissing):
+        return 'html' if error.status == 'html' else 'missing'
+    if isinstance(error, HtmlPageError):
+        return 'html'
+    if isinstance(error, PdfStreamError):
+        return 'invalid_pdf'
+    if isinstance(error, FetchRejected):
+        return 'rejected'
+    if isinstance(error, RetryLater):
+        return 'throttled' if error.status in THROTTLE_STATUSES else 'server_error'
+    if isinstance(error, RestartTransfer):
+        return 'range_restart'
+    if isinstance(error, requests.exceptions.RequestException):
+        return request_error_kind(error)
+    return 'other'
+
+
+def _known_missing(negative_cache, url, session):
+    """Check the negative cache, re-probing expired entries with HEAD."""
+    cached = negative_cache.lookup(url)
+    if cached == FRESH:
+        return True
+    return cached == EXPIRED and negative_cache.probe(url, session) == STILL_MISSING
+
+
+def fetch_file(url, dest_path, manifest=None, require_pdf=False, session=None,
+               negative_cache=None, store=None, catalog=None):
+    """
+    Download a URL (or the first of several mirror URLs) to a local file,
+    revalidating existing copies.
+
+    With several mirrors, a hedged request goes to the next mirror when the
+    first is slower than its usual latency, and missing or failing mirrors
+    fail over to the others; the manifest remembers which mirror served the
+    file and asks it first next time. ETags and Last-Modified dates (for
+    conditional requests and resumes) are only sent to the mirror that
+    issued them. Every request goes through the shared
+    adaptive rate limiter. Data is
+    streamed into '<name>.part'; dropped connections, 429s and 5xx responses
+    are retried with jittered backoff (honoring Retry-After) and resumed with
+    HTTP Range requests (also across runs), and the finished file is renamed
+    over the destination atomically so a complete copy is never lost.
+    With require_pdf the bytes are checked as they arrive (HTML error pages
+    abort on the first chunk) and the Content-Length and PDF trailer are
+    verified before the rename; the sha256 recorded in the manifest is
+    computed from the same stream. With a negative cache, URLs that recently
+    answered 404/410 (or an HTML page) are skipped without a request and
+    expired entries are re-checked with a HEAD probe first. With a content
+    store, the finished file is linked to its sha256 blob so identical papers
+    are kept on disk once. With a catalog database, downloaded and
+    revalidated files are recorded (size, mtime and sha256) for later stages.
+
+    Args:
+        url (str or list): URL, or mirror URLs in preference order (the first
+            is the key for the manifest)
+        dest_path (Path): Local path to save the file
+        manifest (DownloadManifest): Manifest used for conditional requests (optional)
+        require_pdf (bool): Validate the stream as a PDF (header, trailer, length)
+        session (requests.Session): Session to use (default: shared session)
+        negative_cache (NegativeCache): Known-missing URLs to skip (optional)
+        store (ContentStore): Content-addressed store to deduplicate into (optional)
+        catalog (CatalogDB): Shared paper catalog to record the file in (optional)
+
+    Returns:
+        tuple: (status: str, bytes_downloaded: int, message: str)
+    """
+    dest_path = Path(dest_path)
+    part_path = part_path_for(dest_path)
+    session = session or get_session()
+    candidates = [url] if isinstance(url, str) else list(url)
+    key = candidates[0]
+
+    metrics = get_metrics()
+    if negative_cache:
+        available = []
+        for candidate in candidates:
+            if _known_missing(negative_cache, candidate, session):
+                metrics.record_cache_skip(candidate)
+            else:
+                available.append(candidate)
+        candidates = available
+        if not candidates:
+            return MISSING, 0, "Known missing (cached)"
+
+    headers = {}  # URL -> conditional headers; validators only go to the mirror that issued them
+    if manifest:
+        entry = manifest.get(key)
+        source = (entry.get('source') or key) if entry else key
+        if source in candidates:
+            candidates.remove(source)
+            candidates.insert(0, source)
+        conditional = manifest.conditional_headers(key, dest_path)
+        if conditional:
+            headers[source] = conditional
+
+    state = {'digest': None, 'validator': None, 'size': 0, 'expected': None,
+             'transferred': 0, 'url': None}
+    last_error = None
+    delay = 0
+    for attempt in range(RETRY_ATTEMPTS + 1):
+        if attempt:
+            metrics.record_retry(state['url'] or candidates[0])
+        if delay:
+            time.sleep(delay)
+        try:
+            status, response_headers = _stream_once(
+                session, candidates, part_path, headers, require_pdf, state, negative_cache)
+            break
+        except UpstreamMissing as e:
+            _discard_partial(part_path)
+            return MISSING, state['transferred'], str(e)
+        except HtmlPageError as e:
+            _discard_partial(part_path)
+            if negative_cache:
+                negative_cache.record_missing(state['url'], 'html', SOFT_MISS_TTL)
+            return MISSING, state['transferred'], str(e)
+        except (FetchRejected, PdfStreamError) as e:
+            _discard_partial(part_path)
+            return FAILED, state['transferred'], str(e)
+        except RetryLater as e:
+            last_error = str(e)
+            # A Retry-After pause is enforced by the limiter for the whole host
+            delay = 0 if e.retry_after else backoff_delay(attempt)
+        except RestartTransfer as e:
+            last_error = str(e)
+            delay = 0
+        except requests.exceptions.RequestException as e:
+            # Keep the .part file: the next attempt (or run) resumes from it
+            last_error = str(e)[:50]
+            delay = backoff_delay(attempt)
+        except Exception as e:
+            _discard_partial(part_path)
+            return FAILED, state['transferred'], f"Error: {str(e)[:50]}"
+    else:
+        return FAILED, state['transferred'], last_error
+
+    if status == UNCHANGED:
+        _discard_partial(part_path)
+        if dest_path.exists():
+            metrics.record_skipped(state['url'], dest_path.stat().st_size)
+        if manifest:
+            manifest.touch(key, dest_path)
+        if catalog and dest_path.exists():
+            known = manifest.get(key) if manifest else None
+            catalog.record_download(dest_path, known.get('sha256') if known else None)
+        return UNCHANGED, 0, "Not modified"
+
+    size = state['size']
+    try:
+        if state['validator']:
+            state['validator'].finish(state['expected'])
+        elif state['expected'] is not None and size != state['expected']:
+            raise PdfStreamError(f"Size mismatch: got {size} of {state['expected']} bytes")
+    except PdfStreamError as e:
+        metrics.record_error(state['url'], 'invalid_pdf')
+        _discard_partial(part_path)
+        return FAILED, state['transferred'], str(e)
+
+    os.replace(part_path, dest_path)
+    _discard_partial(part_path)
+
+    sha256 = state['digest'].hexdigest()
+    if store:
+        store.ingest(dest_path, sha256)
+    if catalog:
+        catalog.record_download(dest_path, sha256)
+    if manifest:
+        manifest.record(key, dest_path, response_headers.get('ETag'),
+                        response_headers.get('Last-Modified'), size, sha256, source=state['url'])
+    message = f"{size / 1024:.1f} KB"
+    if state['url'] != key:
+        message += f" via {urlparse(state['url']).netloc}"
+    return DOWNLOADED, state['transferred'], message
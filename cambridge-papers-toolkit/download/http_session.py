@@ -0,0 +1,132 @@
+"""
+Shared HTTP Session Layer
+Provides one connection-pooled requests session for every downloader
+Reuses keep-alive connections and reports reuse vs. new handshakes per host
+"""
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Default configuration
+POOL_CONNECTIONS = 4  # number of hosts kept in the pool manager
+POOL_MAXSIZE = 8  # keep-alive connections kept per host
+MAX_RETRIES = 3  # retries on connection/read errors
+BACKOFF_FACTOR = 0.5  # seconds, doubled on every retry
+TIMEOUT = (10, 30)  # (connect, read) seconds
+USER_AGENT = "cambridge-papers-toolkit/1.0 (+requests)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that applies a default timeout to every request."""
+
+    def __init__(self, *args, timeout=TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                   max_retries=MAX_RETRIES, timeout=TIMEOUT):
+    """
+    Create a new connection-pooled session.
+
+    Args:
+        pool_connections (int): Number of per-host pools to cache
+        pool_maxsize (int): Keep-alive connections kept per host
+        max_retries (int): Retries on connection and read errors
+        timeout (tuple): Default (connect, read) timeout in seconds
+
+    Returns:
+        requests.Session: Configured session
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=0,
+        backoff_factor=BACKOFF_FACTOR,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        timeout=timeout,
+    )
+
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(**kwargs):
+    """
+    Get the process-wide shared session, creating it on first use.
+
+    Keyword arguments are passed to create_session() and only take effect
+    on the first call.
+
+    Returns:
+        requests.Session: Shared session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session(**kwargs)
+        return _session
+
+
+def connection_stats(session=None):
+    """
+    Collect connection reuse statistics from the session's pools.
+
+    Args:
+        session (requests.Session): Session to inspect (default: shared session)
+
+    Returns:
+        dict: host -> {'requests', 'new_connections', 'reused'}
+    """
+    session = session or get_session()
+    stats = {}
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            entry = stats.setdefault(host, {'requests': 0, 'new_connections': 0, 'reused': 0})
+            entry['requests'] += pool.num_requests
+            entry['new_connections'] += pool.num_connections
+    for entry in stats.values():
+        entry['reused'] = max(entry['requests'] - entry['new_connections'], 0)
+    return stats
+
+
+def print_connection_stats(session=None):
+    """
+    Print connection reuse statistics for a finished run.
+
+    Args:
+        session (requests.Session): Session to inspect (default: shared session)
+    """
+    stats = connection_stats(session)
+    if not stats:
+        return
+    print("Connections:")
+    for host, entry in sorted(stats.items()):
+        print(f"  {host}: {entry['requests']} requests, "
+              f"{entry['new_connections']} new handshakes, "
+              f"{entry['reused']} reused")
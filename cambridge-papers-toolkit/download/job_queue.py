@@ -0,0 +1,365 @@
+"""
+Persistent Download Job Queue
+SQLite-backed list of pending, leased, done and failed fetches inside a download root
+Lets several processes (or machines sharing the folder) drain one catalog and resume after a crash
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+QUEUE_NAME = ".download_queue.sqlite"
+JOURNAL_MODE = 'DELETE'  # 'WAL' is faster but only safe when every worker is on this machine
+BUSY_TIMEOUT = 30.0  # seconds to wait for another process's lock
+LEASE_SECONDS = 600  # a claimed job returns to the pool if its worker vanishes this long (other machines)
+MAX_ATTEMPTS = 5  # failed runs before a job is parked as 'failed'
+RETRY_BASE = 60.0  # seconds; doubles with every failed attempt
+RETRY_CAP = 3600.0  # seconds
+MAX_IDLE_WAIT = 120.0  # seconds a worker waits for retries/leases before exiting
+POLL_INTERVAL = 2.0  # seconds between checks while waiting
+
+# Job states
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+MISSING = 'missing'
+FAILED = 'failed'
+
+Job = namedtuple('Job', 'id urls dest attempts')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    urls TEXT NOT NULL,
+    dest TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_status TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, not_before);
+"""
+
+
+def default_worker_id():
+    """Identify this process across machines (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    """Check whether a process of this machine is still running (assumed alive where it cannot be checked)."""
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _lease_is_stale(owner, worker_id):
+    """
+    Check whether a lease owner is known to be gone.
+
+    Args:
+        owner (str): lease_owner of a job
+        worker_id (str): Identity of the current worker
+
+    Returns:
+        bool: True for this worker's own leases and for host:pid owners on
+              this machine whose process no longer runs
+    """
+    if owner == worker_id:
+        return True
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    return int(pid) == os.getpid() or not _pid_alive(int(pid))
+
+
+class JobQueue:
+    """Durable job queue with leases, stored in one SQLite file."""
+
+    def __init__(self, root_directory, name=QUEUE_NAME):
+        """
+        Open (or create) the queue of a download root.
+
+        Destinations are stored relative to the root, so machines mounting
+        the folder at different paths share the same queue.
+
+        Args:
+            root_directory (str): Download root the queue belongs to
+            name (str): Queue file name inside the root
+        """
+        self.root_dir = Path(root_directory)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.root_dir / name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+        self._conn.executescript(_SCHEMA)
+
+    def _transaction(self, func):
+        """Run func(cursor) inside one write transaction."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(cursor)
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return result
+
+    def _relative(self, dest_path):
+        """Destination path relative to the root, with '/' separators."""
+        return os.path.relpath(dest_path, self.root_dir).replace(os.sep, '/')
+
+    def begin_pass(self, jobs, worker_id=None):
+        """
+        Add catalog jobs and decide whether to resume or start a new pass.
+
+        Leases held by this worker, or by processes of this machine that no
+        longer run (a crashed run), are released first, so a restart picks
+        their jobs up at once instead of waiting LEASE_SECONDS. If unfinished
+        jobs exist (a crashed or concurrent run), the pass is resumed and
+        only new catalog entries are added. Otherwise every job is reset to
+        pending so the whole tree is revalidated again.
+
+        Args:
+            jobs (iterable): (urls, dest_path) tuples; urls is a URL or a list
+                of mirror URLs (the first is the job key)
+            worker_id (str): Identity of the worker about to claim jobs
+
+        Returns:
+            str: 'resumed' or 'new pass'
+        """
+        def rows():
+            for urls, dest_path in jobs:
+                urls = [urls] if isinstance(urls, str) else list(urls)
+                yield urls[0], json.dumps(urls), self._relative(dest_path), time.time()
+
+        def run(cursor):
+            cursor.execute("SELECT id, lease_owner FROM jobs WHERE state = ?", (LEASED,))
+            stale = [(PENDING, job_id) for job_id, owner in cursor.fetchall() if _lease_is_stale(owner, worker_id)]
+            cursor.executemany("UPDATE jobs SET state = ?, not_before = 0, lease_owner = NULL, "
+                               "lease_expires = NULL WHERE id = ?", stale)
+            cursor.execute("SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)", (PENDING, LEASED))
+            resumed = cursor.fetchone()[0] > 0
+            if not resumed:
+                cursor.execute("UPDATE jobs SET state = ?, attempts = 0, not_before = 0, "
+                               "lease_owner = NULL, lease_expires = NULL", (PENDING,))
+            cursor.executemany("INSERT INTO jobs (key, urls, dest, updated) VALUES (?, ?, ?, ?) "
+                               "ON CONFLICT(key) DO UPDATE SET urls = excluded.urls, dest = excluded.dest",
+                               rows())
+            return 'resumed' if resumed else 'new pass'
+
+        return self._transaction(run)
+
+    def claim(self, worker_id, lease_seconds=LEASE_SECONDS):
+        """
+        Lease the next runnable job.
+
+        Pending jobs whose retry time has come and jobs whose lease expired
+        (their worker died) are both eligible.
+
+        Args:
+            worker_id (str): Identity of the claiming worker
+            lease_seconds (float): Lease duration
+
+        Returns:
+            Job: Leased job, or None if nothing is runnable now
+        """
+        def run(cursor):
+            now = time.time()
+            cursor.execute("SELECT id, urls, dest, attempts FROM jobs "
+                           "WHERE (state = ? AND not_before <= ?) OR (state = ? AND lease_expires < ?) "
+                           "ORDER BY id LIMIT 1", (PENDING, now, LEASED, now))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute("UPDATE jobs SET state = ?, lease_owner = ?, lease_expires = ?, "
+                           "attempts = attempts + 1, updated = ? WHERE id = ?",
+                           (LEASED, worker_id, now + lease_seconds, now, row[0]))
+            return Job(row[0], json.loads(row[1]), self.root_dir / row[2], row[3] + 1)
+
+        return self._transaction(run)
+
+    def complete(self, job, worker_id, status):
+        """
+        Record the outcome of a leased job.
+
+        Failed jobs go back to pending with exponential backoff until
+        MAX_ATTEMPTS, then stay 'failed'. Outcomes from a worker whose lease
+        was taken over are ignored.
+
+        Args:
+            job (Job): Job returned by claim()
+            worker_id (str): Identity of the worker holding the lease
+            status (str): Fetch outcome ('downloaded', 'unchanged', 'missing' or 'failed')
+        """
+        now = time.time()
+        if status == 'failed' and job.attempts < MAX_ATTEMPTS:
+            state = PENDING
+            not_before = now + min(RETRY_CAP, RETRY_BASE * 2 ** (job.attempts - 1))
+        else:
+            state = {'failed': FAILED, 'missing': MISSING}.get(status, DONE)
+            not_before = 0
+
+        def run(cursor):
+            cursor.execute("UPDATE jobs SET state = ?, not_before = ?, last_status = ?, "
+                           "lease_owner = NULL, lease_expires = NULL, updated = ? "
+                           "WHERE id = ? AND lease_owner = ?",
+                           (state, not_before, status, now, job.id, worker_id))
+
+        self._transaction(run)
+
+    def next_wakeup(self):
+        """
+        Seconds until another job could become runnable.
+
+        Returns:
+            float: 0 or more, or None if no job is pending or leased
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(CASE WHEN state = ? THEN not_before ELSE lease_expires END) "
+                "FROM jobs WHERE state IN (?, ?)", (PENDING, PENDING, LEASED)).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def in_flight(self, worker_id):
+        """
+        Count the jobs a worker holds leases on.
+
+        Args:
+            worker_id (str): Identity of the worker
+
+        Returns:
+            int: Number of leased jobs
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE state = ? AND lease_owner = ?",
+                                      (LEASED, worker_id)).fetchone()[0]
+
+    def iter_claims(self, worker_id, max_idle_wait=MAX_IDLE_WAIT):
+        """
+        Claim jobs until the queue is drained.
+
+        When nothing is runnable the worker polls for retries and for leases
+        of other (possibly crashed) workers, and exits once the next one is
+        further away than max_idle_wait and none of its own jobs are still
+        running (a job failing now is retried within this run).
+
+        Args:
+            worker_id (str): Identity of the claiming worker
+            max_idle_wait (float): Longest wait for a retry or lease expiry
+
+        Yields:
+            tuple: (job, dest_path) for run_downloads()
+        """
+        while True:
+            job = self.claim(worker_id)
+            if job is not None:
+                yield job, job.dest
+                continue
+            wakeup = self.next_wakeup()
+            if wakeup is None or wakeup > max_idle_wait:
+                if not self.in_flight(worker_id):
+                    return
+                wakeup = POLL_INTERVAL
+            time.sleep(min(max(wakeup, 0.1), POLL_INTERVAL))
+
+    def worker(self, download_func, worker_id):
+        """
+        Wrap a download function so its outcome is recorded in the queue.
+
+        Args:
+            download_func (callable): download_func(urls, dest_path) -> (status, bytes)
+            worker_id (str): Identity of the worker holding the leases
+
+        Returns:
+            callable: func(job, dest_path) -> (status, bytes) for run_downloads()
+        """
+        def run(job, dest_path):
+            status, nbytes = 'failed', 0
+            try:
+                dest_path.parent.mkdir(parents=True, exist_ok=True)
+                status, nbytes = download_func(job.urls, dest_path)
+            finally:
+                self.complete(job, worker_id, status)
+            return status, nbytes
+
+        return run
+
+    def counts(self):
+        """
+        Count jobs per state.
+
+        Returns:
+            dict: state -> number of jobs
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {state: 0 for state in (PENDING, LEASED, DONE, MISSING, FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+    def retry_failed(self):
+        """
+        Put every parked failed job back in the queue.
+
+        Returns:
+            int: Number of jobs re-queued
+        """
+        def run(cursor):
+            cursor.execute("UPDATE jobs SET state = ?, attempts = 0, not_before = 0 WHERE state = ?",
+                           (PENDING, FAILED))
+            return cursor.rowcount
+
+        return self._transaction(run)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def print_queue_counts(queue):
+    """Print a one-line summary of a queue."""
+    counts = queue.counts()
+    print(f"Job queue:        {counts[DONE]} done, {counts[MISSING]} missing, "
+          f"{counts[FAILED]} failed, {counts[PENDING]} pending, {counts[LEASED]} leased")
+
+
+def main():
+    """Inspect a download root's job queue or re-queue its failed jobs."""
+    parser = argparse.ArgumentParser(description="Inspect the persistent download job queue")
+    parser.add_argument('root', help="Download root folder (e.g. Cambridge_Past_Papers_0620)")
+    parser.add_argument('--retry-failed', action='store_true', help="Re-queue parked failed jobs")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.root)
+    if args.retry_failed:
+        print(f"✓ Re-queued {queue.retry_failed()} failed jobs")
+    print_queue_counts(queue)
+    queue.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+JSON Store
+Small thread-safe, atomically saved JSON dictionary kept inside a download root
+Base class for the download manifest and the negative-result cache
+Saves merge with the file on disk, so several worker processes can share one store
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+SAVE_EVERY = 25  # changes between automatic saves
+
+
+def utc_now():
+    """Current UTC time as an ISO 8601 string."""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+class JsonStore:
+    """Thread-safe dictionary persisted as a JSON file."""
+
+    def __init__(self, root_directory, name):
+        """
+        Load (or start) the store.
+
+        Args:
+            root_directory (str): Directory the store file lives in
+            name (str): File name inside the directory
+        """
+        self.root_dir = Path(root_directory)
+        self.path = self.root_dir / name
+        self._lock = threading.Lock()
+        self._changed = set()
+        self.entries = self._load(report=True)
+
+    def _load(self, report=False):
+        """Read the store file (empty if missing or unreadable)."""
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            if report:
+                print(f"  ⚠ Ignoring unreadable {self.path}: {e}")
+            return {}
+
+    def _mark_dirty(self, key):
+        """Note a changed key and save periodically (caller holds the lock)."""
+        self._changed.add(key)
+        if len(self._changed) >= SAVE_EVERY:
+            self._save_locked()
+
+    def _save_locked(self):
+        """
+        Merge our changed keys into the file on disk and write it atomically
+        (caller holds the lock). Entries written meanwhile by other processes
+        are kept and picked up.
+        """
+        merged = self._load()
+        for key in self._changed:
+            if key in self.entries:
+                merged[key] = self.entries[key]
+            else:
+                merged.pop(key, None)
+        self.entries = merged
+
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._changed.clear()
+
+    def save(self):
+        """Write the store to disk."""
+        with self._lock:
+            self._save_locked()
@@ -0,0 +1,317 @@
+"""
+Mirror Resolution and Hedged Requests
+Maps a catalog paper to candidate URLs on every mirror that carries its subject
+Sends a backup request to the next mirror when the first one is slower than usual
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import quote, urlparse
+
+import requests
+
+from download_metrics import get_metrics
+from paper_catalog import SESSION_CODES, caie_filename
+from rate_limiter import get_limiter, parse_retry_after
+
+# Mirror base URLs
+MIRRORS = {
+    'papacambridge': "https://pastpapers.papacambridge.com/download_file.php?files=https://pastpapers.papacambridge.com/directories/CAIE/CAIE-pastpapers/upload/",
+    'pmt': "https://pmt.physicsandmathstutor.com/download/",
+}
+
+# Mirrors carrying each subject, in preference order: (mirror, subject path on the mirror)
+SUBJECT_MIRRORS = {
+    '0620': (('pmt', "Chemistry/GCSE/Past-Papers/CIE/"), ('papacambridge', "")),
+    '0971': (('papacambridge', ""),),
+}
+
+# Hedging configuration
+HEDGE_PERCENTILE = 0.9  # hedge once the first request is slower than this share of requests
+HEDGE_DEFAULT_DELAY = 2.0  # seconds, used until a host has MIN_SAMPLES measurements
+HEDGE_MIN_DELAY = 0.25  # seconds; never hedge sooner than this
+HEDGE_BUDGET = 0.1  # at most this many extra requests per logical request
+LATENCY_SAMPLES = 100  # recent time-to-first-byte samples kept per host
+MIN_SAMPLES = 10
+HEDGE_WORKERS = 32  # threads issuing (possibly duplicate) requests
+
+_tracker = None
+_tracker_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def caie_component(entry):
+    """
+    Get the CAIE component code of an entry (e.g. Paper-2 variant 1 -> '21').
+
+    Args:
+        entry (PaperEntry): Catalog entry
+
+    Returns:
+        str: Component code used in CAIE file names
+    """
+    if not entry.component.startswith('Paper-'):
+        return entry.component
+    number = entry.component[len('Paper-'):]
+    return f"{number}{entry.variant}" if entry.variant else number
+
+
+def papacambridge_url(base_url, subject_path, entry):
+    """Build a papacambridge URL (CAIE file names; no specimen papers)."""
+    if entry.session not in SESSION_CODES:
+        return None
+    return base_url + subject_path + caie_filename(entry._replace(component=caie_component(entry)))
+
+
+def pmt_url(base_url, subject_path, entry):
+    """Build a physicsandmathstutor URL (Paper-N/International/QP/June 2024 (v1) QP.pdf)."""
+    if entry.component.startswith('Paper-'):
+        component, variant = entry.component, entry.variant
+    else:
+        component, variant = f"Paper-{entry.component[0]}", int(entry.component[1:] or 0) or None
+    label = entry._replace(variant=variant).label
+    filename = quote(f"{label} {entry.doc_type}.pdf")
+    return f"{base_url}{subject_path}{component}/International/{entry.doc_type}/{filename}"
+
+
+URL_BUILDERS = {'papacambridge': papacambridge_url, 'pmt': pmt_url}
+
+
+def request_error_kind(error):
+    """Classify a requests exception for the error metrics."""
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return 'connection'
+    return 'request'
+
+
+def candidate_urls(entry):
+    """
+    Resolve a catalog entry to its URL on every mirror carrying the subject.
+
+    Args:
+        entry (PaperEntry): Catalog entry
+
+    Returns:
+        list: URLs in preference order (the first is the primary)
+    """
+    urls = []
+    for mirror, subject_path in SUBJECT_MIRRORS.get(entry.subject, ()):
+        url = URL_BUILDERS[mirror](MIRRORS[mirror], subject_path, entry)
+        if url:
+            urls.append(url)
+    return urls
+
+
+class LatencyTracker:
+    """Per-host time-to-first-byte history and hedging counters."""
+
+    def __init__(self, percentile=HEDGE_PERCENTILE):
+        """
+        Initialize the tracker.
+
+        Args:
+            percentile (float): Latency percentile that triggers a hedge
+        """
+        self.percentile = percentile
+        self._lock = threading.Lock()
+        self._samples = {}
+        self.counters = {'requests': 0, 'hedged': 0, 'backup_wins': 0, 'failovers': 0}
+        self.served = {}
+
+    def record(self, url, seconds):
+        """Add a time-to-first-byte sample for the URL's host."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._samples:
+                self._samples[host] = deque(maxlen=LATENCY_SAMPLES)
+            self._samples[host].append(seconds)
+
+    def latency(self, url):
+        """
+        Get the hedging percentile of a host's recent latency.
+
+        Args:
+            url (str): URL on the host
+
+        Returns:
+            float: Seconds, or None with fewer than MIN_SAMPLES samples
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(urlparse(url).netloc, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[int(self.percentile * (len(samples) - 1))]
+
+    def hedge_delay(self, url):
+        """Seconds to wait for a response from url before hedging."""
+        latency = self.latency(url)
+        return HEDGE_DEFAULT_DELAY if latency is None else max(HEDGE_MIN_DELAY, latency)
+
+    def may_hedge(self):
+        """Check the hedge budget, so a globally slow run does not double its load."""
+        with self._lock:
+            return self.counters['hedged'] <= HEDGE_BUDGET * self.counters['requests']
+
+    def count(self, counter):
+        """Increment a counter ('requests', 'hedged', 'backup_wins' or 'failovers')."""
+        with self._lock:
+            self.counters[counter] += 1
+
+    def count_served(self, url):
+        """Count a file served by url's host."""
+        host = urlparse(url).netloc
+        with self._lock:
+            self.served[host] = self.served.get(host, 0) + 1
+
+
+def get_latency_tracker():
+    """
+    Get the process-wide latency tracker.
+
+    Returns:
+        LatencyTracker: Shared tracker
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = LatencyTracker()
+        return _tracker
+
+
+def _get_pool():
+    """Shared thread pool for hedged requests."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS)
+        return _pool
+
+
+def open_hedged(session, candidates, headers, usable, url_headers=None):
+    """
+    GET the first usable response from a list of mirror URLs.
+
+    The primary URL is requested first. If it has not answered within the
+    host's hedge delay (counted from when the request was sent, not while it
+    waits for a rate-limiter slot) and the hedge budget allows, the next
+    mirror is requested too and whichever usable response arrives first
+    wins; the other is closed. Unusable responses and connection errors fail
+    over to the remaining mirrors.
+
+    Every request holds a slot of the shared rate limiter; the caller must
+    release the winner's slot (limiter.release(host)) after reading the body.
+
+    Args:
+        session (requests.Session): Session to use
+        candidates (list): Mirror URLs in preference order
+        headers (dict): Request headers sent to every mirror
+        usable (callable): usable(response) -> bool
+        url_headers (dict): URL -> extra headers sent to that mirror only
+            (validators such as If-None-Match or If-Range that it issued)
+
+    Returns:
+        tuple: (url, host, response) of the winner (all None if every mirror
+               failed) and a list of (url, response_or_exception) failures
+    """
+    limiter = get_limiter()
+    tracker = get_latency_tracker()
+    metrics = get_metrics()
+    pool = _get_pool()
+
+    sent = {}
+
+    def request(url):
+        queued = time.monotonic()
+        host = limiter.acquire(url)
+        start = sent[url] = time.monotonic()
+        try:
+            response = session.get(url, stream=True, headers={**headers, **(url_headers or {}).get(url, {})})
+        except Exception as e:
+            limiter.release(host)
+            metrics.record_error(url, request_error_kind(e))
+            raise
+        ttfb = time.monotonic() - start
+        tracker.record(url, ttfb)
+        metrics.record_response(url, response.status_code, ttfb, start - queued)
+        limiter.record(url, response.status_code,
+                       parse_retry_after(response.headers.get('Retry-After')))
+        return host, response
+
+    def discard(future):
+        try:
+            host, response = future.result()
+        except Exception:
+            return
+        response.close()
+        limiter.release(host)
+
+    queue = list(candidates)
+    pending = {}
+    failures = []
+    hedged = False
+
+    def launch():
+        url = queue.pop(0)
+        pending[pool.submit(request, url)] = url
+        return url
+
+    tracker.count('requests')
+    leader = launch()
+    while pending:
+        timeout = None
+        if queue and tracker.may_hedge():
+            timeout = HEDGE_MIN_DELAY
+            if leader in sent:
+                deadline = sent[leader] + tracker.hedge_delay(leader)
+                timeout = max(0.0, deadline - time.monotonic())
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            if leader in sent and time.monotonic() - sent[leader] >= tracker.hedge_delay(leader):
+                # Slow mirror: race it against the next one
+                hedged = True
+                tracker.count('hedged')
+                leader = launch()
+            continue
+
+        for future in done:
+            url = pending.pop(future)
+            try:
+                host, response = future.result()
+            except requests.exceptions.RequestException as e:
+                failures.append((url, e))
+                continue
+            if usable(response):
+                for other in pending:
+                    other.add_done_callback(discard)
+                if hedged and url != candidates[0]:
+                    tracker.count('backup_wins')
+                tracker.count_served(url)
+                return (url, host, response), failures
+            response.close()
+            limiter.release(host)
+            failures.append((url, response))
+
+        if not pending and queue:
+            tracker.count('failovers')
+            leader = launch()
+
+    return (None, None, None), failures
+
+
+def print_mirror_stats():
+    """Print per-host latency and hedging statistics for this process."""
+    tracker = get_latency_tracker()
+    for host, served in sorted(tracker.served.items()):
+        latency = tracker.latency(f"https://{host}/")
+        latency_text = f"{latency * 1000:.0f} ms" if latency is not None else "n/a"
+        print(f"Mirror:           {host}: {served} files served, "
+              f"p{int(tracker.percentile * 100)} TTFB {latency_text}")
+    counters = tracker.counters
+    if counters['hedged'] or counters['failovers']:
+        print(f"Hedging:          {counters['hedged']} hedged requests "
+              f"({counters['backup_wins']} won by backup), {counters['failovers']} failovers")
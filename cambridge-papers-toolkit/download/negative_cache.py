@@ -0,0 +1,170 @@
+"""
+Negative-Result Cache
+Remembers papers that do not exist upstream (404/410, HTML error pages)
+Skips them on later runs and refreshes expired entries with cheap HEAD probes
+"""
+
+import argparse
+import time
+
+import requests
+
+from http_session import get_session
+from json_store import JsonStore, utc_now
+from rate_limiter import get_limiter
+
+CACHE_NAME = ".negative_cache.json"
+MISSING_TTL = 7 * 24 * 3600  # seconds a 404/410 is trusted
+SOFT_MISS_TTL = 24 * 3600  # seconds an HTML-instead-of-PDF answer is trusted
+MISSING_STATUSES = (404, 410)
+
+# Lookup results
+FRESH = 'fresh'
+EXPIRED = 'expired'
+
+# Probe results
+STILL_MISSING = 'still missing'
+AVAILABLE = 'available'
+INCONCLUSIVE = 'inconclusive'
+
+
+class NegativeCache(JsonStore):
+    """Persisted URL -> {status, last_checked, ttl} map of known-missing papers."""
+
+    def __init__(self, root_directory, name=CACHE_NAME):
+        """
+        Load (or start) the cache stored in a download tree.
+
+        Args:
+            root_directory (str): Download root the cache belongs to
+            name (str): Cache file name inside the root
+        """
+        super().__init__(root_directory, name)
+
+    def lookup(self, url):
+        """
+        Check whether a URL is known to be missing.
+
+        Args:
+            url (str): Download URL
+
+        Returns:
+            str: FRESH, EXPIRED or None if the URL is not cached
+        """
+        with self._lock:
+            entry = self.entries.get(url)
+        if entry is None:
+            return None
+        age = time.time() - entry.get('checked_epoch', 0)
+        return FRESH if age < entry.get('ttl', MISSING_TTL) else EXPIRED
+
+    def record_missing(self, url, status, ttl=MISSING_TTL):
+        """
+        Remember that a URL does not exist upstream.
+
+        Args:
+            url (str): Download URL
+            status (int or str): HTTP status code or short reason (e.g. 'html')
+            ttl (int): Seconds before the entry must be re-probed
+        """
+        with self._lock:
+            self.entries[url] = {
+                'status': status,
+                'last_checked': utc_now(),
+                'checked_epoch': time.time(),
+                'ttl': ttl,
+            }
+            self._mark_dirty(url)
+
+    def forget(self, url):
+        """
+        Drop a URL from the cache (it exists again).
+
+        Args:
+            url (str): Download URL
+        """
+        with self._lock:
+            if self.entries.pop(url, None) is not None:
+                self._mark_dirty(url)
+
+    def probe(self, url, session=None):
+        """
+        Refresh an entry with a HEAD request.
+
+        Args:
+            url (str): Download URL
+            session (requests.Session): Session to use (default: shared session)
+
+        Returns:
+            str: STILL_MISSING, AVAILABLE, or INCONCLUSIVE when the probe
+                 failed or got no clear answer (the entry is left as is)
+        """
+        session = session or get_session()
+        limiter = get_limiter()
+        try:
+            with limiter.slot(url):
+                response = session.head(url, allow_redirects=True)
+            limiter.record(url, response.status_code)
+        except requests.exceptions.RequestException:
+            return INCONCLUSIVE
+
+        if response.status_code in MISSING_STATUSES:
+            self.record_missing(url, response.status_code)
+            return STILL_MISSING
+        content_type = response.headers.get('content-type', '').lower()
+        if response.status_code == 200 and content_type.startswith('text/html'):
+            self.record_missing(url, 'html', SOFT_MISS_TTL)
+            return STILL_MISSING
+        if response.status_code == 200:
+            self.forget(url)
+            return AVAILABLE
+        return INCONCLUSIVE
+
+    def refresh_expired(self, refresh_all=False):
+        """
+        Re-probe expired entries (or every entry).
+
+        Args:
+            refresh_all (bool): Probe fresh entries too
+
+        Returns:
+            dict: Counts of 'probed', 'still_missing', 'available' and
+                  'inconclusive' (entries kept for the next refresh)
+        """
+        with self._lock:
+            urls = list(self.entries)
+        counts = {'probed': 0, 'still_missing': 0, 'available': 0, 'inconclusive': 0}
+        for url in urls:
+            if not refresh_all and self.lookup(url) == FRESH:
+                continue
+            counts['probed'] += 1
+            result = self.probe(url)
+            if result == STILL_MISSING:
+                counts['still_missing'] += 1
+            elif result == AVAILABLE:
+                counts['available'] += 1
+                print(f"  ✓ Available again: {url}")
+            else:
+                counts['inconclusive'] += 1
+                print(f"  ⚠ Inconclusive, kept: {url}")
+        return counts
+
+
+def main():
+    """Probe expired negative-cache entries of one or more download roots."""
+    parser = argparse.ArgumentParser(description="Refresh the negative-result cache with HEAD probes")
+    parser.add_argument('roots', nargs='+', help="Download root folders (e.g. Cambridge_Past_Papers_0620)")
+    parser.add_argument('--all', action='store_true', help="Probe fresh entries as well")
+    args = parser.parse_args()
+
+    for root in args.roots:
+        cache = NegativeCache(root)
+        print(f"Refreshing {cache.path} ({len(cache.entries)} entries)...")
+        counts = cache.refresh_expired(refresh_all=args.all)
+        cache.save()
+        print(f"  Probed: {counts['probed']}, still missing: {counts['still_missing']}, "
+              f"available: {counts['available']}, inconclusive: {counts['inconclusive']}")
+
+
+if __name__ == '__main__':
+    main()
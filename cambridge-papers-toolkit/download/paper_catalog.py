@@ -0,0 +1,177 @@
+"""
+Paper Catalog
+Declarative description of which past papers exist for each subject
+Entries are generated lazily from rules (years, sessions, variants) plus exceptions
+"""
+
+from collections import namedtuple
+
+# Session codes used in CAIE file names (e.g. 0971_s25_qp_21.pdf)
+SESSION_CODES = {'March': 'm', 'June': 's', 'November': 'w'}
+SPECIMEN = 'Specimen'
+
+# Catalog rules per subject. Component settings override subject settings.
+#   doc_types         document types per component, in yield order
+#   sessions          (session, variants) pairs; no variants means one unversioned paper
+#   years             (first, last) inclusive; first > last enumerates newest first
+#   session_years     per-session year range overriding 'years'
+#   variant_overrides (session, year) -> variants for irregular sessions
+#   specimens         specimen paper years
+#   missing           doc_type (or '*') -> labels that were never published
+#   layout            folder layout of the download tree (see paper_path)
+CATALOGS = {
+    '0620': {
+        'title': "Cambridge IGCSE Chemistry",
+        'layout': 'doc_type',
+        'doc_types': ('QP', 'MS'),
+        'sessions': (('June', (1, 2, 3)), ('March', (2,)), ('November', (1, 2, 3))),
+        'years': (2010, 2024),
+        'session_years': {'March': (2015, 2024)},
+        'variant_overrides': {('June', 2015): (1,)},
+        'specimens': (2016, 2020, 2023),
+        'components': {
+            'Paper-2': {
+                'missing': {
+                    '*': ('June 2011 (v3)', 'June 2019 (v2)'),
+                    'QP': ('June 2013 (v2)',),
+                    'MS': ('June 2010 (v3)', 'June 2020 (v3)'),
+                },
+            },
+            'Paper-4': {
+                'years': (2016, 2024),
+                'session_years': {'March': (2016, 2024)},
+                'missing': {'*': ('June 2016 (v3)', 'June 2018 (v2)')},
+            },
+            'Paper-6': {
+                'variant_overrides': {('June', 2015): (1,), ('June', 2018): ()},
+            },
+        },
+    },
+    '0971': {
+        'title': "Cambridge IGCSE Computer Science",
+        'layout': 'session',
+        'doc_types': ('MS', 'QP'),
+        'sessions': (('June', ()), ('November', ())),
+        'years': (2025, 2018),
+        'session_years': {'November': (2024, 2018)},  # November 2025 not yet available
+        'components': {'21': {}, '22': {}, '41': {}, '42': {}, '61': {}, '62': {}},
+    },
+}
+
+
+class PaperEntry(namedtuple('PaperEntry', 'subject component doc_type session year variant')):
+    """One paper of the catalog (year and variant are ints, variant may be None)."""
+
+    __slots__ = ()
+
+    @property
+    def label(self):
+        """Human-readable name, e.g. 'June 2010 (v1)' or 'Specimen 2016'."""
+        label = f"{self.session} {self.year}"
+        if self.variant is not None:
+            label += f" (v{self.variant})"
+        return label
+
+    def to_dict(self):
+        """Plain dict of the entry (for JSON export)."""
+        record = self._asdict()
+        record['label'] = self.label
+        return record
+
+
+def caie_filename(entry):
+    """
+    Build the CAIE-style file name of a paper.
+
+    Args:
+        entry (PaperEntry): Catalog entry
+
+    Returns:
+        str: e.g. '0971_s25_qp_21.pdf'
+    """
+    session_code = SESSION_CODES[entry.session]
+    return (f"{entry.subject}_{session_code}{entry.year % 100:02d}_"
+            f"{entry.doc_type.lower()}_{entry.component}.pdf")
+
+
+def paper_path(entry):
+    """
+    Get where a paper is stored inside its subject's download folder.
+
+    Layouts:
+        'session':  <year>/<session>/<CAIE file name>, e.g. 2025/June/0971_s25_qp_21.pdf
+        'doc_type': <year>/<session>/<doc_type>/<label file name>,
+                    e.g. 2024/June/QP/June_2024_v1_P2_QP.pdf
+
+    Args:
+        entry (PaperEntry): Catalog entry
+
+    Returns:
+        str: Relative path with '/' separators
+    """
+    folder = f"{entry.year}/{entry.session}"
+    if CATALOGS[entry.subject].get('layout') == 'doc_type':
+        paper = entry.component.replace('Paper-', 'P')
+        version = f"_v{entry.variant}" if entry.variant else ""
+        filename = f"{entry.session}_{entry.year}{version}_{paper}_{entry.doc_type}.pdf"
+        return f"{folder}/{entry.doc_type}/{filename}"
+    return f"{folder}/{caie_filename(entry)}"
+
+
+def _year_range(first, last):
+    """Inclusive year range in the direction given by (first, last)."""
+    step = 1 if last >= first else -1
+    return range(first, last + step, step)
+
+
+def _iter_component(subject, component, rules):
+    """Yield the entries of one component from its merged rules."""
+    missing = rules.get('missing', {})
+    overrides = rules.get('variant_overrides', {})
+    session_years = rules.get('session_years', {})
+
+    for doc_type in rules['doc_types']:
+        skip = set(missing.get('*', ())) | set(missing.get(doc_type, ()))
+        for session, variants in rules['sessions']:
+            for year in _year_range(*session_years.get(session, rules['years'])):
+                for variant in overrides.get((session, year), variants) or (None,):
+                    entry = PaperEntry(subject, component, doc_type, session, year, variant)
+                    if entry.label not in skip:
+                        yield entry
+        for year in rules.get('specimens', ()):
+            yield PaperEntry(subject, component, doc_type, SPECIMEN, year, None)
+
+
+def iter_papers(subject, components=None):
+    """
+    Lazily enumerate every paper of a subject.
+
+    Args:
+        subject (str): Subject code (key of CATALOGS)
+        components (list): Restrict to these components (default: all)
+
+    Yields:
+        PaperEntry: One entry per paper, ordered by component, type, session and year
+    """
+    catalog = CATALOGS[subject]
+    base_rules = {key: value for key, value in catalog.items() if key != 'components'}
+    for component, component_rules in catalog['components'].items():
+        if components and component not in components:
+            continue
+        rules = dict(base_rules)
+        rules.update(component_rules)
+        yield from _iter_component(subject, component, rules)
+
+
+def count_papers(subject, components=None):
+    """
+    Count the papers of a subject without storing them.
+
+    Args:
+        subject (str): Subject code (key of CATALOGS)
+        components (list): Restrict to these components (default: all)
+
+    Returns:
+        int: Number of catalog entries
+    """
+    return sum(1 for _ in iter_papers(subject, components))
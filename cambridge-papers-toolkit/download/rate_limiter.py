@@ -0,0 +1,239 @@
+"""
+Adaptive Per-Host Rate Limiter
+Keeps concurrent downloads polite towards each source host
+Token bucket per host whose rate grows additively on success and halves on 429/503
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Default configuration
+DEFAULT_INTERVAL = 0.5  # seconds between requests before any feedback
+MAX_CONCURRENT = 4  # requests in flight per host
+MAX_RATE = 8.0  # requests per second ceiling per host
+MIN_RATE = 0.05  # requests per second floor per host
+BURST = 2.0  # tokens a host may accumulate while idle
+INCREASE_STEP = 0.1  # requests per second added after each success
+DECREASE_FACTOR = 0.5  # rate multiplier after a throttling response
+MAX_RETRY_AFTER = 300  # seconds; longer Retry-After values are clamped
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_CAP = 60.0  # seconds
+THROTTLE_STATUSES = (429, 503)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta-seconds or HTTP-date).
+
+    Args:
+        value (str): Header value
+
+    Returns:
+        float: Seconds to wait, or None if absent/unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt (int): Zero-based retry number
+
+    Returns:
+        float: Seconds to sleep
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class _HostBucket:
+    """Token bucket and concurrency slot for one host."""
+
+    def __init__(self, rate, max_concurrent):
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.requests = 0
+        self.throttled = 0
+
+    def refill(self, now):
+        """Add the tokens earned since the last update."""
+        self.tokens = min(BURST, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class AdaptiveRateLimiter:
+    """Per-host AIMD token-bucket limiter shared by all download workers."""
+
+    def __init__(self, min_interval=DEFAULT_INTERVAL, max_concurrent=MAX_CONCURRENT,
+                 max_rate=MAX_RATE):
+        """
+        Initialize the limiter.
+
+        Args:
+            min_interval (float): Starting seconds between requests on one host
+            max_concurrent (int): Maximum requests in flight per host
+            max_rate (float): Ceiling in requests per second per host
+        """
+        self.initial_rate = min(1.0 / min_interval, max_rate) if min_interval > 0 else max_rate
+        self.max_concurrent = max_concurrent
+        self.max_rate = max_rate
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def _bucket(self, host):
+        """Get (or lazily create) the bucket for a host. Caller holds the lock."""
+        if host not in self._buckets:
+            self._buckets[host] = _HostBucket(self.initial_rate, self.max_concurrent)
+        return self._buckets[host]
+
+    def acquire(self, url):
+        """
+        Block until a request to the URL's host is allowed to start.
+
+        Args:
+            url (str): URL about to be requested
+
+        Returns:
+            str: Host name (pass back to release())
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+        bucket.slots.acquire()
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                bucket.refill(now)
+                if now < bucket.blocked_until:
+                    wait = bucket.blocked_until - now
+                elif bucket.tokens >= 1.0:
+                    bucket.tokens -= 1.0
+                    bucket.requests += 1
+                    return host
+                else:
+                    wait = (1.0 - bucket.tokens) / bucket.rate
+            time.sleep(wait)
+
+    def release(self, host):
+        """
+        Free the host slot taken by acquire().
+
+        Args:
+            host (str): Host name returned by acquire()
+        """
+        with self._lock:
+            bucket = self._buckets[host]
+        bucket.slots.release()
+
+    @contextmanager
+    def slot(self, url):
+        """
+        Context manager wrapping acquire()/release() for one request.
+
+        Args:
+            url (str): URL about to be requested
+        """
+        host = self.acquire(url)
+        try:
+            yield host
+        finally:
+            self.release(host)
+
+    def record(self, url, status_code, retry_after=None):
+        """
+        Adjust the host's rate from a response.
+
+        Successes raise the rate additively and 429/503 halve it. An error
+        response carrying Retry-After pauses the whole host for that long.
+
+        Args:
+            url (str): URL that was requested
+            status_code (int): HTTP status code
+            retry_after (float): Parsed Retry-After seconds (optional)
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            if status_code in THROTTLE_STATUSES:
+                bucket.throttled += 1
+                bucket.rate = max(MIN_RATE, bucket.rate * DECREASE_FACTOR)
+                bucket.tokens = min(bucket.tokens, 0.0)
+            elif status_code < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + INCREASE_STEP)
+            if retry_after and status_code >= 400:
+                bucket.blocked_until = max(bucket.blocked_until,
+                                           time.monotonic() + retry_after)
+
+    def host_stats(self):
+        """
+        Get the current rate and counters per host.
+
+        Returns:
+            dict: host -> {'rate', 'requests', 'throttled'}
+        """
+        with self._lock:
+            return {host: {'rate': bucket.rate,
+                           'requests': bucket.requests,
+                           'throttled': bucket.throttled}
+                    for host, bucket in self._buckets.items()}
+
+
+def configure_limiter(min_interval=DEFAULT_INTERVAL, max_concurrent=MAX_CONCURRENT,
+                      max_rate=None):
+    """
+    Replace the process-wide limiter with a freshly configured one.
+
+    Args:
+        min_interval (float): Starting seconds between requests on one host
+        max_concurrent (int): Maximum requests in flight per host
+        max_rate (float): Ceiling in requests per second per host (default: MAX_RATE
+            at call time, so benchmarks can raise it)
+
+    Returns:
+        AdaptiveRateLimiter: The new shared limiter
+    """
+    global _limiter
+    with _limiter_lock:
+        _limiter = AdaptiveRateLimiter(min_interval, max_concurrent,
+                                       MAX_RATE if max_rate is None else max_rate)
+        return _limiter
+
+
+def get_limiter():
+    """
+    Get the process-wide limiter, creating it with defaults on first use.
+
+    Returns:
+        AdaptiveRateLimiter: Shared limiter
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveRateLimiter()
+        return _limiter
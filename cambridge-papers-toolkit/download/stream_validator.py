@@ -0,0 +1,74 @@
+"""
+Streaming PDF Validator
+Checks a PDF while its bytes arrive instead of re-reading the file afterwards
+Sniffs the header on the first chunk and verifies length and trailer at the end
+"""
+
+MIN_PDF_SIZE = 1024  # bytes
+TAIL_SIZE = 2048  # bytes kept for the trailer check
+HTML_MARKERS = (b'<!doctype', b'<html', b'<head', b'<?xml')
+
+
+class PdfStreamError(Exception):
+    """The streamed bytes are not an acceptable PDF."""
+
+
+class HtmlPageError(PdfStreamError):
+    """The server answered with an HTML page (usually a soft 404)."""
+
+
+class PdfStreamValidator:
+    """Incremental PDF sanity checks fed chunk by chunk."""
+
+    def __init__(self):
+        self.size = 0
+        self.head = b''
+        self.tail = b''
+        self.header_checked = False
+
+    def feed(self, chunk):
+        """
+        Validate the next chunk of the file.
+
+        Args:
+            chunk (bytes): Next bytes of the file, in order
+
+        Raises:
+            PdfStreamError: As soon as the header shows the body is not a PDF
+        """
+        if not self.header_checked:
+            self.head = (self.head + chunk)[:64]
+            if len(self.head) >= 5:
+                self._check_header()
+        self.size += len(chunk)
+        self.tail = (self.tail + chunk)[-TAIL_SIZE:]
+
+    def _check_header(self):
+        """Reject HTML error pages and anything without a %PDF- header."""
+        if self.head.startswith(b'%PDF-'):
+            self.header_checked = True
+            return
+        if self.head.lstrip().lower().startswith(HTML_MARKERS):
+            raise HtmlPageError("HTML page instead of PDF")
+        raise PdfStreamError("Invalid PDF header")
+
+    def finish(self, expected_size=None):
+        """
+        Run the end-of-stream checks.
+
+        Args:
+            expected_size (int): Total size announced by the server (optional)
+
+        Raises:
+            PdfStreamError: If the file is incomplete or lacks a PDF trailer
+        """
+        if not self.header_checked:
+            self._check_header()
+        if expected_size is not None and self.size != expected_size:
+            raise PdfStreamError(f"Size mismatch: got {self.size} of {expected_size} bytes")
+        if self.size < MIN_PDF_SIZE:
+            raise PdfStreamError(f"File too small: {self.size} bytes")
+        if b'%%EOF' not in self.tail:
+            raise PdfStreamError("Missing %%EOF marker")
+        if b'startxref' not in self.tail:
+            raise PdfStreamError("Missing startxref")
@@ -1,103 +1,261 @@
-"""
-Cambridge Past Papers URL Generator
-Generates complete URL lists for batch operations
-Exports to CSV for external download managers or audit trails
-"""
-
-import csv
-from datetime import datetime
-
-# Configuration
-BASE_URL = "https://pastpapers.papacambridge.com/download_file.php?files=https://pastpapers.papacambridge.com/directories/CAIE/CAIE-pastpapers/upload/"
-SUBJECT = "0971"
-PAPERS = ["21", "22", "41", "42", "61", "62"]
-OUTPUT_CSV = 'cambridge_past_papers_urls.csv'
-
-
-def generate_urls():
-    """
-    Generate all download URLs for papers from 2025 back to 2018.
-    
-    Returns:
-        list: Complete list of generated URLs
-    """
-    urls = []
-    
-    for year in range(25, 17, -1):
-        # Spring season (June)
-        filename_ms = f"{SUBJECT}_s{year:02d}_ms"
-        filename_qp = f"{SUBJECT}_s{year:02d}_qp"
-        
-        for paper in PAPERS:
-            urls.append(BASE_URL + filename_ms + "_" + paper + ".pdf")
-            urls.append(BASE_URL + filename_qp + "_" + paper + ".pdf")
-        
-        # Winter season (November) - skip year 25 if recent
-        if year < 25:
-            filename_ms = f"{SUBJECT}_w{year:02d}_ms"
-            filename_qp = f"{SUBJECT}_w{year:02d}_qp"
-            
-            for paper in PAPERS:
-                urls.append(BASE_URL + filename_ms + "_" + paper + ".pdf")
-                urls.append(BASE_URL + filename_qp + "_" + paper + ".pdf")
-    
-    return urls
-
-
-def save_to_csv(urls, filename):
-    """
-    Save URLs to CSV file.
-    
-    Args:
-        urls (list): List of URLs to save
-        filename (str): Output CSV filename
-    """
-    with open(filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['URL'])
-        for url in urls:
-            writer.writerow([url])
-
-
-def print_urls(urls):
-    """
-    Print all URLs to console.
-    
-    Args:
-        urls (list): List of URLs to print
-    """
-    print(f"Total URLs generated: {len(urls)}\n")
-    print("=" * 80)
-    for i, url in enumerate(urls, 1):
-        print(f"{i:4d}. {url}")
-    print("=" * 80)
-
-
-def main():
-    """Main execution function."""
-    print("=" * 80)
-    print("Cambridge Past Papers URL Generator")
-    print(f"Subject: {SUBJECT}")
-    print("=" * 80)
-    print()
-    
-    # Generate URLs
-    urls = generate_urls()
-    
-    # Print to console
-    print_urls(urls)
-    
-    # Save to CSV
-    save_to_csv(urls, OUTPUT_CSV)
-    print(f"\n✓ URLs saved to '{OUTPUT_CSV}'")
-    
-    # Print statistics
-    print("\nStatistics:")
-    print(f"  Total URLs:     {len(urls)}")
-    print(f"  Mark Schemes:   {len([u for u in urls if '_ms_' in u])}")
-    print(f"  Question Papers: {len([u for u in urls if '_qp_' in u])}")
-    print(f"  Output file:    {OUTPUT_CSV}")
-
-
-if __name__ == '__main__':
-    main()
\ No newline at end of file
+"""
+Cambridge Past Papers URL Generator
+Generates complete URL lists for batch operations and external download managers
+Streams CSV, JSONL, aria2c and wget input files, optionally sharded into balanced parts
+"""
+
+import argparse
+import csv
+import json
+import shlex
+from pathlib import Path
+
+from download_manifest import DownloadManifest, MANIFEST_NAME
+from mirrors import candidate_urls
+from paper_catalog import iter_papers, count_papers, paper_path
+
+# Configuration
+SUBJECT = "0971"  # papers and sessions are defined in paper_catalog.CATALOGS
+OUTPUT_BASE = 'cambridge_past_papers_urls'  # shards become <base>-01-of-04.<ext>
+FORMATS = ('csv', 'jsonl')  # any of EXPORT_FORMATS
+SHARDS = 1
+CONTENT_TYPE = 'application/pdf'
+AVERAGE_SIZE = 500 * 1024  # bytes assumed for papers the manifest has no size for
+
+# Export formats and their file extensions
+EXPORT_FORMATS = {
+    'csv': '.csv',  # URL, destination, type and checksum columns
+    'jsonl': '.jsonl',  # full catalog record per line
+    'aria2': '.aria2.txt',  # aria2c --input-file (mirrors, dir/out, checksum)
+    'wget': '.wget.sh',  # shell script of wget calls falling back across mirrors
+}
+
+
+def download_root(subject):
+    """Default download folder of a subject (as used by the downloader scripts)."""
+    return f"Cambridge_Past_Papers_{subject}"
+
+
+def generate_urls(subject=SUBJECT):
+    """
+    Lazily generate the download URLs of every catalog paper of a subject.
+
+    Args:
+        subject (str): Subject code in the paper catalog
+
+    Yields:
+        tuple: (entry: PaperEntry, urls: list of mirror URLs, primary first)
+    """
+    for entry in iter_papers(subject):
+        urls = candidate_urls(entry)
+        if urls:
+            yield entry, urls
+
+
+def iter_records(rows, root_directory, manifest=None):
+    """
+    Turn (entry, urls) rows into export records.
+
+    Args:
+        rows (iterable): (entry, urls) tuples, e.g. from generate_urls()
+        root_directory (str): Download folder the destinations are relative to
+        manifest (DownloadManifest): Source of known sizes and checksums (optional)
+
+    Yields:
+        dict: Catalog record plus 'url', 'mirrors', 'source', 'dest',
+              'content_type', 'sha256' and 'size' (None when unknown).
+              'source' is the mirror that served the recorded sha256 (the
+              primary URL when the manifest does not know); mirrors do not
+              serve byte-identical files, so the checksum only holds for it
+    """
+    for entry, urls in rows:
+        known = manifest.get(urls[0]) if manifest else None
+        source = known.get('source') if known else None
+        record = entry.to_dict()
+        record['url'] = urls[0]
+        record['mirrors'] = urls
+        record['source'] = source if source in urls else urls[0]
+        record['dest'] = f"{root_directory}/{paper_path(entry)}"
+        record['content_type'] = CONTENT_TYPE
+        record['sha256'] = known.get('sha256') if known else None
+        record['size'] = known.get('size') if known else None
+        yield record
+
+
+def _aria2_lines(record):
+    """
+    aria2c input-file entry: the source URL, then indented options.
+
+    Only one URL is given: aria2 splits segments of a file across all the
+    URIs of an entry, and the mirrors' copies are not byte-identical.
+    """
+    directory, _, filename = record['dest'].rpartition('/')
+    lines = [record['source'], f"  dir={directory}", f"  out={filename}"]
+    if record['sha256']:
+        lines.append(f"  checksum=sha-256={record['sha256']}")
+    return '\n'.join(lines) + '\n'
+
+
+def _wget_lines(record):
+    """
+    Shell lines fetching one paper with wget, trying each mirror in turn.
+
+    The source mirror goes first. Every attempt starts from an empty file
+    (no -c): a partial file from one mirror must not be continued from
+    another. A file failing its checksum is removed.
+    """
+    dest = shlex.quote(record['dest'])
+    directory = shlex.quote(record['dest'].rpartition('/')[0])
+    urls = [record['source']] + [url for url in record['mirrors'] if url != record['source']]
+    fetch = ' || '.join(f"{{ rm -f {dest}; wget -q -O {dest} {shlex.quote(url)}; }}" for url in urls)
+    failed = f"{{ rm -f {dest}; echo {shlex.quote('failed: ' + record['url'])} >&2; }}"
+    line = f"mkdir -p {directory} && {{ {fetch} || {failed}; }}"
+    if record['sha256']:
+        mismatch = f"{{ rm -f {dest}; echo {shlex.quote('checksum mismatch: ' + record['dest'])} >&2; }}"
+        line += (f"\n[ ! -f {dest} ] || echo {shlex.quote(record['sha256'] + '  ' + record['dest'])}"
+                 f" | sha256sum -c --quiet - || {mismatch}")
+    return line + '\n'
+
+
+class ShardedExporter:
+    """Streams export records into N balanced shards of every requested format."""
+
+    def __init__(self, output_base, formats=FORMATS, shards=SHARDS):
+        """
+        Open the output files.
+
+        Args:
+            output_base (str): Path prefix of the output files
+            formats (tuple): Keys of EXPORT_FORMATS
+            shards (int): Number of parts to split the list into
+        """
+        self.formats = tuple(formats)
+        self.shards = max(1, shards)
+        self.paths = []
+        self.loads = [0] * self.shards
+        self.counts = [0] * self.shards
+        self._files = []
+        self._csv_writers = []
+        for index in range(self.shards):
+            suffix = f"-{index + 1:02d}-of-{self.shards:02d}" if self.shards > 1 else ""
+            files = {}
+            for fmt in self.formats:
+                path = Path(f"{output_base}{suffix}{EXPORT_FORMATS[fmt]}")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                files[fmt] = open(path, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None)
+                self.paths.append(path)
+            self._files.append(files)
+            writer = None
+            if 'csv' in files:
+                writer = csv.writer(files['csv'])
+                writer.writerow(['URL', 'Destination', 'Type', 'SHA256'])
+            self._csv_writers.append(writer)
+            if 'wget' in files:
+                files['wget'].write("#!/bin/sh\n# Generated by url_generator.py\n")
+
+    def write(self, record):
+        """
+        Append a record to the least loaded shard.
+
+        Shards are balanced by expected bytes (the manifest size, or
+        AVERAGE_SIZE when unknown), so parts take similar download time.
+
+        Args:
+            record (dict): Record from iter_records()
+        """
+        shard = self.loads.index(min(self.loads))
+        self.loads[shard] += record['size'] or AVERAGE_SIZE
+        self.counts[shard] += 1
+        files = self._files[shard]
+        if 'csv' in files:
+            self._csv_writers[shard].writerow(
+                [record['url'], record['dest'], record['content_type'], record['sha256'] or ''])
+        if 'jsonl' in files:
+            files['jsonl'].write(json.dumps(record) + '\n')
+        if 'aria2' in files:
+            files['aria2'].write(_aria2_lines(record))
+        if 'wget' in files:
+            files['wget'].write(_wget_lines(record))
+
+    def close(self):
+        """Close every output file."""
+        for files in self._files:
+            for f in files.values():
+                f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_urls(records, output_base, formats=FORMATS, shards=SHARDS, echo=False):
+    """
+    Stream records into every requested format in one pass.
+
+    Args:
+        records (iterable): Records from iter_records()
+        output_base (str): Path prefix of the output files
+        formats (tuple): Keys of EXPORT_FORMATS
+        shards (int): Number of balanced parts
+        echo (bool): Also print every URL to the console (slow for large lists)
+
+    Returns:
+        tuple: (counts: dict of 'total' and per document type, exporter: ShardedExporter)
+    """
+    counts = {'total': 0}
+    with ShardedExporter(output_base, formats, shards) as exporter:
+        for record in records:
+            counts['total'] += 1
+            counts[record['doc_type']] = counts.get(record['doc_type'], 0) + 1
+            exporter.write(record)
+            if echo:
+                print(f"{counts['total']:4d}. {record['url']}")
+    return counts, exporter
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Export paper URLs for external download managers")
+    parser.add_argument('--subject', default=SUBJECT, help=f"Catalog subject (default: {SUBJECT})")
+    parser.add_argument('--format', dest='formats', action='append', choices=sorted(EXPORT_FORMATS),
+                        help=f"Output format, repeatable (default: {', '.join(FORMATS)})")
+    parser.add_argument('--shards', type=int, default=SHARDS, help="Split into N balanced files")
+    parser.add_argument('--output', default=OUTPUT_BASE, help="Output path prefix")
+    parser.add_argument('--root', help="Download folder for destinations and checksums "
+                                       "(default: Cambridge_Past_Papers_<subject>)")
+    parser.add_argument('--echo', action='store_true', help="Print every URL to the console")
+    args = parser.parse_args()
+
+    root = args.root or download_root(args.subject)
+    manifest = DownloadManifest(root) if (Path(root) / MANIFEST_NAME).exists() else None
+
+    print("=" * 80)
+    print("Cambridge Past Papers URL Generator")
+    print(f"Subject: {args.subject}")
+    print("=" * 80)
+    print()
+    print(f"Total URLs to generate: {count_papers(args.subject)}")
+    if manifest:
+        print(f"Checksums from: {manifest.path}")
+    print()
+
+    records = iter_records(generate_urls(args.subject), root, manifest)
+    counts, exporter = export_urls(records, args.output, args.formats or FORMATS, args.shards, args.echo)
+
+    print(f"✓ Wrote {len(exporter.paths)} files:")
+    for path in exporter.paths:
+        print(f"  {path}")
+    if exporter.shards > 1:
+        print(f"  Papers per shard: {', '.join(str(count) for count in exporter.counts)}")
+
+    # Print statistics
+    print("\nStatistics:")
+    print(f"  Total URLs:     {counts['total']}")
+    print(f"  Mark Schemes:   {counts.get('MS', 0)}")
+    print(f"  Question Papers: {counts.get('QP', 0)}")
+
+
+if __name__ == '__main__':
+    main()
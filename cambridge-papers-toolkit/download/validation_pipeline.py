@@ -0,0 +1,158 @@
+"""
+Validate-While-Downloading Pipeline
+Hands every finished download to a pool of validation processes while fetching continues
+Runs the health check, quarantines damaged files into DAMAGED_FILES and optionally repairs them
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from fetcher import DOWNLOADED
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from validation.health_checker import check_pdf, move_to_damage
+
+# Default configuration
+VALIDATION_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # leave a core for the network side
+
+# Verdicts
+HEALTHY = 'healthy'
+REPAIRED = 'repaired'
+DAMAGED = 'damaged'
+
+
+def validate_landed_file(file_path, root_directory, repair=False):
+    """
+    Health-check one downloaded file and deal with it if it is damaged.
+
+    Runs in a validation process. Damaged files are repaired when asked
+    (the PDF cleaner moves unrepairable ones to PDF_Errors) and quarantined
+    into the tree's DAMAGED_FILES folder otherwise, or when the cleaner
+    left the file where it was. The manifest no longer
+    finds them on disk, so the next run downloads them again.
+
+    Args:
+        file_path (str): Freshly downloaded PDF
+        root_directory (str): Download root the file belongs to
+        repair (bool): Try the PDF cleaner before quarantining
+
+    Returns:
+        tuple: (verdict: str, reason: str, moved_to: str or None)
+    """
+    is_valid, reason = check_pdf(file_path)
+    if is_valid:
+        return HEALTHY, reason, None
+
+    if repair:
+        from validation.pdf_cleaner import PDFCleaner, REWRITTEN
+        # The health check already found damage: rewrite even if the cleaner's pre-check passes
+        cleaner = PDFCleaner(root_directory, selective=False)
+        _, action, _ = cleaner.clean_pdf(Path(file_path))
+        if action == REWRITTEN:
+            return REPAIRED, reason, None
+        if cleaner.last_moved_to:
+            return DAMAGED, reason, str(cleaner.last_moved_to)
+        if not os.path.exists(file_path):
+            return DAMAGED, reason, None
+        # The cleaner gave up without moving it (e.g. the backup failed): quarantine it here
+
+    moved, destination = move_to_damage(file_path, reason, root_directory)
+    return DAMAGED, reason, destination if moved else None
+
+
+class ValidationPipeline:
+    """Process pool consuming completed downloads while the network side keeps fetching."""
+
+    def __init__(self, root_directory, workers=VALIDATION_WORKERS, repair=False, catalog=None):
+        """
+        Start the validation processes.
+
+        Create the pipeline under the script's `if __name__ == '__main__'`
+        guard (validation processes re-import the main module on Windows).
+
+        Args:
+            root_directory (str): Download root the files belong to
+            workers (int): Number of validation processes
+            repair (bool): Try to repair damaged files before quarantining
+            catalog (CatalogDB): Shared paper catalog to record verdicts in (optional)
+        """
+        self.root_dir = Path(root_directory)
+        self.repair = repair
+        self.catalog = catalog
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self.stats = {'validated': 0, HEALTHY: 0, REPAIRED: 0, DAMAGED: 0, 'errors': 0}
+
+    def submit(self, file_path):
+        """
+        Queue a finished download for validation.
+
+        Args:
+            file_path (Path): File that has just been written
+        """
+        future = self._pool.submit(validate_landed_file, str(file_path), str(self.root_dir), self.repair)
+        future.add_done_callback(lambda f: self._collect(file_path, f))
+
+    def _collect(self, file_path, future):
+        """Count and report one validation result."""
+        name = os.path.basename(file_path)
+        try:
+            verdict, reason, moved_to = future.result()
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            print(f"  ✗ Validation error: {name} ({e})")
+            return
+
+        with self._lock:
+            self.stats['validated'] += 1
+            self.stats[verdict] += 1
+        if self.catalog:
+            self.catalog.record_check(file_path, verdict != DAMAGED,
+                                      f"Repaired ({reason})" if verdict == REPAIRED else reason)
+        if verdict == REPAIRED:
+            print(f"  ✓ Repaired: {name} ({reason})")
+        elif verdict == DAMAGED:
+            where = f", moved to {os.path.relpath(moved_to, self.root_dir)}" if moved_to else ""
+            print(f"  ✗ Damaged: {name} ({reason}{where})")
+
+    def wrap(self, download_func):
+        """
+        Wrap a download function so new downloads are validated as they land.
+
+        Unchanged files were validated when they were downloaded and are not
+        queued again.
+
+        Args:
+            download_func (callable): download_func(urls, dest_path) -> (status, bytes)
+
+        Returns:
+            callable: Function with the same signature and result
+        """
+        def run(urls, dest_path):
+            status, nbytes = download_func(urls, dest_path)
+            if status == DOWNLOADED:
+                self.submit(dest_path)
+            return status, nbytes
+
+        return run
+
+    def close(self):
+        """
+        Wait for the validations still queued and stop the processes.
+
+        Returns:
+            dict: Counts of 'validated', 'healthy', 'repaired', 'damaged' and 'errors'
+        """
+        self._pool.shutdown(wait=True)
+        return self.stats
+
+
+def print_validation_stats(stats):
+    """Print a one-line summary of a pipeline's results."""
+    print(f"Validated:        {stats['validated']} ({stats[HEALTHY]} healthy, "
+          f"{stats[REPAIRED]} repaired, {stats[DAMAGED]} damaged"
+          + (f", {stats['errors']} errors" if stats['errors'] else "") + ")")
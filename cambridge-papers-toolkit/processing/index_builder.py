@@ -1,383 +1,459 @@
-"""
-PDF Index Builder and Merger
-Builds comprehensive indices for all papers and merges them using Ghostscript
-Generates index files with exam labels and page mappings
-"""
-
-import os
-import subprocess
-from pathlib import Path
-import PyPDF2
-
-# Configuration
-PARENT_FOLDER = "Cambridge_Past_Papers_0620"
-SPECIMEN_FOLDER = os.path.join(PARENT_FOLDER, "Specimen")
-RELEASE_FOLDER = "Release"
-
-PAPER_GROUPS = {
-    "2": ["21", "22", "23"],
-    "4": ["41", "42", "43"],
-    "6": ["61", "62", "63"],
-}
-
-EXAM_MAPPINGS = {
-    "June": "June",
-    "March": "March",
-    "November": "Nov."
-}
-
-
-def setup_release_folder():
-    """Create Release folder structure."""
-    Path(RELEASE_FOLDER).mkdir(exist_ok=True)
-    
-    for paper in ["2", "4", "6"]:
-        for doc_type in ["MS", "QP"]:
-            folder_path = os.path.join(RELEASE_FOLDER, f"Paper_{paper}", doc_type)
-            Path(folder_path).mkdir(parents=True, exist_ok=True)
-    
-    print(f"✓ Release folder structure created\n")
-
-
-def find_ghostscript():
-    """
-    Find Ghostscript executable.
-    
-    Returns:
-        str: Path to Ghostscript executable or None
-    """
-    gs_paths = [
-        'gs',
-        'gswin64c.exe',
-        'gswin32c.exe',
-        r'C:\Program Files\gs\gs10.01.2\bin\gswin64c.exe',
-        r'C:\Program Files (x86)\gs\gs10.01.2\bin\gswin32c.exe',
-    ]
-    
-    for gs_path in gs_paths:
-        try:
-            result = subprocess.run([gs_path, '--version'], capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                print(f"✓ Ghostscript found: {result.stdout.strip()}\n")
-                return gs_path
-        except:
-            pass
-    
-    return None
-
-
-def check_pdf_integrity(file_path):
-    """
-    Check if PDF is valid.
-    
-    Args:
-        file_path (str): Path to PDF file
-        
-    Returns:
-        tuple: (is_valid: bool, message: str)
-    """
-    try:
-        with open(file_path, 'rb') as f:
-            f.seek(0, 2)
-            file_size = f.tell()
-            if file_size < 1000:
-                return False, "File too small"
-            
-            f.seek(0)
-            pdf_reader = PyPDF2.PdfReader(f)
-            num_pages = len(pdf_reader.pages)
-            if num_pages == 0:
-                return False, "No pages"
-            
-            try:
-                _ = pdf_reader.pages[0]
-            except:
-                return False, "Cannot read pages"
-            
-            return True, f"OK ({num_pages} pages)"
-    except Exception as e:
-        return False, str(e)[:40]
-
-
-def get_pdf_page_count(file_path):
-    """
-    Get page count.
-    
-    Args:
-        file_path (str): Path to PDF file
-        
-    Returns:
-        int: Number of pages
-    """
-    try:
-        with open(file_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            return len(pdf_reader.pages)
-    except:
-        return 0
-
-
-def get_specimen_file(paper_num, doc_type):
-    """
-    Get specimen file.
-    
-    Args:
-        paper_num (str): Paper number
-        doc_type (str): Document type (MS/QP)
-        
-    Returns:
-        str: Path to specimen file or None
-    """
-    folder_path = os.path.join(SPECIMEN_FOLDER, doc_type)
-    if not os.path.exists(folder_path):
-        return None
-    
-    files = os.listdir(folder_path)
-    for file in files:
-        if f"paper-{paper_num}" in file.lower():
-            return os.path.join(folder_path, file)
-    return None
-
-
-def build_index_for_paper(paper, doc_type):
-    """
-    Build index for a specific paper and document type.
-    
-    Args:
-        paper (str): Paper number
-        doc_type (str): Document type (MS/QP)
-        
-    Returns:
-        tuple: (index_data, valid_files, invalid_files)
-    """
-    index_data = []
-    valid_files = []
-    invalid_files = []
-    
-    specimen_file = get_specimen_file(paper, doc_type)
-    if specimen_file:
-        is_valid, msg = check_pdf_integrity(specimen_file)
-        if is_valid:
-            page_count = get_pdf_page_count(specimen_file)
-            if page_count > 0:
-                index_data.append({
-                    'year': 2000,
-                    'season': 'Specimen',
-                    'label': f"Specimen - {paper}",
-                    'pages': page_count,
-                    'path': specimen_file,
-                    'is_specimen': True
-                })
-                valid_files.append(specimen_file)
-        else:
-            invalid_files.append((specimen_file, msg))
-    
-    for root, dirs, files in os.walk(PARENT_FOLDER):
-        if "DAMAGED_FILES" in root or "Specimen" in root:
-            continue
-        
-        path_parts = root.split(os.sep)
-        if len(path_parts) >= 3:
-            year_str = path_parts[-2]
-            season_str = path_parts[-1]
-            
-            try:
-                year = int(year_str)
-                if season_str in ["June", "November"]:
-                    doc_folder = os.path.join(root, doc_type)
-                    if os.path.exists(doc_folder):
-                        doc_files = os.listdir(doc_folder)
-                        for sub_paper in PAPER_GROUPS[paper]:
-                            matching_files = [f for f in doc_files if f"_{sub_paper}.pdf" in f]
-                            if matching_files:
-                                pdf_path = os.path.join(doc_folder, matching_files[0])
-                                is_valid, msg = check_pdf_integrity(pdf_path)
-                                
-                                if is_valid:
-                                    page_count = get_pdf_page_count(pdf_path)
-                                    if page_count > 0:
-                                        exam_label = f"{EXAM_MAPPINGS[season_str]} {year} - {sub_paper}"
-                                        index_data.append({
-                                            'year': year,
-                                            'season': season_str,
-                                            'label': exam_label,
-                                            'pages': page_count,
-                                            'path': pdf_path,
-                                            'is_specimen': False
-                                        })
-                                        valid_files.append(pdf_path)
-                                else:
-                                    invalid_files.append((pdf_path, msg))
-            except:
-                pass
-    
-    index_data.sort(key=lambda x: (not x['is_specimen'], x['year'], 0 if x['season'] == 'June' else 1))
-    
-    return index_data, valid_files, invalid_files
-
-
-def merge_pdfs_ghostscript(pdf_files, output_file, gs_path):
-    """
-    Merge PDFs using Ghostscript.
-    
-    Args:
-        pdf_files (list): List of PDF files to merge
-        output_file (str): Output file path
-        gs_path (str): Path to Ghostscript executable
-        
-    Returns:
-        bool: Success status
-    """
-    try:
-        cmd = [
-            gs_path,
-            '-q',
-            '-dNOPAUSE',
-            '-dBATCH',
-            '-dSAFER',
-            '-sDEVICE=pdfwrite',
-            '-dCompatibilityLevel=1.4',
-            '-dPDFSETTINGS=/ebook',
-            f'-sOutputFile={output_file}'
-        ] + pdf_files
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0
-    except:
-        return False
-
-
-def create_merged_pdf(index_data, valid_files, gs_path, output_file):
-    """
-    Create merged PDF.
-    
-    Args:
-        index_data (list): Index data
-        valid_files (list): List of valid PDF files
-        gs_path (str): Path to Ghostscript
-        output_file (str): Output file path
-        
-    Returns:
-        list: Index entries or None
-    """
-    if len(valid_files) == 0:
-        return None
-    
-    success = merge_pdfs_ghostscript(valid_files, output_file, gs_path)
-    
-    if success:
-        is_valid, msg = check_pdf_integrity(output_file)
-        if is_valid:
-            current_page = 1
-            index_entries = []
-            for entry in index_data:
-                if entry['path'] in valid_files:
-                    index_entries.append({
-                        'no': len(index_entries) + 1,
-                        'exam': entry['label'],
-                        'start_page': current_page,
-                        'pages': entry['pages']
-                    })
-                    current_page += entry['pages']
-            
-            return index_entries
-    
-    return None
-
-
-def save_index(index_entries, output_file):
-    """
-    Save index to file.
-    
-    Args:
-        index_entries (list): Index entries
-        output_file (str): Output file path
-    """
-    if not index_entries:
-        return
-    
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for entry in index_entries:
-                f.write(str(entry['no']) + "\n")
-            
-            f.write("\n" + "=" * 70 + "\n\n")
-            
-            for entry in index_entries:
-                f.write(entry['exam'] + "\n")
-            
-            f.write("\n" + "=" * 70 + "\n\n")
-            
-            for entry in index_entries:
-                f.write(str(entry['start_page']) + "\n")
-    except:
-        pass
-
-
-def process_all():
-    """Process all papers and document types."""
-    print("\n")
-    print("╔" + "=" * 68 + "╗")
-    print("║" + " " * 15 + "AUTOMATED PDF MERGER - ALL PAPERS" + " " * 20 + "║")
-    print("╚" + "=" * 68 + "╝\n")
-    
-    setup_release_folder()
-    
-    gs_path = find_ghostscript()
-    if not gs_path:
-        print("✗ Ghostscript not found! Please install it first.")
-        return
-    
-    for paper in ["2", "4", "6"]:
-        print(f"\n{'=' * 70}")
-        print(f"Processing Paper {paper}")
-        print(f"{'=' * 70}\n")
-        
-        for doc_type in ["MS", "QP"]:
-            print(f"Building {doc_type} for Paper {paper}...")
-            
-            index_data, valid_files, invalid_files = build_index_for_paper(paper, doc_type)
-            
-            if len(valid_files) == 0:
-                print(f"  ✗ No valid files found for Paper {paper} ({doc_type})")
-                continue
-            
-            print(f"  ✓ Found {len(valid_files)} valid files")
-            
-            output_pdf = os.path.join(RELEASE_FOLDER, f"Paper_{paper}", doc_type, f"Combined_{doc_type}_Paper_{paper}.pdf")
-            index_file = os.path.join(RELEASE_FOLDER, f"Paper_{paper}", doc_type, f"INDEX_{doc_type}.txt")
-            
-            print(f"  Merging PDFs...")
-            index_entries = create_merged_pdf(index_data, valid_files, gs_path, output_pdf)
-            
-            if index_entries:
-                print(f"  ✓ Created: {os.path.basename(output_pdf)}")
-                save_index(index_entries, index_file)
-                print(f"  ✓ Created: {os.path.basename(index_file)}")
-            else:
-                print(f"  ✗ Failed to create merged PDF")
-    
-    print(f"\n{'=' * 70}")
-    print("COMPLETE!")
-    print(f"{'=' * 70}")
-    print(f"\n✓ All files organized in: {RELEASE_FOLDER}/")
-    print("\nStructure:")
-    print("Release/")
-    print("├── Paper_2/")
-    print("│   ├── MS/")
-    print("│   │   ├── Combined_MS_Paper_2.pdf")
-    print("│   │   └── INDEX_MS.txt")
-    print("│   └── QP/")
-    print("│       ├── Combined_QP_Paper_2.pdf")
-    print("│       └── INDEX_QP.txt")
-    print("├── Paper_4/")
-    print("│   ├── MS/")
-    print("│   └── QP/")
-    print("└── Paper_6/")
-    print("    ├── MS/")
-    print("    └── QP/")
-    print()
-
-
-if __name__ == "__main__":
+"""
+PDF Index Builder and Merger
+Builds comprehensive indices for all papers and merges them using Ghostscript
+Generates index files with exam labels and page mappings
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+import PyPDF2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.catalog_db import CatalogDB, HEALTHY, DAMAGED
+from common.watchdog import Watchdog, FAILED
+from download.paper_catalog import SPECIMEN
+from validation.health_checker import move_to_damage
+from validation.deep_validator import deep_check_files, find_ghostscript_executable
+from validation.pdf_structure import quick_check
+
+# Configuration
+PARENT_FOLDER = "Cambridge_Past_Papers_0620"
+SUBJECT = "0620"  # paper_catalog subject of PARENT_FOLDER
+SESSIONS = ["June", "November"]  # sessions merged after the specimen
+RELEASE_FOLDER = "Release"
+DEEP_VALIDATE = False  # decode every stream and render sample pages of each input before merging (slow)
+
+PAPER_GROUPS = {
+    "2": ["21", "22", "23"],
+    "4": ["41", "42", "43"],
+    "6": ["61", "62", "63"],
+}
+
+EXAM_MAPPINGS = {
+    "June": "June",
+    "March": "March",
+    "November": "Nov."
+}
+
+
+def setup_release_folder():
+    """Create Release folder structure."""
+    Path(RELEASE_FOLDER).mkdir(exist_ok=True)
+    
+    for paper in ["2", "4", "6"]:
+        for doc_type in ["MS", "QP"]:
+            folder_path = os.path.join(RELEASE_FOLDER, f"Paper_{paper}", doc_type)
+            Path(folder_path).mkdir(parents=True, exist_ok=True)
+    
+    print(f"✓ Release folder structure created\n")
+
+
+def find_ghostscript():
+    """
+    Find Ghostscript executable.
+    
+    Returns:
+        str: Path to Ghostscript executable or None
+    """
+    gs_path, version = find_ghostscript_executable()
+    if gs_path:
+        print(f"✓ Ghostscript found: {version}\n")
+    return gs_path
+
+
+def check_pdf_integrity(file_path):
+    """
+    Check if PDF is valid.
+    
+    The memory-mapped structural check answers for most files; PyPDF2
+    only parses the ones it cannot decide.
+    
+    Args:
+        file_path (str): Path to PDF file
+        
+    Returns:
+        tuple: (is_valid: bool, message: str)
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(0, 2)
+            file_size = f.tell()
+            if file_size < 1000:
+                return False, "File too small"
+            
+            is_valid, message, num_pages = quick_check(file_path)
+            if is_valid is not None:
+                return is_valid, f"OK ({num_pages} pages)" if is_valid else message
+            
+            f.seek(0)
+            pdf_reader = PyPDF2.PdfReader(f)
+            num_pages = len(pdf_reader.pages)
+            if num_pages == 0:
+                return False, "No pages"
+            
+            try:
+                _ = pdf_reader.pages[0]
+            except:
+                return False, "Cannot read pages"
+            
+            return True, f"OK ({num_pages} pages)"
+    except Exception as e:
+        return False, str(e)[:40]
+
+
+def get_pdf_page_count(file_path):
+    """
+    Get page count.
+    
+    Args:
+        file_path (str): Path to PDF file
+        
+    Returns:
+        int: Number of pages
+    """
+    is_valid, _, num_pages = quick_check(file_path)
+    if is_valid:
+        return num_pages
+    try:
+        with open(file_path, 'rb') as f:
+            pdf_reader = PyPDF2.PdfReader(f)
+            return len(pdf_reader.pages)
+    except:
+        return 0
+
+
+def find_candidates(catalog, paper, doc_type):
+    """
+    Look up the merge inputs of a paper in the catalog database.
+    
+    Uses the catalog's identity index instead of walking the tree and
+    parsing file names. The newest specimen on disk comes first.
+    
+    Args:
+        catalog (CatalogDB): Catalog of PARENT_FOLDER
+        paper (str): Paper number
+        doc_type (str): Document type (MS/QP)
+        
+    Returns:
+        list: Candidate dicts ('year', 'season', 'label', 'path', 'is_specimen', 'row')
+    """
+    rows = catalog.query(SUBJECT, f"Paper-{paper}", doc_type, SESSIONS + [SPECIMEN], include_damaged=True)
+    candidates = []
+    
+    specimens = [row for row in rows if row['session'] == SPECIMEN]
+    if specimens:
+        candidates.append({
+            'year': 2000,
+            'season': 'Specimen',
+            'label': f"Specimen - {paper}",
+            'path': str(catalog.root_dir / specimens[-1]['path']),
+            'is_specimen': True,
+            'row': specimens[-1]
+        })
+    
+    for row in rows:
+        if row['session'] == SPECIMEN:
+            continue
+        sub_paper = f"{paper}{row['variant']}" if row['variant'] else paper
+        if row['variant'] and sub_paper not in PAPER_GROUPS[paper]:
+            continue
+        candidates.append({
+            'year': row['year'],
+            'season': row['session'],
+            'label': f"{EXAM_MAPPINGS[row['session']]} {row['year']} - {sub_paper}",
+            'path': str(catalog.root_dir / row['path']),
+            'is_specimen': False,
+            'row': row
+        })
+    return candidates
+
+
+def inspect_input(pdf_path):
+    """
+    Check one merge input and count its pages (runs in a watchdog worker).
+    
+    Args:
+        pdf_path (str): Path to PDF file
+        
+    Returns:
+        tuple: (is_valid: bool, message: str, page_count: int)
+    """
+    is_valid, msg = check_pdf_integrity(pdf_path)
+    return is_valid, msg, get_pdf_page_count(pdf_path) if is_valid else 0
+
+
+def inspect_inputs(pdf_paths):
+    """
+    Inspect merge inputs in watchdog worker processes.
+    
+    A file that hangs its worker past the timeout or exhausts its memory
+    is killed and quarantined into DAMAGED_FILES with the reason.
+    
+    Args:
+        pdf_paths (list): Paths to PDF files
+        
+    Returns:
+        dict: path -> (is_valid, message, page_count)
+    """
+    results = {}
+    for pdf_path, result, failure in Watchdog(inspect_input).imap_unordered(pdf_paths):
+        if failure is not None:
+            if failure[0] != FAILED:
+                move_to_damage(pdf_path, failure[1], PARENT_FOLDER)
+            result = (False, failure[1], 0)
+        results[pdf_path] = result
+    return results
+
+
+def build_index_for_paper(paper, doc_type, catalog):
+    """
+    Build index for a specific paper and document type.
+    
+    Inputs come from the catalog database. Files whose verdict and page
+    count are stored for their current size and mtime are not parsed
+    again; the others are inspected and their results stored.
+    
+    Args:
+        paper (str): Paper number
+        doc_type (str): Document type (MS/QP)
+        catalog (CatalogDB): Catalog of PARENT_FOLDER (synced by process_all)
+        
+    Returns:
+        tuple: (index_data, valid_files, invalid_files)
+    """
+    index_data = []
+    valid_files = []
+    invalid_files = []
+    known = {}
+    to_inspect = []
+    
+    candidates = find_candidates(catalog, paper, doc_type)
+    for candidate in candidates:
+        row = candidate.pop('row')
+        if row['verdict'] == HEALTHY and row['pages'] and catalog.is_current(row):
+            known[candidate['path']] = (True, row['reason'], row['pages'])
+        elif row['verdict'] == DAMAGED and catalog.is_current(row):
+            known[candidate['path']] = (False, row['reason'], 0)
+        else:
+            to_inspect.append(candidate['path'])
+    
+    checks = inspect_inputs(to_inspect)
+    for pdf_path, (is_valid, msg, page_count) in checks.items():
+        catalog.record_check(pdf_path, is_valid and page_count > 0, msg, page_count or None)
+    checks.update(known)
+    
+    for candidate in candidates:
+        is_valid, msg, page_count = checks[candidate['path']]
+        if not is_valid:
+            invalid_files.append((candidate['path'], msg))
+        elif page_count > 0:
+            candidate['pages'] = page_count
+            index_data.append(candidate)
+            valid_files.append(candidate['path'])
+    
+    index_data.sort(key=lambda x: (not x['is_specimen'], x['year'], 0 if x['season'] == 'June' else 1))
+    
+    return index_data, valid_files, invalid_files
+
+
+def deep_validate_inputs(valid_files):
+    """
+    Deep-check merge inputs in parallel and drop the broken ones.
+    
+    Files that open fine but have corrupt streams or pages Ghostscript
+    cannot render are caught here instead of failing the whole merge.
+    
+    Args:
+        valid_files (list): Files that passed check_pdf_integrity
+        
+    Returns:
+        tuple: (valid_files: list in the original order, rejected: list of (path, reason))
+    """
+    rejected = {}
+    for pdf_path, is_valid, msg in deep_check_files(valid_files):
+        if not is_valid:
+            rejected[pdf_path] = msg
+    return [f for f in valid_files if f not in rejected], list(rejected.items())
+
+
+def merge_pdfs_ghostscript(pdf_files, output_file, gs_path):
+    """
+    Merge PDFs using Ghostscript.
+    
+    Args:
+        pdf_files (list): List of PDF files to merge
+        output_file (str): Output file path
+        gs_path (str): Path to Ghostscript executable
+        
+    Returns:
+        bool: Success status
+    """
+    try:
+        cmd = [
+            gs_path,
+            '-q',
+            '-dNOPAUSE',
+            '-dBATCH',
+            '-dSAFER',
+            '-sDEVICE=pdfwrite',
+            '-dCompatibilityLevel=1.4',
+            '-dPDFSETTINGS=/ebook',
+            f'-sOutputFile={output_file}'
+        ] + pdf_files
+        
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        return result.returncode == 0
+    except:
+        return False
+
+
+def create_merged_pdf(index_data, valid_files, gs_path, output_file):
+    """
+    Create merged PDF.
+    
+    Args:
+        index_data (list): Index data
+        valid_files (list): List of valid PDF files
+        gs_path (str): Path to Ghostscript
+        output_file (str): Output file path
+        
+    Returns:
+        list: Index entries or None
+    """
+    if len(valid_files) == 0:
+        return None
+    
+    success = merge_pdfs_ghostscript(valid_files, output_file, gs_path)
+    
+    if success:
+        is_valid, msg = check_pdf_integrity(output_file)
+        if is_valid:
+            current_page = 1
+            index_entries = []
+            for entry in index_data:
+                if entry['path'] in valid_files:
+                    index_entries.append({
+                        'no': len(index_entries) + 1,
+                        'exam': entry['label'],
+                        'start_page': current_page,
+                        'pages': entry['pages']
+                    })
+                    current_page += entry['pages']
+            
+            return index_entries
+    
+    return None
+
+
+def save_index(index_entries, output_file):
+    """
+    Save index to file.
+    
+    Args:
+        index_entries (list): Index entries
+        output_file (str): Output file path
+    """
+    if not index_entries:
+        return
+    
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for entry in index_entries:
+                f.write(str(entry['no']) + "\n")
+            
+            f.write("\n" + "=" * 70 + "\n\n")
+            
+            for entry in index_entries:
+                f.write(entry['exam'] + "\n")
+            
+            f.write("\n" + "=" * 70 + "\n\n")
+            
+            for entry in index_entries:
+                f.write(str(entry['start_page']) + "\n")
+    except:
+        pass
+
+
+def process_all():
+    """Process all papers and document types."""
+    print("\n")
+    print("╔" + "=" * 68 + "╗")
+    print("║" + " " * 15 + "AUTOMATED PDF MERGER - ALL PAPERS" + " " * 20 + "║")
+    print("╚" + "=" * 68 + "╝\n")
+    
+    setup_release_folder()
+    
+    gs_path = find_ghostscript()
+    if not gs_path:
+        print("✗ Ghostscript not found! Please install it first.")
+        return
+    
+    catalog = CatalogDB(PARENT_FOLDER)
+    registered, on_disk = catalog.sync_tree(SUBJECT)
+    print(f"✓ Catalog: {on_disk} of {registered} papers on disk ({catalog.path})\n")
+    
+    for paper in ["2", "4", "6"]:
+        print(f"\n{'=' * 70}")
+        print(f"Processing Paper {paper}")
+        print(f"{'=' * 70}\n")
+        
+        for doc_type in ["MS", "QP"]:
+            print(f"Building {doc_type} for Paper {paper}...")
+            
+            index_data, valid_files, invalid_files = build_index_for_paper(paper, doc_type, catalog)
+            
+            if DEEP_VALIDATE and valid_files:
+                print(f"  Deep-checking {len(valid_files)} files...")
+                valid_files, rejected = deep_validate_inputs(valid_files)
+                for pdf_path, msg in rejected:
+                    print(f"  ✗ Skipping {os.path.basename(pdf_path)}: {msg}")
+                    catalog.record_check(pdf_path, False, msg)
+                invalid_files.extend(rejected)
+            
+            if len(valid_files) == 0:
+                print(f"  ✗ No valid files found for Paper {paper} ({doc_type})")
+                continue
+            
+            print(f"  ✓ Found {len(valid_files)} valid files")
+            
+            output_pdf = os.path.join(RELEASE_FOLDER, f"Paper_{paper}", doc_type, f"Combined_{doc_type}_Paper_{paper}.pdf")
+            index_file = os.path.join(RELEASE_FOLDER, f"Paper_{paper}", doc_type, f"INDEX_{doc_type}.txt")
+            
+            print(f"  Merging PDFs...")
+            index_entries = create_merged_pdf(index_data, valid_files, gs_path, output_pdf)
+            
+            if index_entries:
+                print(f"  ✓ Created: {os.path.basename(output_pdf)}")
+                save_index(index_entries, index_file)
+                print(f"  ✓ Created: {os.path.basename(index_file)}")
+            else:
+                print(f"  ✗ Failed to create merged PDF")
+    
+    catalog.close()
+    
+    print(f"\n{'=' * 70}")
+    print("COMPLETE!")
+    print(f"{'=' * 70}")
+    print(f"\n✓ All files organized in: {RELEASE_FOLDER}/")
+    print("\nStructure:")
+    print("Release/")
+    print("├── Paper_2/")
+    print("│   ├── MS/")
+    print("│   │   ├── Combined_MS_Paper_2.pdf")
+    print("│   │   └── INDEX_MS.txt")
+    print("│   └── QP/")
+    print("│       ├── Combined_QP_Paper_2.pdf")
+    print("│       └── INDEX_QP.txt")
+    print("├── Paper_4/")
+    print("│   ├── MS/")
+    print("│   └── QP/")
+    print("└── Paper_6/")
+    print("    ├── MS/")
+    print("    └── QP/")
+    print()
+
+
+if __name__ == "__main__":
     process_all()
\ No newline at end of file
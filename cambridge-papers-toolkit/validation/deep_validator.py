@@ -0,0 +1,339 @@
+"""
+Deep PDF Validation
+Decodes every content stream, form and image of a PDF and rasterizes a sample of its pages with Ghostscript
+Catches files whose later pages are broken before they fail the index builder's merge
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limits
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.watchdog import Watchdog
+
+# Configuration
+SAMPLE_PAGES = 3  # pages rasterized per file (first, last and evenly spaced between; 0 = none)
+RASTER_DPI = 36  # low resolution: enough to execute every drawing operator
+TIME_LIMIT = 120  # seconds per file for decoding and rasterizing
+MEMORY_LIMIT_MB = 1024  # extra address space a file may use while it is checked
+WORKERS = os.cpu_count() or 1  # checking processes (even 1 checks in a watchdog process, not in this one)
+MAX_TASKS_PER_WORKER = 50  # files a process checks before it is replaced
+WATCHDOG_GRACE = 30  # seconds past TIME_LIMIT before the watchdog kills a stuck process
+
+GHOSTSCRIPT_CANDIDATES = [
+    'gs',
+    'gswin64c.exe',
+    'gswin32c.exe',
+    r'C:\Program Files\gs\gs10.01.2\bin\gswin64c.exe',
+    r'C:\Program Files (x86)\gs\gs10.01.2\bin\gswin32c.exe',
+]
+
+
+class DeepCheckTimeout(Exception):
+    """A file used up its TIME_LIMIT."""
+
+
+@lru_cache(maxsize=1)
+def find_ghostscript_executable():
+    """
+    Find a working Ghostscript executable.
+
+    Returns:
+        tuple: (path: str or None, version: str or None)
+    """
+    for gs_path in GHOSTSCRIPT_CANDIDATES:
+        try:
+            result = subprocess.run([gs_path, '--version'], capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                return gs_path, result.stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            pass
+    return None, None
+
+
+def sample_pages(num_pages, count=SAMPLE_PAGES):
+    """
+    Pick the pages to rasterize: first, last and evenly spaced between.
+
+    Args:
+        num_pages (int): Pages in the document
+        count (int): Number of pages wanted
+
+    Returns:
+        list: Sorted 1-based page numbers
+    """
+    if count <= 0 or num_pages <= 0:
+        return []
+    if count >= num_pages:
+        return list(range(1, num_pages + 1))
+    if count == 1:
+        return [1]
+    step = (num_pages - 1) / (count - 1)
+    return sorted({1 + round(i * step) for i in range(count)})
+
+
+@contextmanager
+def memory_limit(limit_mb):
+    """
+    Temporarily cap this process's address space at its current size plus limit_mb.
+
+    Allocations beyond the cap fail (MemoryError in Python, an exception
+    from pikepdf/qpdf) instead of exhausting the machine. Only use it in a
+    checking process or a single-threaded script: the cap applies to every
+    thread. Does nothing where address-space limits are unavailable.
+
+    Args:
+        limit_mb (int): Extra megabytes allowed (0 or None = no cap)
+    """
+    if resource is None or not limit_mb or not os.path.exists('/proc/self/statm'):
+        yield
+        return
+    with open('/proc/self/statm') as f:
+        current = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = current + limit_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _page_resources(page):
+    """Resources of a page object, inherited from the page tree if needed."""
+    node = page
+    while node is not None:
+        resources = node.get('/Resources')
+        if resources is not None:
+            return resources
+        node = node.get('/Parent')
+    return None
+
+
+def decode_streams(pdf, deadline):
+    """
+    Decode every stream the pages draw: contents, form XObjects (recursively) and images.
+
+    Each stream is decoded once even if many pages share it. Images in
+    formats qpdf cannot decode (e.g. JPEG 2000) are read raw instead.
+
+    Args:
+        pdf (pikepdf.Pdf): Open document
+        deadline (float): time.monotonic() value after which to give up
+
+    Returns:
+        int: Number of streams decoded
+    """
+    from pikepdf import Array, Dictionary, PdfError, Stream, StreamDecodeLevel
+
+    seen = set()
+    pending = []
+
+    def add(obj):
+        if isinstance(obj, Array):
+            pending.extend(item for item in obj if isinstance(item, Stream))
+        elif isinstance(obj, Stream):
+            pending.append(obj)
+
+    def add_xobjects(resources):
+        if isinstance(resources, Dictionary) and isinstance(resources.get('/XObject'), Dictionary):
+            for xobject in resources.XObject.values():
+                add(xobject)
+
+    for page in pdf.pages:
+        add(page.obj.get('/Contents'))
+        add_xobjects(_page_resources(page.obj))
+
+    decoded = 0
+    while pending:
+        stream = pending.pop()
+        key = stream.objgen
+        if key != (0, 0):
+            if key in seen:
+                continue
+            seen.add(key)
+        if time.monotonic() > deadline:
+            raise DeepCheckTimeout()
+        try:
+            stream.read_bytes(StreamDecodeLevel.all)
+        except PdfError as e:
+            if 'unfilterable' not in str(e):
+                raise
+            stream.read_raw_bytes()
+        decoded += 1
+        if stream.get('/Subtype') == '/Form':
+            add_xobjects(stream.get('/Resources'))
+    return decoded
+
+
+def rasterize_sample(file_path, pages, gs_path, timeout, memory_limit_mb=MEMORY_LIMIT_MB):
+    """
+    Render pages at RASTER_DPI with Ghostscript, discarding the output.
+
+    Ghostscript stops at the first error (-dPDFSTOPONERROR), is killed
+    after timeout seconds and gets an address-space cap where supported.
+
+    Args:
+        file_path (str): Path to PDF file
+        pages (list): 1-based page numbers to render
+        gs_path (str): Ghostscript executable
+        timeout (float): Seconds before Ghostscript is killed
+        memory_limit_mb (int): Address-space cap for Ghostscript
+
+    Returns:
+        tuple: (is_valid: bool, message: str)
+    """
+    cmd = [
+        gs_path,
+        '-q',
+        '-dNOPAUSE',
+        '-dBATCH',
+        '-dSAFER',
+        '-dPDFSTOPONERROR',
+        '-sDEVICE=pgmraw',
+        f'-r{RASTER_DPI}',
+        f'-sPageList={",".join(str(page) for page in pages)}',
+        f'-sOutputFile={os.devnull}',
+        str(file_path),
+    ]
+    limit_child = None
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        limit_child = lambda: resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, errors='replace',
+                                timeout=timeout, preexec_fn=limit_child)
+    except subprocess.TimeoutExpired:
+        return False, f"Rendering timed out after {timeout:.0f}s"
+    except OSError as e:
+        return False, f"Ghostscript could not run: {str(e)[:50]}"
+
+    if result.returncode != 0:
+        lines = [line.strip() for line in (result.stderr + result.stdout).splitlines() if line.strip()]
+        detail = lines[0] if lines else f"exit code {result.returncode}"
+        return False, f"Rendering failed: {detail[:60]}"
+    return True, f"{len(pages)} pages rendered"
+
+
+def deep_check(file_path, time_limit=TIME_LIMIT, memory_limit_mb=MEMORY_LIMIT_MB, sample=SAMPLE_PAGES):
+    """
+    Deep tier: decode every stream the pages use, then rasterize sample pages.
+
+    Args:
+        file_path (str): Path to PDF file
+        time_limit (float): Seconds allowed for the whole file
+        memory_limit_mb (int): Extra memory allowed while decoding and rendering
+        sample (int): Pages to rasterize (0 skips rendering)
+
+    Returns:
+        tuple: (is_valid: bool, message: str)
+    """
+    from pikepdf import Pdf
+
+    deadline = time.monotonic() + time_limit
+    try:
+        with memory_limit(memory_limit_mb):
+            with Pdf.open(file_path) as pdf:
+                num_pages = len(pdf.pages)
+                if num_pages == 0:
+                    return False, "No pages found"
+                streams = decode_streams(pdf, deadline)
+    except DeepCheckTimeout:
+        return False, f"Decoding timed out after {time_limit}s"
+    except MemoryError:
+        return False, f"Decoding needed more than {memory_limit_mb} MB"
+    except Exception as e:
+        # qpdf prefixes its messages with the file name; keep the part that explains the damage
+        reason = str(e).replace(str(file_path), '').lstrip(' :')
+        return False, f"Stream error: {reason[:80]}"
+
+    summary = f"Valid ({num_pages} pages, {streams} streams decoded"
+    pages = sample_pages(num_pages, sample)
+    gs_path, _ = find_ghostscript_executable()
+    if not pages or gs_path is None:
+        return True, summary + (", rendering skipped: Ghostscript not found)" if pages else ")")
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return False, f"Decoding timed out after {time_limit}s"
+    is_valid, message = rasterize_sample(file_path, pages, gs_path, remaining, memory_limit_mb)
+    if not is_valid:
+        return False, message
+    return True, f"{summary}, {message})"
+
+
+def _check_one(file_path, time_limit, memory_limit_mb, sample):
+    """Worker entry point: deep-check one file."""
+    return (file_path,) + deep_check(file_path, time_limit, memory_limit_mb, sample)
+
+
+def deep_check_files(file_paths, workers=WORKERS, time_limit=TIME_LIMIT,
+                     memory_limit_mb=MEMORY_LIMIT_MB, sample=SAMPLE_PAGES):
+    """
+    Deep-check many files in parallel.
+
+    Every file gets its own time and memory limit. The checks run in
+    watchdog processes (recycled every MAX_TASKS_PER_WORKER files), which
+    kill a file still stuck inside pikepdf WATCHDOG_GRACE seconds after
+    its time limit.
+
+    Args:
+        file_paths (iterable): PDF files to check
+        workers (int): Checking processes
+        time_limit (float): Seconds allowed per file
+        memory_limit_mb (int): Extra memory allowed per file
+        sample (int): Pages to rasterize per file
+
+    Yields:
+        tuple: (file_path, is_valid: bool, message: str) as files finish
+    """
+    check = partial(_check_one, time_limit=time_limit, memory_limit_mb=memory_limit_mb, sample=sample)
+    watchdog = Watchdog(check, workers, timeout=time_limit + WATCHDOG_GRACE, max_rss_mb=None,
+                        max_tasks_per_worker=MAX_TASKS_PER_WORKER)
+    for file_path, result, failure in watchdog.imap_unordered(file_paths):
+        yield result if failure is None else (file_path, False, failure[1])
+
+
+def main():
+    """Deep-check the PDFs given on the command line (files or folders)."""
+    parser = argparse.ArgumentParser(description="Decode every stream and render sample pages of PDFs")
+    parser.add_argument('paths', nargs='+', help="PDF files or folders to scan")
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--time-limit', type=float, default=TIME_LIMIT, help="Seconds per file")
+    parser.add_argument('--memory-limit', type=int, default=MEMORY_LIMIT_MB, help="Megabytes per file")
+    parser.add_argument('--sample', type=int, default=SAMPLE_PAGES, help="Pages to render per file")
+    args = parser.parse_args()
+
+    files = []
+    for path in map(Path, args.paths):
+        files.extend(sorted(path.rglob('*.pdf')) if path.is_dir() else [path])
+
+    gs_path, version = find_ghostscript_executable()
+    print(f"Ghostscript: {version or 'not found (rendering skipped)'}")
+    print(f"Deep-checking {len(files)} files ({args.workers} workers)\n")
+
+    damaged = 0
+    for file_path, is_valid, message in deep_check_files(files, args.workers, args.time_limit,
+                                                         args.memory_limit, args.sample):
+        print(f"{'✓' if is_valid else '✗'} {file_path}")
+        print(f"  └─ {message}")
+        damaged += not is_valid
+
+    print(f"\nDamaged: {damaged} of {len(files)}")
+    sys.exit(1 if damaged else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,183 +1,374 @@
-"""
-PDF Health Checker
-Scans directory trees for PDF files and performs comprehensive integrity checks
-Automatically quarantines damaged files and generates detailed reports
-"""
-
-import os
-import shutil
-from pathlib import Path
-import PyPDF2
-from PyPDF2.errors import PdfReadError
-
-# Configuration
-PARENT_FOLDER = "Cambridge_Past_Papers_0971"
-DAMAGE_FOLDER = os.path.join(PARENT_FOLDER, "DAMAGED_FILES")
-
-# Statistics
-stats = {
-    'total_files': 0,
-    'healthy_files': 0,
-    'damaged_files': 0,
-    'moved_files': 0
-}
-
-
-def is_pdf_valid(file_path):
-    """
-    Check if a PDF file is valid and not corrupted.
-    
-    Args:
-        file_path (str): Path to PDF file
-        
-    Returns:
-        tuple: (is_valid: bool, message: str)
-    """
-    try:
-        with open(file_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            num_pages = len(pdf_reader.pages)
-            
-            if num_pages == 0:
-                return False, "No pages found"
-            
-            # Try to read the first page
-            try:
-                first_page = pdf_reader.pages[0]
-            except:
-                return False, "Cannot read pages"
-            
-            return True, f"Valid ({num_pages} pages)"
-    except PdfReadError as e:
-        return False, f"PDF Read Error: {str(e)[:50]}"
-    except Exception as e:
-        return False, f"Error: {str(e)[:50]}"
-
-
-def move_to_damage(file_path, reason):
-    """
-    Move damaged file to damage folder with folder structure preservation.
-    
-    Args:
-        file_path (str): Path to damaged file
-        reason (str): Reason for damage classification
-        
-    Returns:
-        tuple: (success: bool, destination_path: str)
-    """
-    try:
-        rel_path = os.path.relpath(file_path, PARENT_FOLDER)
-        damage_subfolder = os.path.join(DAMAGE_FOLDER, os.path.dirname(rel_path))
-        Path(damage_subfolder).mkdir(parents=True, exist_ok=True)
-        
-        dest_path = os.path.join(damage_subfolder, os.path.basename(file_path))
-        shutil.move(file_path, dest_path)
-        
-        return True, dest_path
-    except Exception as e:
-        return False, str(e)
-
-
-def check_file_size(file_path):
-    """
-    Check if file size is suspiciously small.
-    
-    Args:
-        file_path (str): Path to file
-        
-    Returns:
-        tuple: (is_valid: bool, message: str)
-    """
-    file_size = os.path.getsize(file_path)
-    if file_size < 1024:
-        return False, f"Suspiciously small ({file_size} bytes)"
-    return True, f"Size OK ({file_size / 1024:.1f} KB)"
-
-
-def scan_directory():
-    """
-    Scan parent folder for PDF files and perform health checks.
-    """
-    Path(DAMAGE_FOLDER).mkdir(exist_ok=True)
-    
-    print(f"Starting health check on: {PARENT_FOLDER}\n")
-    print("=" * 80)
-    
-    for root, dirs, files in os.walk(PARENT_FOLDER):
-        if "DAMAGED_FILES" in root:
-            continue
-        
-        for file in files:
-            if file.endswith('.pdf'):
-                file_path = os.path.join(root, file)
-                stats['total_files'] += 1
-                
-                # Check file size first
-                size_valid, size_msg = check_file_size(file_path)
-                
-                if not size_valid:
-                    is_valid = False
-                    reason = size_msg
-                else:
-                    is_valid, reason = is_pdf_valid(file_path)
-                
-                rel_path = os.path.relpath(file_path, PARENT_FOLDER)
-                
-                if is_valid:
-                    stats['healthy_files'] += 1
-                    print(f"✓ HEALTHY: {rel_path}")
-                    print(f"  └─ {reason}")
-                else:
-                    stats['damaged_files'] += 1
-                    print(f"✗ DAMAGED: {rel_path}")
-                    print(f"  └─ {reason}")
-                    
-                    success, result = move_to_damage(file_path, reason)
-                    if success:
-                        stats['moved_files'] += 1
-                        print(f"  └─ Moved to: {os.path.relpath(result, PARENT_FOLDER)}")
-                    else:
-                        print(f"  └─ Error moving file: {result}")
-
-
-def print_summary():
-    """Print health check summary."""
-    print("\n" + "=" * 80)
-    print("HEALTH CHECK SUMMARY")
-    print("=" * 80)
-    print(f"Total PDF Files:     {stats['total_files']}")
-    print(f"Healthy Files:       {stats['healthy_files']} ✓")
-    print(f"Damaged Files:       {stats['damaged_files']} ✗")
-    print(f"Files Moved:         {stats['moved_files']}")
-    print(f"\nDamaged files moved to: {DAMAGE_FOLDER}")
-    print("\nHealth Check Complete!")
-
-
-def save_report():
-    """Save health check report to file."""
-    report_path = os.path.join(PARENT_FOLDER, "HEALTH_CHECK_REPORT.txt")
-    with open(report_path, 'w') as f:
-        f.write("PDF HEALTH CHECK REPORT\n")
-        f.write("=" * 80 + "\n\n")
-        f.write(f"Total PDF Files:     {stats['total_files']}\n")
-        f.write(f"Healthy Files:       {stats['healthy_files']}\n")
-        f.write(f"Damaged Files:       {stats['damaged_files']}\n")
-        f.write(f"Files Moved:         {stats['moved_files']}\n\n")
-        f.write(f"Damaged files location: {DAMAGE_FOLDER}\n")
-    
-    print(f"\nReport saved to: {report_path}")
-
-
-def main():
-    """Main execution function."""
-    print("\n" + "=" * 80)
-    print("PDF HEALTH CHECKER")
-    print("=" * 80 + "\n")
-    
-    scan_directory()
-    print_summary()
-    save_report()
-
-
-if __name__ == '__main__':
+"""
+PDF Health Checker
+Scans directory trees for PDF files and performs comprehensive integrity checks
+Automatically quarantines damaged files and generates detailed reports
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from functools import partial
+from pathlib import Path
+import PyPDF2
+from PyPDF2.errors import PdfReadError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.catalog_db import open_catalog
+from common.watchdog import Watchdog, FAILED, FILE_TIMEOUT, MAX_RSS_MB
+from validation.deep_validator import deep_check
+from validation.pdf_structure import TIER_FAST, TIER_DEEP, TIERS, quick_check
+from validation.verdict_cache import VerdictCache, file_fingerprint
+
+# Configuration
+PARENT_FOLDER = "Cambridge_Past_Papers_0971"
+DAMAGE_FOLDER_NAME = "DAMAGED_FILES"
+DAMAGE_FOLDER = os.path.join(PARENT_FOLDER, DAMAGE_FOLDER_NAME)
+WORKERS = os.cpu_count() or 1  # checking processes
+MAX_TASKS_PER_WORKER = 200  # files a process checks before it is replaced (caps PyPDF2 memory growth)
+VERIFY_HASH = False  # also require an unchanged sha256 before reusing a cached verdict
+VALIDATION_LEVEL = TIER_FAST  # 'fast', 'standard' or 'deep' (see validation/pdf_structure.py)
+
+# Statistics
+stats = {
+    'total_files': 0,
+    'healthy_files': 0,
+    'damaged_files': 0,
+    'moved_files': 0,
+    'cached_files': 0,
+    'killed_files': 0
+}
+
+
+def is_pdf_valid(file_path):
+    """
+    Check if a PDF file is valid and not corrupted.
+    
+    Args:
+        file_path (str): Path to PDF file
+        
+    Returns:
+        tuple: (is_valid: bool, message: str)
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            pdf_reader = PyPDF2.PdfReader(f)
+            num_pages = len(pdf_reader.pages)
+            
+            if num_pages == 0:
+                return False, "No pages found"
+            
+            # Try to read the first page
+            try:
+                first_page = pdf_reader.pages[0]
+            except:
+                return False, "Cannot read pages"
+            
+            return True, f"Valid ({num_pages} pages)"
+    except PdfReadError as e:
+        return False, f"PDF Read Error: {str(e)[:50]}"
+    except Exception as e:
+        return False, f"Error: {str(e)[:50]}"
+
+
+def unused_path(dest_path):
+    """
+    Number a destination that is already taken: 'name (1).pdf', 'name (2).pdf', ...
+    
+    Args:
+        dest_path (str): Wanted destination
+        
+    Returns:
+        str: dest_path, or the first numbered variant that does not exist
+    """
+    stem, ext = os.path.splitext(dest_path)
+    copy_number = 1
+    while os.path.exists(dest_path):
+        dest_path = f"{stem} ({copy_number}){ext}"
+        copy_number += 1
+    return dest_path
+
+
+def move_to_damage(file_path, reason, parent_folder=PARENT_FOLDER):
+    """
+    Move damaged file to damage folder with folder structure preservation.
+    
+    Args:
+        file_path (str): Path to damaged file
+        reason (str): Reason for damage classification
+        parent_folder (str): Tree the file belongs to (its DAMAGED_FILES is used)
+        
+    Returns:
+        tuple: (success: bool, destination_path: str)
+    """
+    try:
+        rel_path = os.path.relpath(file_path, parent_folder)
+        damage_folder = os.path.join(parent_folder, DAMAGE_FOLDER_NAME)
+        damage_subfolder = os.path.join(damage_folder, os.path.dirname(rel_path))
+        Path(damage_subfolder).mkdir(parents=True, exist_ok=True)
+        
+        # Never overwrite a file quarantined by an earlier run
+        dest_path = unused_path(os.path.join(damage_subfolder, os.path.basename(file_path)))
+        shutil.move(file_path, dest_path)
+        
+        return True, dest_path
+    except Exception as e:
+        return False, str(e)
+
+
+def check_file_size(file_path):
+    """
+    Check if file size is suspiciously small.
+    
+    Args:
+        file_path (str): Path to file
+        
+    Returns:
+        tuple: (is_valid: bool, message: str)
+    """
+    file_size = os.path.getsize(file_path)
+    if file_size < 1024:
+        return False, f"Suspiciously small ({file_size} bytes)"
+    return True, f"Size OK ({file_size / 1024:.1f} KB)"
+
+
+def check_pdf(file_path, level=VALIDATION_LEVEL):
+    """
+    Run the health checks on one file, cheapest tier first.
+    
+    The fast structural tier settles most files on its own; a file only
+    escalates to the full PyPDF2 open when the fast tier is inconclusive
+    or a higher level is asked for. A fast-tier rejection is final.
+    
+    Args:
+        file_path (str): Path to PDF file
+        level (str): Highest tier to run ('fast', 'standard' or 'deep')
+        
+    Returns:
+        tuple: (is_valid: bool, message: str)
+    """
+    size_valid, size_msg = check_file_size(file_path)
+    if not size_valid:
+        return False, size_msg
+    
+    is_valid, message, _ = quick_check(file_path)
+    if is_valid is False or (is_valid and level == TIER_FAST):
+        return is_valid, message
+    
+    is_valid, message = is_pdf_valid(file_path)
+    if not is_valid or level != TIER_DEEP:
+        return is_valid, message
+    return deep_check(file_path)
+
+
+def iter_pdf_files(parent_folder=PARENT_FOLDER):
+    """
+    Walk a tree for PDF files, skipping the quarantine folder.
+    
+    Args:
+        parent_folder (str): Root of the tree
+        
+    Yields:
+        str: Path of every PDF file
+    """
+    for root, dirs, files in os.walk(parent_folder):
+        if DAMAGE_FOLDER_NAME in root:
+            continue
+        
+        for file in files:
+            if file.endswith('.pdf'):
+                yield os.path.join(root, file)
+
+
+def check_file(file_path, with_hash=VERIFY_HASH, level=VALIDATION_LEVEL):
+    """
+    Check one file (runs in a worker process).
+    
+    The fingerprint is taken before the check, so a file modified while
+    it is being checked is checked again next time.
+    
+    Args:
+        file_path (str): Path to PDF file
+        with_hash (bool): Include the sha256 in the fingerprint
+        level (str): Highest validation tier to run
+        
+    Returns:
+        tuple: (file_path: str, is_valid: bool, message: str, fingerprint: dict)
+    """
+    fingerprint = file_fingerprint(file_path, with_hash)
+    return (file_path,) + check_pdf(file_path, level) + (fingerprint,)
+
+
+def record_result(file_path, is_valid, reason, fingerprint=None, cache=None, catalog=None):
+    """
+    Count, report and (if damaged) quarantine one checked file.
+    
+    Only the main process calls this, so the statistics and the moves
+    into DAMAGE_FOLDER never race with each other.
+    
+    Args:
+        file_path (str): Path to PDF file
+        is_valid (bool): Check verdict
+        reason (str): Check message
+        fingerprint (dict): Fingerprint taken before the check
+        cache (VerdictCache): Cache to store the verdict in (optional)
+        catalog (CatalogDB): Shared paper catalog to record the verdict in (optional)
+    """
+    stats['total_files'] += 1
+    rel_path = os.path.relpath(file_path, PARENT_FOLDER)
+    if cache is not None and fingerprint is not None:
+        cache.record(file_path, fingerprint, is_valid, reason)
+    
+    if is_valid:
+        stats['healthy_files'] += 1
+        print(f"✓ HEALTHY: {rel_path}")
+        print(f"  └─ {reason}")
+        if catalog is not None:
+            catalog.record_check(file_path, True, reason)
+        return
+    
+    stats['damaged_files'] += 1
+    print(f"✗ DAMAGED: {rel_path}")
+    print(f"  └─ {reason}")
+    
+    success, result = move_to_damage(file_path, reason)
+    if success:
+        stats['moved_files'] += 1
+        print(f"  └─ Moved to: {os.path.relpath(result, PARENT_FOLDER)}")
+    else:
+        print(f"  └─ Error moving file: {result}")
+    if catalog is not None:
+        catalog.record_check(file_path, False, reason)
+
+
+def scan_directory(workers=WORKERS, full=False, with_hash=VERIFY_HASH, level=VALIDATION_LEVEL,
+                   timeout=FILE_TIMEOUT, max_rss_mb=MAX_RSS_MB, from_catalog=False):
+    """
+    Scan parent folder for PDF files and perform health checks.
+    
+    Files that passed a previous run and still have the same size,
+    modification time and inode (and sha256 with with_hash) are counted
+    as healthy without being parsed again. The checks run in watchdog
+    worker processes (recycled every MAX_TASKS_PER_WORKER files); a file
+    that hangs a worker past the timeout or drives it over the memory cap
+    is killed, counted as damaged and quarantined with that reason.
+    Results are collected in the main process as they finish and
+    recorded in the tree's catalog database (if it has one); with from_catalog the files
+    to check are listed from that database instead of walking the tree.
+    
+    Args:
+        workers (int): Number of checking processes
+        full (bool): Ignore cached verdicts and check every file
+        with_hash (bool): Fingerprint files by content as well
+        level (str): Highest validation tier to run
+        timeout (float): Seconds a file may take
+        max_rss_mb (float): Memory a checking process may use
+        from_catalog (bool): Check the files the catalog database knows to be on disk
+    """
+    Path(DAMAGE_FOLDER).mkdir(exist_ok=True)
+    cache = VerdictCache(PARENT_FOLDER, with_hash=with_hash, level=level)
+    catalog = open_catalog(PARENT_FOLDER, create=from_catalog)
+    
+    mode = "full check" if full else f"{len(cache.entries)} cached verdicts"
+    source = f", files from {catalog.path.name}" if from_catalog else ""
+    print(f"Starting health check on: {PARENT_FOLDER} ({workers} workers, {level} checks, {mode}{source})\n")
+    print("=" * 80)
+    
+    seen = []
+    cached = [0]
+    
+    def files_to_check():
+        paths = map(str, catalog.paths()) if from_catalog else iter_pdf_files(PARENT_FOLDER)
+        for file_path in paths:
+            seen.append(file_path)
+            if not full and cache.is_known_healthy(file_path):
+                cached[0] += 1
+                row = catalog.lookup(file_path) if catalog else None
+                if catalog and (row is None or row['verdict'] is None):
+                    catalog.record_check(file_path, True, "Passed an earlier check (cached verdict)")
+                continue
+            yield file_path
+    
+    check = partial(check_file, with_hash=with_hash, level=level)
+    watchdog = Watchdog(check, workers, timeout, max_rss_mb, MAX_TASKS_PER_WORKER)
+    try:
+        for file_path, result, failure in watchdog.imap_unordered(files_to_check()):
+            if failure is None:
+                record_result(*result, cache=cache, catalog=catalog)
+                continue
+            if failure[0] != FAILED:
+                stats['killed_files'] += 1
+            record_result(file_path, False, failure[1], cache=cache, catalog=catalog)
+        if not from_catalog:
+            cache.prune(seen)
+    finally:
+        cache.save()
+        if catalog:
+            catalog.close()
+    
+    stats['cached_files'] += cached[0]
+    stats['total_files'] += cached[0]
+    stats['healthy_files'] += cached[0]
+
+
+def print_summary():
+    """Print health check summary."""
+    print("\n" + "=" * 80)
+    print("HEALTH CHECK SUMMARY")
+    print("=" * 80)
+    print(f"Total PDF Files:     {stats['total_files']}")
+    print(f"Healthy Files:       {stats['healthy_files']} ✓ ({stats['cached_files']} unchanged, not re-parsed)")
+    print(f"Damaged Files:       {stats['damaged_files']} ✗ ({stats['killed_files']} stopped by the watchdog)")
+    print(f"Files Moved:         {stats['moved_files']}")
+    print(f"\nDamaged files moved to: {DAMAGE_FOLDER}")
+    print("\nHealth Check Complete!")
+
+
+def save_report():
+    """Save health check report to file."""
+    report_path = os.path.join(PARENT_FOLDER, "HEALTH_CHECK_REPORT.txt")
+    with open(report_path, 'w') as f:
+        f.write("PDF HEALTH CHECK REPORT\n")
+        f.write("=" * 80 + "\n\n")
+        f.write(f"Total PDF Files:     {stats['total_files']}\n")
+        f.write(f"Healthy Files:       {stats['healthy_files']}\n")
+        f.write(f"Unchanged (cached):  {stats['cached_files']}\n")
+        f.write(f"Damaged Files:       {stats['damaged_files']}\n")
+        f.write(f"Watchdog Kills:      {stats['killed_files']}\n")
+        f.write(f"Files Moved:         {stats['moved_files']}\n\n")
+        f.write(f"Damaged files location: {DAMAGE_FOLDER}\n")
+    
+    print(f"\nReport saved to: {report_path}")
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Check PDF integrity and quarantine damaged files")
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f"Checking processes (default: {WORKERS})")
+    parser.add_argument('--full', action='store_true',
+                        help="Re-check every file, ignoring cached verdicts")
+    parser.add_argument('--hash', action='store_true', default=VERIFY_HASH,
+                        help="Also compare sha256 before trusting a cached verdict")
+    parser.add_argument('--timeout', type=float, default=FILE_TIMEOUT,
+                        help=f"Seconds a file may take before it is killed (default: {FILE_TIMEOUT})")
+    parser.add_argument('--max-memory', type=float, default=MAX_RSS_MB,
+                        help=f"MB a checking process may use before it is killed (default: {MAX_RSS_MB})")
+    parser.add_argument('--level', choices=TIERS, default=VALIDATION_LEVEL,
+                        help=f"Highest validation tier (default: {VALIDATION_LEVEL})")
+    parser.add_argument('--from-catalog', action='store_true',
+                        help="Check the files listed in the catalog database instead of walking the folder")
+    args = parser.parse_args()
+    
+    print("\n" + "=" * 80)
+    print("PDF HEALTH CHECKER")
+    print("=" * 80 + "\n")
+    
+    scan_directory(args.workers, full=args.full, with_hash=args.hash, level=args.level,
+                   timeout=args.timeout, max_rss_mb=args.max_memory, from_catalog=args.from_catalog)
+    print_summary()
+    save_report()
+
+
+if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,267 +1,677 @@
-"""
-PDF Cleaner and Repair Tool
-Repairs corrupted PDFs using multiple strategies
-Creates backups before modifications and generates detailed logs
-"""
-
-import os
-import shutil
-from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
-from pikepdf import Pdf
-import logging
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('pdf_cleaning.log'),
-        logging.StreamHandler()
-    ]
-)
-
-
-class PDFCleaner:
-    """PDF cleaning and repair utility."""
-    
-    def __init__(self, root_directory):
-        """
-        Initialize PDF Cleaner.
-        
-        Args:
-            root_directory (str): Root directory to scan for PDFs
-        """
-        self.root_dir = Path(root_directory)
-        self.backup_dir = self.root_dir / "PDF_Backups"
-        self.error_dir = self.root_dir / "PDF_Errors"
-        self.stats = {
-            'total': 0,
-            'cleaned': 0,
-            'failed': 0,
-            'skipped': 0
-        }
-    
-    def setup_directories(self):
-        """Create backup and error directories."""
-        self.backup_dir.mkdir(exist_ok=True)
-        self.error_dir.mkdir(exist_ok=True)
-        logging.info(f"Backup directory: {self.backup_dir}")
-        logging.info(f"Error directory: {self.error_dir}")
-    
-    def find_all_pdfs(self):
-        """
-        Recursively find all PDF files.
-        
-        Returns:
-            list: List of PDF file paths
-        """
-        pdf_files = list(self.root_dir.rglob("*.pdf"))
-        pdf_files.extend(self.root_dir.rglob("*.PDF"))
-        logging.info(f"Found {len(pdf_files)} PDF files")
-        return pdf_files
-    
-    def backup_pdf(self, pdf_path):
-        """
-        Create backup of original PDF.
-        
-        Args:
-            pdf_path (Path): Path to PDF file
-        """
-        relative_path = pdf_path.relative_to(self.root_dir)
-        backup_path = self.backup_dir / relative_path
-        backup_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(pdf_path, backup_path)
-        logging.info(f"Backed up: {pdf_path.name}")
-    
-    def clean_with_pikepdf(self, pdf_path):
-        """
-        Clean PDF using pikepdf (more robust for corrupted files).
-        
-        Args:
-            pdf_path (Path): Path to PDF file
-            
-        Returns:
-            bool: Success status
-        """
-        try:
-            with Pdf.open(pdf_path, allow_overwriting_input=True) as pdf:
-                if pdf.is_encrypted:
-                    logging.info(f"Removing encryption from: {pdf_path.name}")
-                
-                for page in pdf.pages:
-                    page.remove_unreferenced_resources()
-                
-                pdf.save(pdf_path, 
-                        linearize=True,
-                        compress_streams=True,
-                        preserve_pdfa=False,
-                        min_version="1.4")
-                
-                return True
-        except Exception as e:
-            logging.error(f"pikepdf failed for {pdf_path.name}: {str(e)}")
-            return False
-    
-    def clean_with_pypdf2(self, pdf_path):
-        """
-        Clean PDF using PyPDF2 (fallback method).
-        
-        Args:
-            pdf_path (Path): Path to PDF file
-            
-        Returns:
-            bool: Success status
-        """
-        try:
-            reader = PdfReader(pdf_path)
-            writer = PdfWriter()
-            
-            for page in reader.pages:
-                writer.add_page(page)
-            
-            if reader.is_encrypted:
-                logging.info(f"Removing encryption (PyPDF2): {pdf_path.name}")
-            
-            with open(pdf_path, 'wb') as output_file:
-                writer.write(output_file)
-            
-            return True
-        except Exception as e:
-            logging.error(f"PyPDF2 failed for {pdf_path.name}: {str(e)}")
-            return False
-    
-    def verify_pdf(self, pdf_path):
-        """
-        Verify PDF can be opened and read.
-        
-        Args:
-            pdf_path (Path): Path to PDF file
-            
-        Returns:
-            tuple: (is_valid: bool, message: str)
-        """
-        try:
-            with Pdf.open(pdf_path) as pdf:
-                num_pages = len(pdf.pages)
-                if num_pages == 0:
-                    return False, "No pages found"
-                return True, f"Valid PDF with {num_pages} pages"
-        except Exception as e:
-            return False, str(e)
-    
-    def move_to_errors(self, pdf_path):
-        """
-        Move problematic PDFs to error directory.
-        
-        Args:
-            pdf_path (Path): Path to PDF file
-        """
-        relative_path = pdf_path.relative_to(self.root_dir)
-        error_path = self.error_dir / relative_path
-        error_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(pdf_path), str(error_path))
-        logging.warning(f"Moved to errors: {pdf_path.name}")
-    
-    def clean_pdf(self, pdf_path):
-        """
-        Main cleaning process for a single PDF.
-        
-        Args:
-            pdf_path (Path): Path to PDF file
-            
-        Returns:
-            bool: Success status
-        """
-        self.stats['total'] += 1
-        logging.info(f"\n{'='*60}")
-        logging.info(f"Processing [{self.stats['total']}]: {pdf_path.name}")
-        logging.info(f"Path: {pdf_path.relative_to(self.root_dir)}")
-        
-        if not pdf_path.exists() or pdf_path.stat().st_size == 0:
-            logging.error(f"File missing or empty: {pdf_path.name}")
-            self.stats['failed'] += 1
-            return False
-        
-        is_valid, msg = self.verify_pdf(pdf_path)
-        if is_valid:
-            logging.info(f"Pre-check: {msg}")
-        else:
-            logging.warning(f"Pre-check failed: {msg}")
-        
-        try:
-            self.backup_pdf(pdf_path)
-        except Exception as e:
-            logging.error(f"Backup failed: {str(e)}")
-            self.stats['failed'] += 1
-            return False
-        
-        success = self.clean_with_pikepdf(pdf_path)
-        
-        if not success:
-            logging.info("Trying PyPDF2 as fallback...")
-            success = self.clean_with_pypdf2(pdf_path)
-        
-        if success:
-            is_valid, msg = self.verify_pdf(pdf_path)
-            if is_valid:
-                logging.info(f"✓ Successfully cleaned: {msg}")
-                self.stats['cleaned'] += 1
-                return True
-            else:
-                logging.error(f"Verification failed after cleaning: {msg}")
-                self.move_to_errors(pdf_path)
-                self.stats['failed'] += 1
-                return False
-        else:
-            logging.error(f"✗ Failed to clean")
-            self.move_to_errors(pdf_path)
-            self.stats['failed'] += 1
-            return False
-    
-    def clean_all(self):
-        """Clean all PDFs in the directory tree."""
-        print("\n" + "="*60)
-        print("PDF CLEANER - Starting Process")
-        print("="*60 + "\n")
-        
-        self.setup_directories()
-        pdf_files = self.find_all_pdfs()
-        
-        if not pdf_files:
-            logging.warning("No PDF files found!")
-            return
-        
-        print(f"\nFound {len(pdf_files)} PDF files to process")
-        response = input("Do you want to continue? (yes/no): ").strip().lower()
-        
-        if response not in ['yes', 'y']:
-            print("Operation cancelled.")
-            return
-        
-        for pdf_path in pdf_files:
-            self.clean_pdf(pdf_path)
-        
-        print("\n" + "="*60)
-        print("CLEANING COMPLETE - SUMMARY")
-        print("="*60)
-        print(f"Total PDFs found:      {self.stats['total']}")
-        print(f"Successfully cleaned:  {self.stats['cleaned']}")
-        print(f"Failed/Moved to errors: {self.stats['failed']}")
-        print(f"Success rate:          {(self.stats['cleaned']/self.stats['total']*100):.1f}%")
-        print(f"\nBackups saved in:      {self.backup_dir}")
-        print(f"Problem files in:      {self.error_dir}")
-        print(f"Detailed log:          pdf_cleaning.log")
-        print("="*60 + "\n")
-
-
-def main():
-    """Main execution function."""
-    ROOT_DIRECTORY = "."
-    
-    cleaner = PDFCleaner(ROOT_DIRECTORY)
-    cleaner.clean_all()
-
-
-if __name__ == "__main__":
+"""
+PDF Cleaner and Repair Tool
+Repairs corrupted PDFs using multiple strategies
+Creates backups before modifications and generates detailed logs
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from PyPDF2 import PdfReader, PdfWriter
+from pikepdf import Pdf
+import logging
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.catalog_db import open_catalog
+from common.content_store import ContentStore, file_sha256, link_or_copy
+from common.watchdog import Watchdog, FILE_TIMEOUT, MAX_RSS_MB
+from download.json_store import JsonStore, utc_now
+from validation.health_checker import unused_path
+from validation.pdf_structure import HEADER_WINDOW, quick_check
+
+# Configuration
+SELECTIVE = True  # only back up and rewrite files the pre-check finds damaged (False = rewrite every file)
+WORKERS = os.cpu_count() or 1  # cleaning processes
+BACKUP_GENERATIONS = 3  # backups kept per file, newest first; older ones are deleted
+RECORD_NAME = ".cleaning_record.json"  # per-file record of what the last run did, kept in the root
+
+# Pre-check verdicts
+HEALTHY = 'healthy'  # opens cleanly: left as is in selective mode
+REPAIRABLE = 'repairable'  # damaged, encrypted or recovered with warnings: worth a rewrite
+HOPELESS = 'hopeless'  # empty, not a PDF or without pages: straight to the error directory
+
+# Backup generation names: <stem>.<UTC time>.<first 12 hex digits of sha256><suffix>
+BACKUP_NAME = re.compile(r'\.(\d{8}T\d{6})\.([0-9a-f]{12})')
+UNCHANGED = 'unchanged'  # backup mode when the content is already backed up
+
+# What was done to a file
+KEPT = 'kept'
+REWRITTEN = 'rewritten'
+MOVED = 'moved to errors'
+FAILED = 'failed'
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_FILE = 'pdf_cleaning.log'  # run log: one line per file, plus the details sent by the workers
+
+
+class CleaningRecord(JsonStore):
+    """Persisted relative path -> {status, action, message, size, cleaned} of every file a run looked at."""
+
+    def __init__(self, root_directory, name=RECORD_NAME):
+        """
+        Load (or start) the record stored in the cleaned tree.
+
+        Args:
+            root_directory (str): Tree the record belongs to
+            name (str): Record file name inside the root
+        """
+        super().__init__(root_directory, name)
+
+    def record(self, pdf_path, status, action, message):
+        """
+        Store what was done to a file.
+
+        Args:
+            pdf_path (Path): Original path of the PDF (it may have been moved since)
+            status (str): Pre-check verdict (HEALTHY, REPAIRABLE or HOPELESS)
+            action (str): KEPT, REWRITTEN, MOVED or FAILED
+            message (str): Check or repair message
+        """
+        key = os.path.relpath(pdf_path, self.root_dir).replace(os.sep, '/')
+        with self._lock:
+            self.entries[key] = {
+                'status': status,
+                'action': action,
+                'message': message,
+                'size': pdf_path.stat().st_size if pdf_path.exists() else None,
+                'cleaned': utc_now(),
+            }
+            self._mark_dirty(key)
+
+
+class PDFCleaner:
+    """PDF cleaning and repair utility."""
+    
+    def __init__(self, root_directory, store_directory=None, selective=SELECTIVE):
+        """
+        Initialize PDF Cleaner.
+        
+        Args:
+            root_directory (str): Root directory to scan for PDFs
+            store_directory (str): Content store for linked backups (optional)
+            selective (bool): Leave healthy files untouched instead of
+                backing up and rewriting every file
+        """
+        self.root_dir = Path(root_directory)
+        self.store_dir = store_directory
+        self.selective = selective
+        self.backup_dir = self.root_dir / "PDF_Backups"
+        self.error_dir = self.root_dir / "PDF_Errors"
+        self.store = ContentStore(store_directory) if store_directory else None
+        self.last_moved_to = None  # where the last clean_pdf call moved its file, if anywhere
+        self.stats = {
+            'total': 0,
+            'cleaned': 0,
+            'failed': 0,
+            'skipped': 0
+        }
+    
+    def setup_directories(self):
+        """Create backup and error directories."""
+        self.backup_dir.mkdir(exist_ok=True)
+        self.error_dir.mkdir(exist_ok=True)
+        logging.info(f"Backup directory: {self.backup_dir}")
+        logging.info(f"Error directory: {self.error_dir}")
+    
+    def find_all_pdfs(self, catalog=None):
+        """
+        Find all PDF files, outside the backup and error directories.
+        
+        With a catalog database the files it knows to be on disk are listed
+        without touching the tree; otherwise the tree is walked once
+        (matching .pdf in any case).
+        
+        Args:
+            catalog (CatalogDB): Shared paper catalog to list the files from (optional)
+            
+        Returns:
+            list: List of PDF file paths
+        """
+        if catalog is not None:
+            pdf_files = catalog.paths()
+        else:
+            pdf_files = []
+            for root, dirs, files in os.walk(self.root_dir):
+                root = Path(root)
+                dirs[:] = [d for d in dirs if root / d not in (self.backup_dir, self.error_dir)]
+                pdf_files.extend(root / name for name in files if name.lower().endswith('.pdf'))
+        logging.info(f"Found {len(pdf_files)} PDF files")
+        return pdf_files
+    
+    def backup_generations(self, pdf_path):
+        """
+        List the backups kept for a file.
+        
+        Args:
+            pdf_path (Path): Path to PDF file in the tree
+            
+        Returns:
+            tuple: (backup folder: Path, generations: list of (time, hash prefix, Path) newest first)
+        """
+        folder = (self.backup_dir / pdf_path.relative_to(self.root_dir)).parent
+        if not folder.is_dir():
+            return folder, []
+        stem, suffix = pdf_path.stem, pdf_path.suffix
+        generations = []
+        for entry in folder.iterdir():
+            name = entry.name
+            if name.startswith(stem) and name.endswith(suffix) and len(name) > len(stem) + len(suffix):
+                match = BACKUP_NAME.fullmatch(name[len(stem):len(name) - len(suffix)])
+                if match:
+                    generations.append((match.group(1), match.group(2), entry))
+        generations.sort(reverse=True)
+        return folder, generations
+    
+    def backup_pdf(self, pdf_path):
+        """
+        Back up the original PDF as a new generation, keyed by its content hash.
+        
+        Content that is already backed up is never copied again: its
+        generation is just renamed to the current time. New content is
+        reflinked (copy-on-write clone) where the filesystem supports it,
+        else hardlinked (safe because repairs rename a new file over the
+        original instead of writing into it), else copied. With a content
+        store the generation links to the original's blob instead, so
+        identical backups share one blob. Only BACKUP_GENERATIONS backups
+        per file are kept.
+        
+        Args:
+            pdf_path (Path): Path to PDF file
+            
+        Returns:
+            tuple: (backup_path: Path, mode: str) with mode REFLINK, HARDLINK, COPY or UNCHANGED
+        """
+        folder, generations = self.backup_generations(pdf_path)
+        folder.mkdir(parents=True, exist_ok=True)
+        if self.store:
+            sha256, _ = self.store.ingest(pdf_path)
+        else:
+            sha256 = file_sha256(pdf_path)
+        
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        backup_path = folder / f"{pdf_path.stem}.{stamp}.{sha256[:12]}{pdf_path.suffix}"
+        same = next((generation for generation in generations if generation[1] == sha256[:12]), None)
+        if same is not None:
+            os.replace(same[2], backup_path)
+            generations.remove(same)
+            mode = UNCHANGED
+        elif self.store:
+            mode = self.store.materialize(sha256, backup_path)
+        else:
+            mode = link_or_copy(pdf_path, backup_path, prefer_reflink=True)
+        logging.info(f"Backed up ({mode}): {backup_path.name}")
+        
+        for _, _, old_path in generations[max(0, BACKUP_GENERATIONS - 1):]:
+            old_path.unlink()
+            logging.info(f"Removed old backup: {old_path.name}")
+        return backup_path, mode
+    
+    @staticmethod
+    def _temp_path(pdf_path):
+        """Scratch file the cleaned PDF is written to before replacing the original."""
+        return pdf_path.with_name(pdf_path.name + '.tmp')
+    
+    def clean_with_pikepdf(self, pdf_path, pdf=None):
+        """
+        Clean PDF using pikepdf (more robust for corrupted files).
+        
+        The result is written to the scratch file only; clean_pdf verifies
+        it and renames it over the original, never writing into the
+        original's inode (which may be shared with backups).
+        
+        Args:
+            pdf_path (Path): Path to PDF file
+            pdf (pikepdf.Pdf): The file already opened by the pre-check (optional)
+            
+        Returns:
+            bool: Success status
+        """
+        temp_path = self._temp_path(pdf_path)
+        try:
+            if pdf is None:
+                pdf = Pdf.open(pdf_path)
+            with pdf:
+                if pdf.is_encrypted:
+                    logging.info(f"Removing encryption from: {pdf_path.name}")
+                
+                for page in pdf.pages:
+                    page.remove_unreferenced_resources()
+                
+                pdf.save(temp_path, 
+                        linearize=True,
+                        compress_streams=True,
+                        preserve_pdfa=False,
+                        min_version="1.4")
+            return True
+        except Exception as e:
+            logging.error(f"pikepdf failed for {pdf_path.name}: {str(e)}")
+            if temp_path.exists():
+                temp_path.unlink()
+            return False
+    
+    def clean_with_pypdf2(self, pdf_path):
+        """
+        Clean PDF using PyPDF2 (fallback method), writing the scratch file only.
+        
+        Args:
+            pdf_path (Path): Path to PDF file
+            
+        Returns:
+            bool: Success status
+        """
+        temp_path = self._temp_path(pdf_path)
+        try:
+            reader = PdfReader(pdf_path)
+            writer = PdfWriter()
+            
+            for page in reader.pages:
+                writer.add_page(page)
+            
+            if reader.is_encrypted:
+                logging.info(f"Removing encryption (PyPDF2): {pdf_path.name}")
+            
+            with open(temp_path, 'wb') as output_file:
+                writer.write(output_file)
+            return True
+        except Exception as e:
+            logging.error(f"PyPDF2 failed for {pdf_path.name}: {str(e)}")
+            if temp_path.exists():
+                temp_path.unlink()
+            return False
+    
+    def verify_pdf(self, pdf_path):
+        """
+        Verify PDF can be opened and read.
+        
+        The memory-mapped structural check answers first; pikepdf only
+        opens files it cannot decide.
+        
+        Args:
+            pdf_path (Path): Path to PDF file
+            
+        Returns:
+            tuple: (is_valid: bool, message: str)
+        """
+        is_valid, message, num_pages = quick_check(pdf_path)
+        if is_valid is not None:
+            return is_valid, f"Valid PDF with {num_pages} pages" if is_valid else message
+        try:
+            with Pdf.open(pdf_path) as pdf:
+                num_pages = len(pdf.pages)
+                if num_pages == 0:
+                    return False, "No pages found"
+                return True, f"Valid PDF with {num_pages} pages"
+        except Exception as e:
+            return False, str(e)
+    
+    @staticmethod
+    def _has_pdf_header(pdf_path):
+        """Whether a %PDF- header appears near the start of the file."""
+        try:
+            with open(pdf_path, 'rb') as f:
+                return b'%PDF-' in f.read(HEADER_WINDOW)
+        except OSError:
+            return False
+    
+    def _classify(self, pdf_path):
+        """
+        Pre-check a PDF (see classify_pdf), keeping pikepdf's parse for the repair.
+        
+        Returns:
+            tuple: (status: str, message: str, pdf: pikepdf.Pdf or None)
+                   pdf is the open document when the check had to parse the
+                   file and it needs repair; the caller closes it
+        """
+        if not pdf_path.exists() or pdf_path.stat().st_size == 0:
+            return HOPELESS, "File missing or empty", None
+        
+        is_valid, message, num_pages = quick_check(pdf_path)
+        if is_valid:
+            return HEALTHY, f"Valid PDF with {num_pages} pages", None
+        if is_valid is False and not self._has_pdf_header(pdf_path):
+            return HOPELESS, message, None
+        
+        try:
+            pdf = Pdf.open(pdf_path)
+        except Exception as e:
+            # Header present: PyPDF2 may still get the pages out
+            return REPAIRABLE, str(e).replace(str(pdf_path), '').lstrip(' :'), None
+        try:
+            num_pages = len(pdf.pages)
+            warnings = pdf.get_warnings()
+        except Exception as e:
+            pdf.close()
+            return REPAIRABLE, str(e).replace(str(pdf_path), '').lstrip(' :'), None
+        
+        if num_pages == 0:
+            status, message = HOPELESS, "No pages found"
+        elif is_valid is False:
+            # qpdf silently recovers e.g. a missing %%EOF; the structural damage still needs a rewrite
+            status = REPAIRABLE
+        elif pdf.is_encrypted:
+            status, message = REPAIRABLE, f"Encrypted ({num_pages} pages)"
+        elif warnings:
+            warning = warnings[0].replace(str(pdf_path), '').lstrip(' :,')
+            status, message = REPAIRABLE, f"Recovered with {len(warnings)} warnings: {warning[:60]}"
+        else:
+            status, message = HEALTHY, f"Valid PDF with {num_pages} pages"
+        if status == HOPELESS or (status == HEALTHY and self.selective):
+            pdf.close()
+            pdf = None
+        return status, message, pdf
+    
+    def classify_pdf(self, pdf_path):
+        """
+        Decide whether a PDF needs repair, cheapest check first.
+        
+        The memory-mapped structural check settles most files; pikepdf only
+        opens the ones it cannot decide. Files qpdf had to recover (it
+        reports warnings), encrypted files and truncated files are
+        repairable; empty files, files without a %PDF- header and files
+        without pages are hopeless.
+        
+        Args:
+            pdf_path (Path): Path to PDF file
+            
+        Returns:
+            tuple: (status: str, message: str) with status HEALTHY, REPAIRABLE or HOPELESS
+        """
+        status, message, pdf = self._classify(pdf_path)
+        if pdf is not None:
+            pdf.close()
+        return status, message
+    
+    def move_to_errors(self, pdf_path):
+        """
+        Move problematic PDFs to error directory.
+        
+        A file moved there by an earlier run is never overwritten; the
+        newcomer gets a numbered name instead ('name (1).pdf').
+        
+        Args:
+            pdf_path (Path): Path to PDF file
+            
+        Returns:
+            Path: Where the file went
+        """
+        relative_path = pdf_path.relative_to(self.root_dir)
+        error_path = Path(unused_path(str(self.error_dir / relative_path)))
+        error_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(pdf_path), str(error_path))
+        logging.warning(f"Moved to errors: {error_path.relative_to(self.error_dir)}")
+        self.last_moved_to = error_path
+        return error_path
+    
+    def clean_pdf(self, pdf_path):
+        """
+        Main cleaning process for a single PDF.
+        
+        Healthy files are left alone in selective mode and hopeless ones
+        go straight to the error directory. The rest are parsed once (the
+        pre-check's pikepdf document is reused), written to a scratch file,
+        verified from the written bytes by the memory-mapped check, backed
+        up (see backup_pdf: reflink, else hardlink, else copy) and atomically
+        renamed over the original. Where a moved file ended up is left in
+        last_moved_to.
+        
+        Args:
+            pdf_path (Path): Path to PDF file
+            
+        Returns:
+            tuple: (status: str, action: str, message: str)
+        """
+        self.stats['total'] += 1
+        self.last_moved_to = None
+        logging.info(f"\n{'='*60}")
+        logging.info(f"Processing [{self.stats['total']}]: {pdf_path.name}")
+        logging.info(f"Path: {pdf_path.relative_to(self.root_dir)}")
+        
+        status, msg, pdf = self._classify(pdf_path)
+        if status == HOPELESS:
+            logging.error(f"✗ Not repairable: {msg}")
+            if pdf_path.exists():
+                self.move_to_errors(pdf_path)
+            self.stats['failed'] += 1
+            return status, MOVED, msg
+        if status == HEALTHY and self.selective:
+            logging.info(f"✓ Healthy, left as is: {msg}")
+            self.stats['skipped'] += 1
+            return status, KEPT, msg
+        if status == HEALTHY:
+            logging.info(f"Pre-check: {msg}")
+        else:
+            logging.warning(f"Pre-check failed: {msg}")
+        
+        temp_path = self._temp_path(pdf_path)
+        success = self.clean_with_pikepdf(pdf_path, pdf)
+        
+        if not success:
+            logging.info("Trying PyPDF2 as fallback...")
+            success = self.clean_with_pypdf2(pdf_path)
+        
+        if not success:
+            logging.error(f"✗ Failed to clean")
+            self.move_to_errors(pdf_path)
+            self.stats['failed'] += 1
+            return status, MOVED, "pikepdf and PyPDF2 could not rewrite it"
+        
+        is_valid, msg = self.verify_pdf(temp_path)
+        if not is_valid:
+            logging.error(f"Verification failed after cleaning: {msg}")
+            temp_path.unlink()
+            self.move_to_errors(pdf_path)
+            self.stats['failed'] += 1
+            return status, MOVED, f"Verification failed after cleaning: {msg}"
+        
+        try:
+            self.backup_pdf(pdf_path)
+        except Exception as e:
+            logging.error(f"Backup failed: {str(e)}")
+            temp_path.unlink()
+            self.stats['failed'] += 1
+            return status, FAILED, f"Backup failed: {str(e)[:60]}"
+        
+        os.replace(temp_path, pdf_path)
+        logging.info(f"✓ Successfully cleaned: {msg}")
+        self.stats['cleaned'] += 1
+        return status, REWRITTEN, msg
+    
+    def clean_watched(self, pdf_files, record=None, workers=WORKERS, catalog=None):
+        """
+        Clean files in parallel watchdog worker processes.
+        
+        Each worker holds one file at a time and files are handed out as
+        workers free up, so at most `workers` files are in flight. Workers
+        send their log records through a queue to this process, which writes
+        them to the log files (not the console). Results come back to this
+        process as well, which alone updates the stats, the record, the
+        catalog database and the run log. A file that hangs pikepdf/PyPDF2 past FILE_TIMEOUT or
+        drives its worker over MAX_RSS_MB is killed, its scratch file
+        removed and the original moved to the error directory; the run
+        carries on.
+        
+        Args:
+            pdf_files (list): PDF paths to clean
+            record (CleaningRecord): Where to note what was done to each file (optional)
+            workers (int): Cleaning processes
+            catalog (CatalogDB): Shared paper catalog to record verdicts in (optional)
+        """
+        log_queue = multiprocessing.Queue()
+        file_handlers = [handler for handler in logging.getLogger().handlers
+                         if isinstance(handler, logging.FileHandler)]
+        listener = QueueListener(log_queue, *file_handlers)
+        listener.start()
+        try:
+            self._clean_in_workers(pdf_files, record, workers, catalog, log_queue)
+        finally:
+            listener.stop()
+            log_queue.close()
+    
+    def _clean_in_workers(self, pdf_files, record, workers, catalog, log_queue):
+        """Run the watchdog over pdf_files and handle each result (see clean_watched)."""
+        watchdog = Watchdog(partial(_clean_in_worker, log_queue=log_queue), workers=workers,
+                            timeout=FILE_TIMEOUT, max_rss_mb=MAX_RSS_MB)
+        jobs = ((str(self.root_dir), self.store_dir, self.selective, str(pdf_path)) for pdf_path in pdf_files)
+        for job, result, failure in watchdog.imap_unordered(jobs):
+            pdf_path = Path(job[3])
+            self.stats['total'] += 1
+            if failure is not None:
+                logging.error(f"✗ Stopped while cleaning {pdf_path.name}: {failure[1]}")
+                temp_path = self._temp_path(pdf_path)
+                if temp_path.exists():
+                    temp_path.unlink()
+                if pdf_path.exists():
+                    self.move_to_errors(pdf_path)
+                result = (HOPELESS, MOVED, failure[1])
+            status, action, message = result
+            outcome = {KEPT: 'skipped', REWRITTEN: 'cleaned'}.get(action, 'failed')
+            self.stats[outcome] += 1
+            log = logging.error if outcome == 'failed' else logging.info
+            log(f"{'✗' if outcome == 'failed' else '✓'} [{self.stats['total']}/{len(pdf_files)}] "
+                f"{pdf_path.relative_to(self.root_dir)}: {action} ({message})")
+            if record is not None:
+                record.record(pdf_path, status, action, message)
+            if catalog is not None:
+                catalog.record_check(pdf_path, action in (KEPT, REWRITTEN), message)
+    
+    def clean_all(self, workers=WORKERS, confirm=True, from_catalog=False):
+        """
+        Clean all PDFs in the directory tree.
+        
+        Args:
+            workers (int): Cleaning processes
+            confirm (bool): Ask before starting (False for scheduled, unattended runs)
+            from_catalog (bool): Clean the files the catalog database lists
+                instead of walking the tree (otherwise the catalog is only
+                updated if the root already has one)
+        """
+        print("\n" + "="*60)
+        print("PDF CLEANER - Starting Process")
+        print("="*60 + "\n")
+        
+        self.setup_directories()
+        catalog = open_catalog(self.root_dir, create=from_catalog)
+        pdf_files = self.find_all_pdfs(catalog if from_catalog else None)
+        
+        if not pdf_files:
+            logging.warning("No PDF files found!")
+            if catalog:
+                catalog.close()
+            return
+        
+        print(f"\nFound {len(pdf_files)} PDF files to process ({workers} workers)")
+        if confirm:
+            response = input("Do you want to continue? (yes/no): ").strip().lower()
+            
+            if response not in ['yes', 'y']:
+                print("Operation cancelled.")
+                if catalog:
+                    catalog.close()
+                return
+        
+        record = CleaningRecord(self.root_dir)
+        try:
+            self.clean_watched(pdf_files, record, workers, catalog)
+        finally:
+            record.save()
+            if catalog:
+                catalog.close()
+        
+        rewritten = self.stats['total'] - self.stats['skipped']
+        print("\n" + "="*60)
+        print("CLEANING COMPLETE - SUMMARY")
+        print("="*60)
+        print(f"Total PDFs found:      {self.stats['total']}")
+        print(f"Healthy, left as is:   {self.stats['skipped']}")
+        print(f"Successfully cleaned:  {self.stats['cleaned']}")
+        print(f"Failed/Moved to errors: {self.stats['failed']}")
+        if rewritten:
+            print(f"Success rate:          {(self.stats['cleaned']/rewritten*100):.1f}%")
+        print(f"\nBackups saved in:      {self.backup_dir}")
+        print(f"Problem files in:      {self.error_dir}")
+        print(f"Per-file record:       {record.path}")
+        print(f"Run log:               {LOG_FILE}")
+        print("="*60 + "\n")
+
+
+def setup_logging():
+    """Log to LOG_FILE and the console (only when run as a script, never on import)."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        handlers=[
+            logging.FileHandler(LOG_FILE),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def _setup_worker_logging(log_queue):
+    """Send this process's log records to the parent through log_queue instead of the log file and console."""
+    root = logging.getLogger()
+    if any(getattr(handler, 'queue', None) is log_queue for handler in root.handlers):
+        return
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+
+
+_worker_cleaner = None  # the cleaner of this worker process, kept between files
+
+
+def _clean_in_worker(job, log_queue):
+    """
+    Clean one file inside a watchdog worker.
+    
+    Args:
+        job (tuple): (root_directory, store_directory, selective, pdf_path)
+        log_queue (multiprocessing.Queue): Where this worker's log records go
+        
+    Returns:
+        tuple: (status, action, message) from clean_pdf
+    """
+    global _worker_cleaner
+    _setup_worker_logging(log_queue)
+    root_directory, store_directory, selective, pdf_path = job
+    if _worker_cleaner is None or (str(_worker_cleaner.root_dir), _worker_cleaner.store_dir,
+                                   _worker_cleaner.selective) != (str(Path(root_directory)), store_directory, selective):
+        _worker_cleaner = PDFCleaner(root_directory, store_directory, selective)
+    return _worker_cleaner.clean_pdf(Path(pdf_path))
+
+
+def main():
+    """Main execution function."""
+    ROOT_DIRECTORY = "."
+    STORE_DIRECTORY = None  # e.g. "Cambridge_Papers_Store" for linked, deduplicated backups
+    
+    parser = argparse.ArgumentParser(description="Repair damaged PDFs in a directory tree")
+    parser.add_argument('root', nargs='?', default=ROOT_DIRECTORY,
+                        help=f"Directory to clean (default: {ROOT_DIRECTORY})")
+    parser.add_argument('--store', default=STORE_DIRECTORY,
+                        help="Content store for linked, deduplicated backups")
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f"Cleaning processes (default: {WORKERS})")
+    parser.add_argument('--all', action='store_true', default=not SELECTIVE,
+                        help="Back up and rewrite every file, not only damaged ones")
+    parser.add_argument('--yes', action='store_true',
+                        help="Start without asking (for scheduled runs)")
+    parser.add_argument('--from-catalog', action='store_true',
+                        help="Clean the files listed in the catalog database instead of walking the tree")
+    args = parser.parse_args()
+    
+    setup_logging()
+    cleaner = PDFCleaner(args.root, args.store, selective=not args.all)
+    cleaner.clean_all(args.workers, confirm=not args.yes, from_catalog=args.from_catalog)
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
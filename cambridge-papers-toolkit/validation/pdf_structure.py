@@ -0,0 +1,476 @@
+"""
+Tiered PDF Validation
+Fast structural check that memory-maps a PDF and reads only its header, trailer and page tree root
+Answers "is this file sane and how many pages" without building an object model; escalates when unsure
+"""
+
+import argparse
+import mmap
+import os
+import re
+import sys
+import tempfile
+import zlib
+
+# Validation tiers, cheapest first
+TIER_FAST = 'fast'  # mmap structural check; escalates to standard when inconclusive
+TIER_STANDARD = 'standard'  # full PyPDF2 open (the original health check)
+TIER_DEEP = 'deep'  # standard, then decode every stream and render sample pages (deep_validator.py)
+TIERS = (TIER_FAST, TIER_STANDARD, TIER_DEEP)
+
+# Configuration
+HEADER_WINDOW = 1024  # bytes searched for %PDF- at the start of the file
+TAIL_WINDOW = 2048  # bytes searched for %%EOF and startxref at the end
+MAX_XREF_SECTIONS = 32  # /Prev chain length before giving up (incremental updates)
+
+_STARTXREF = re.compile(rb'startxref\s+(\d+)')
+_OBJECT_HEADER = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj\b\s*')
+_SUBSECTION = re.compile(rb'\s*(\d+)\s+(\d+)\s')
+_XREF_ENTRY = re.compile(rb'\s*(\d{10})\s(\d{5})\s([nf])')
+_TRAILER = re.compile(rb'\s*trailer\s*')
+_STREAM = re.compile(rb'\s*stream\r?\n')
+_DICTIONARY_TOKEN = re.compile(rb'<<|>>|<|\(')
+_STRING_TOKEN = re.compile(rb'\\.|[()]', re.DOTALL)
+_WHITESPACE = b' \t\r\n\f\x00'
+
+
+class Inconclusive(Exception):
+    """The fast tier cannot decide; the file needs a full parse."""
+
+
+def _reference(dictionary, key):
+    """Object number of an indirect reference ('/Key 12 0 R'), or None."""
+    match = re.search(rb'/' + key + rb'\s+(\d+)\s+\d+\s+R', dictionary)
+    return int(match.group(1)) if match else None
+
+
+def _integer(dictionary, key):
+    """Direct integer value of a key, or None (indirect values count as missing)."""
+    match = re.search(rb'/' + key + rb'\s+(\d+)(?!\d)(?!\s+\d+\s+R)', dictionary)
+    return int(match.group(1)) if match else None
+
+
+def _integers(dictionary, key):
+    """Integer array value of a key ('/W [1 2 1]'), or None."""
+    match = re.search(rb'/' + key + rb'\s*\[([\d\s]*)\]', dictionary)
+    return [int(number) for number in match.group(1).split()] if match else None
+
+
+def _dictionary(data, start):
+    """
+    Find the end of the dictionary starting at data[start] ('<<').
+
+    Nested dictionaries, hex strings and literal strings are skipped, so
+    '>>' inside them does not end the dictionary early.
+
+    Args:
+        data (bytes or mmap): Buffer holding the dictionary
+        start (int): Offset of the opening '<<'
+
+    Returns:
+        int: Offset just past the matching '>>'
+    """
+    if data[start:start + 2] != b'<<':
+        raise Inconclusive("Expected a dictionary")
+    depth = 0
+    position = start
+    while True:
+        token = _DICTIONARY_TOKEN.search(data, position)
+        if not token:
+            break
+        position = token.end()
+        if token.group() == b'<<':
+            depth += 1
+        elif token.group() == b'>>':
+            depth -= 1
+            if depth == 0:
+                return position
+        elif token.group() == b'<':
+            position = data.find(b'>', position) + 1
+            if position == 0:
+                break
+        else:
+            nesting = 1
+            while nesting:
+                char = _STRING_TOKEN.search(data, position)
+                if not char:
+                    raise Inconclusive("Unterminated string")
+                position = char.end()
+                if char.group() == b'(':
+                    nesting += 1
+                elif char.group() == b')':
+                    nesting -= 1
+    raise Inconclusive("Unterminated dictionary")
+
+
+def _skip_whitespace(data, position):
+    """Offset of the next non-whitespace byte."""
+    while data[position:position + 1] and data[position:position + 1] in _WHITESPACE:
+        position += 1
+    return position
+
+
+def _unpredict(raw, columns):
+    """Undo PNG row predictors (PDF /Predictor 10-15) on 8-bit, 1-colour rows."""
+    row_length = columns + 1
+    previous = bytearray(columns)
+    output = bytearray()
+    for start in range(0, len(raw) - row_length + 1, row_length):
+        kind = raw[start]
+        row = bytearray(raw[start + 1:start + row_length])
+        for i in range(columns):
+            left = row[i - 1] if i else 0
+            up = previous[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + ((left + up) >> 1)) & 0xFF
+            elif kind == 4:
+                up_left = previous[i - 1] if i else 0
+                estimate = left + up - up_left
+                distances = (abs(estimate - left), abs(estimate - up), abs(estimate - up_left))
+                row[i] = (row[i] + (left, up, up_left)[distances.index(min(distances))]) & 0xFF
+            elif kind != 0:
+                raise Inconclusive(f"Unknown PNG predictor {kind}")
+        output += row
+        previous = row
+    return bytes(output)
+
+
+def _stream_data(data, dictionary_end, dictionary):
+    """
+    Decode the stream following a stream dictionary (FlateDecode or unfiltered only).
+
+    Args:
+        data (bytes or mmap): Buffer holding the object
+        dictionary_end (int): Offset just past the stream dictionary
+        dictionary (bytes): The stream dictionary
+
+    Returns:
+        bytes: Decoded stream contents
+    """
+    match = _STREAM.match(data, dictionary_end)
+    if not match:
+        raise Inconclusive("Stream keyword missing")
+    start = match.end()
+    if _reference(dictionary, b'Length') is not None:
+        raise Inconclusive("Stream /Length is an indirect reference")
+    length = _integer(dictionary, b'Length')
+    if length is None:
+        end = data.find(b'endstream', start)
+        if end < 0:
+            raise Inconclusive("Unterminated stream")
+        raw = bytes(data[start:end]).rstrip(b'\r\n')
+    else:
+        raw = bytes(data[start:start + length])
+
+    match = re.search(rb'/Filter\s*(\[[^\]]*\]|/\w+)', dictionary)
+    filters = re.findall(rb'/(\w+)', match.group(1)) if match else []
+    if filters not in ([], [b'FlateDecode']):
+        raise Inconclusive(f"Unsupported stream filter {filters}")
+    if filters:
+        raw = zlib.decompressobj().decompress(raw)
+
+    predictor = _integer(dictionary, b'Predictor') or 1
+    if predictor >= 10:
+        if (_integer(dictionary, b'Colors') or 1) != 1 or (_integer(dictionary, b'BitsPerComponent') or 8) != 8:
+            raise Inconclusive("Unsupported predictor parameters")
+        raw = _unpredict(raw, _integer(dictionary, b'Columns') or 1)
+    elif predictor != 1:
+        raise Inconclusive(f"Unsupported predictor {predictor}")
+    return raw
+
+
+def _read_object(data, offset, number=None):
+    """
+    Locate an object's dictionary at a byte offset.
+
+    Args:
+        data (bytes or mmap): File contents
+        offset (int): Offset the cross-reference data points to
+        number (int): Expected object number (checked when given)
+
+    Returns:
+        tuple: (dictionary: bytes, dictionary_end: int)
+    """
+    match = _OBJECT_HEADER.match(data, offset)
+    if number is None and not match:
+        raise Inconclusive("startxref does not point at cross-reference data")
+    if not match or (number is not None and int(match.group(1)) != number):
+        raise Inconclusive(f"Cross-reference offset of object {number} is wrong")
+    start = match.end()
+    end = _dictionary(data, start)
+    return bytes(data[start:end]), end
+
+
+def _read_xref_table(data, position, entries):
+    """
+    Read a classic 'xref' table and its trailer.
+
+    Newer sections are read first, so objects already in entries win.
+    Free entries are ignored.
+
+    Returns:
+        bytes: Trailer dictionary
+    """
+    while True:
+        trailer = _TRAILER.match(data, position)
+        if trailer:
+            end = _dictionary(data, trailer.end())
+            return bytes(data[trailer.end():end])
+        subsection = _SUBSECTION.match(data, position)
+        if not subsection:
+            raise Inconclusive("Malformed cross-reference table")
+        first, count = int(subsection.group(1)), int(subsection.group(2))
+        position = subsection.end() - 1
+        for number in range(first, first + count):
+            entry = _XREF_ENTRY.match(data, position)
+            if not entry:
+                raise Inconclusive("Malformed cross-reference entry")
+            position = entry.end()
+            if entry.group(3) == b'n':
+                entries.setdefault(number, (1, int(entry.group(1)), int(entry.group(2))))
+
+
+def _read_xref_stream(data, offset, entries):
+    """
+    Read a cross-reference stream (PDF 1.5+) into entries.
+
+    Returns:
+        bytes: Stream dictionary (it doubles as the trailer)
+    """
+    dictionary, end = _read_object(data, offset)
+    if not re.search(rb'/Type\s*/XRef\b', dictionary):
+        raise Inconclusive("startxref does not point at cross-reference data")
+    widths = _integers(dictionary, b'W')
+    size = _integer(dictionary, b'Size')
+    if not widths or len(widths) != 3 or size is None:
+        raise Inconclusive("Malformed cross-reference stream")
+    index = _integers(dictionary, b'Index') or [0, size]
+    rows = _stream_data(data, end, dictionary)
+
+    row_length = sum(widths)
+    position = 0
+    for first, count in zip(index[0::2], index[1::2]):
+        for number in range(first, first + count):
+            row = rows[position:position + row_length]
+            if len(row) < row_length:
+                raise Inconclusive("Short cross-reference stream")
+            position += row_length
+            fields = []
+            column = 0
+            for width in widths:
+                fields.append(int.from_bytes(row[column:column + width], 'big'))
+                column += width
+            kind = fields[0] if widths[0] else 1
+            if kind in (1, 2):
+                entries.setdefault(number, (kind, fields[1], fields[2]))
+    return dictionary
+
+
+def _resolve(data, entries, number, object_streams):
+    """
+    Get the dictionary of an object through the cross-reference entries.
+
+    Args:
+        data (bytes or mmap): File contents
+        entries (dict): Object number -> (type, offset or stream, generation or index)
+        number (int): Object to resolve
+        object_streams (dict): Decoded object streams (filled on demand)
+
+    Returns:
+        bytes: Object dictionary
+    """
+    entry = entries.get(number)
+    if entry is None:
+        raise Inconclusive(f"Object {number} is not in the cross-reference data")
+    kind, location, position = entry
+    if kind == 1:
+        return _read_object(data, location, number)[0]
+
+    if location not in object_streams:
+        container = entries.get(location)
+        if container is None or container[0] != 1:
+            raise Inconclusive(f"Object stream {location} not found")
+        dictionary, end = _read_object(data, container[1], location)
+        count, first = _integer(dictionary, b'N'), _integer(dictionary, b'First')
+        if count is None or first is None:
+            raise Inconclusive("Malformed object stream")
+        contents = _stream_data(data, end, dictionary)
+        numbers = [int(value) for value in contents[:first].split()]
+        object_streams[location] = (contents, first, dict(zip(numbers[0::2], numbers[1::2])))
+    contents, first, offsets = object_streams[location]
+    if number not in offsets:
+        raise Inconclusive(f"Object {number} missing from its object stream")
+    start = _skip_whitespace(contents, first + offsets[number])
+    return contents[start:_dictionary(contents, start)]
+
+
+def _inspect(data, size):
+    """Structural check of a mapped PDF (see quick_check)."""
+    if data.find(b'%PDF-', 0, HEADER_WINDOW) != 0:
+        if data.rfind(b'%%EOF') < 0:
+            return False, "Not a PDF (no %PDF- header or %%EOF marker)", 0
+        raise Inconclusive("Header not at the start of the file")
+
+    eof = data.rfind(b'%%EOF', max(0, size - TAIL_WINDOW))
+    if eof < 0:
+        if data.rfind(b'%%EOF') < 0:
+            return False, "Truncated (no %%EOF marker)", 0
+        raise Inconclusive("Data after the last %%EOF marker")
+
+    startxref = data.rfind(b'startxref', max(0, eof - TAIL_WINDOW), eof)
+    match = _STARTXREF.match(data, startxref) if startxref >= 0 else None
+    if not match:
+        raise Inconclusive("startxref missing")
+
+    entries = {}
+    root = None
+    offset = int(match.group(1))
+    visited = set()
+    while offset is not None:
+        if offset in visited or len(visited) >= MAX_XREF_SECTIONS or not 0 < offset < size:
+            raise Inconclusive("Broken cross-reference chain")
+        visited.add(offset)
+        position = _skip_whitespace(data, offset)
+        if data[position:position + 4] == b'xref':
+            trailer = _read_xref_table(data, position + 4, entries)
+            hybrid = _integer(trailer, b'XRefStm')
+            if hybrid is not None:
+                _read_xref_stream(data, hybrid, entries)
+        else:
+            trailer = _read_xref_stream(data, position, entries)
+        if root is None:
+            root = _reference(trailer, b'Root')
+        if re.search(rb'/Encrypt\b', trailer):
+            raise Inconclusive("Encrypted")
+        offset = _integer(trailer, b'Prev')
+    if root is None:
+        raise Inconclusive("Trailer has no /Root")
+
+    object_streams = {}
+    catalog = _resolve(data, entries, root, object_streams)
+    pages_root = _reference(catalog, b'Pages')
+    if pages_root is None:
+        raise Inconclusive("Catalog has no /Pages")
+    page_tree = _resolve(data, entries, pages_root, object_streams)
+    if _reference(page_tree, b'Count') is not None:
+        raise Inconclusive("Page tree /Count is an indirect reference")
+    pages = _integer(page_tree, b'Count')
+    if not pages:
+        raise Inconclusive("Page tree /Count is missing or 0")
+    return True, f"Valid ({pages} pages)", pages
+
+
+def quick_check(file_path):
+    """
+    Fast structural tier: validate a PDF from its memory-mapped bytes.
+
+    Checks the %PDF- header, the %%EOF marker, that startxref points at
+    cross-reference data (tables, streams and /Prev chains of incremental
+    updates are followed), that the trailer names a catalog, and reads the
+    page count from the page tree's /Count. Only the few objects on that
+    path are touched, so the cost barely depends on file size.
+
+    Args:
+        file_path (str): Path to PDF file
+
+    Returns:
+        tuple: (is_valid: bool or None, message: str, pages: int)
+               is_valid is None when the file needs a full parse to decide
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return False, "Empty file", 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _inspect(data, size)
+    except Inconclusive as e:
+        return None, str(e), 0
+    except (OSError, ValueError, IndexError, OverflowError, zlib.error) as e:
+        return None, f"Fast check failed: {str(e)[:50]}", 0
+
+
+def sample_pdf(num_pages, indirect_count=False):
+    """
+    Build a minimal valid PDF of blank pages (for self_check).
+
+    Args:
+        num_pages (int): Pages in the document
+        indirect_count (bool): Store the page tree /Count in its own object
+            ('/Count 15 0 R') instead of directly
+
+    Returns:
+        bytes: PDF file contents
+    """
+    count_object = num_pages + 3
+    count = f"{count_object} 0 R" if indirect_count else str(num_pages)
+    kids = ' '.join(f"{number} 0 R" for number in range(3, num_pages + 3))
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", f"<< /Type /Pages /Kids [{kids}] /Count {count} >>"]
+    objects += ["<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>"] * num_pages
+    if indirect_count:
+        objects.append(str(num_pages))
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += b''.join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return data
+
+
+def self_check():
+    """
+    Run quick_check on synthetic files with known answers.
+
+    Guards the cases where a wrong page count would be returned as final:
+    multi-digit /Count values and an indirect /Count (which must escalate,
+    not be read as the digits before ' 0 R').
+
+    Returns:
+        bool: True if every case passed
+    """
+    cases = [
+        ("direct /Count, 12 pages", sample_pdf(12), (True, 12)),
+        ("direct /Count, 3 pages", sample_pdf(3), (True, 3)),
+        ("indirect /Count, 12 pages", sample_pdf(12, indirect_count=True), (None, 0)),
+        ("indirect /Count, 3 pages", sample_pdf(3, indirect_count=True), (None, 0)),
+        ("truncated", sample_pdf(3)[:-40], (False, 0)),
+    ]
+    passed = True
+    with tempfile.TemporaryDirectory() as folder:
+        for name, data, expected in cases:
+            file_path = os.path.join(folder, 'sample.pdf')
+            with open(file_path, 'wb') as f:
+                f.write(data)
+            is_valid, message, pages = quick_check(file_path)
+            ok = (is_valid, pages) == expected
+            passed = passed and ok
+            print(f"{'✓' if ok else '✗'} {name}: {message}")
+    return passed
+
+
+def main():
+    """Fast-check the PDFs given on the command line, or run the self check."""
+    parser = argparse.ArgumentParser(description="Fast structural check of PDF files")
+    parser.add_argument('paths', nargs='*', help="PDF files to check")
+    parser.add_argument('--self-check', action='store_true', help="Check synthetic files with known answers")
+    args = parser.parse_args()
+
+    if args.self_check:
+        sys.exit(0 if self_check() else 1)
+    for file_path in args.paths:
+        is_valid, message, _ = quick_check(file_path)
+        print(f"{'✓' if is_valid else '✗' if is_valid is False else '?'} {file_path}")
+        print(f"  └─ {message}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Health Check Verdict Cache
+Remembers which PDFs passed the health check, keyed by a fingerprint of the file
+Lets repeated checks skip unchanged healthy files and only re-parse new or modified ones
+"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from download.json_store import JsonStore, utc_now
+from validation.pdf_structure import TIER_STANDARD, TIERS
+
+CACHE_NAME = ".health_cache.json"
+HASH_CHUNK = 1024 * 1024  # bytes read per hashing step
+
+
+def file_fingerprint(file_path, with_hash=False):
+    """
+    Fingerprint a file cheaply (size, mtime_ns, inode) and optionally by content.
+
+    Args:
+        file_path (str): Path to the file
+        with_hash (bool): Also hash the contents (catches edits that keep
+            size and modification time, at the cost of reading the file)
+
+    Returns:
+        dict: 'size', 'mtime_ns', 'inode' and 'sha256' (None without with_hash)
+    """
+    stat = os.stat(file_path)
+    sha256 = None
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'inode': stat.st_ino, 'sha256': sha256}
+
+
+class VerdictCache(JsonStore):
+    """Persisted relative path -> {fingerprint, reason, checked} map of healthy files."""
+
+    def __init__(self, root_directory, name=CACHE_NAME, with_hash=False, level=TIER_STANDARD):
+        """
+        Load (or start) the cache stored in a checked tree.
+
+        Args:
+            root_directory (str): Tree the cache belongs to
+            name (str): Cache file name inside the root
+            with_hash (bool): Require a matching sha256 as well as size,
+                mtime and inode before trusting an entry
+            level (str): Validation tier of this run; verdicts reached by a
+                cheaper tier are not trusted
+        """
+        super().__init__(root_directory, name)
+        self.with_hash = with_hash
+        self.level = level
+
+    def _key(self, file_path):
+        """Path relative to the root, with '/' separators."""
+        return os.path.relpath(file_path, self.root_dir).replace(os.sep, '/')
+
+    def is_known_healthy(self, file_path):
+        """
+        Check whether a file passed before and has not changed since.
+
+        Args:
+            file_path (str): Path to PDF file
+
+        Returns:
+            bool: True if the cached verdict can be reused
+        """
+        with self._lock:
+            entry = self.entries.get(self._key(file_path))
+        if entry is None or TIERS.index(entry.get('level', TIER_STANDARD)) < TIERS.index(self.level):
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        if (entry['size'], entry['mtime_ns'], entry['inode']) != (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+            return False
+        if self.with_hash:
+            return entry.get('sha256') is not None and \
+                file_fingerprint(file_path, with_hash=True)['sha256'] == entry['sha256']
+        return True
+
+    def record(self, file_path, fingerprint, is_valid, reason):
+        """
+        Store the verdict of a freshly checked file.
+
+        Only healthy files are kept; a damaged file drops its entry.
+
+        Args:
+            file_path (str): Path to PDF file
+            fingerprint (dict): file_fingerprint() taken before the check
+            is_valid (bool): Check verdict
+            reason (str): Check message
+        """
+        key = self._key(file_path)
+        with self._lock:
+            if is_valid:
+                entry = dict(fingerprint)
+                entry['reason'] = reason
+                entry['level'] = self.level
+                entry['checked'] = utc_now()
+                self.entries[key] = entry
+                self._mark_dirty(key)
+            elif self.entries.pop(key, None) is not None:
+                self._mark_dirty(key)
+
+    def prune(self, seen_paths):
+        """
+        Drop entries of files that no longer exist in the tree.
+
+        Args:
+            seen_paths (iterable): Every file path found by the last full walk
+
+        Returns:
+            int: Number of entries removed
+        """
+        seen = {self._key(path) for path in seen_paths}
+        with self._lock:
+            stale = [key for key in self.entries if key not in seen]
+            for key in stale:
+                del self.entries[key]
+                self._mark_dirty(key)
+        return len(stale)